@@ -0,0 +1,68 @@
+"""Benchmark the native attribute helpers against the `utils.html` macros.
+
+Renders the attributes of a form with many fields, as `wtform_form` does:
+each field calls `apply_classes`, `apply_dattrs` and `apply_prop`.
+
+Usage:
+    python benchmarks/bench_apply_helpers.py [fields]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from flask import Flask
+
+from flask_extras import FlaskExtras
+
+FIELD = ('<div class="{{ apply_classes(field.classes) }}" '
+         '{{ apply_dattrs(field.data_attrs) }} '
+         '{{ apply_prop("id", field.id) }}></div>')
+
+MACROS = ("{% from 'utils.html' import apply_classes, apply_dattrs, "
+          "apply_prop %}{% for field in fields %}" + FIELD + "{% endfor %}")
+
+NATIVE = "{% for field in fields %}" + FIELD + "{% endfor %}"
+
+# The same loop without any helper calls, subtracted from the timings.
+BASELINE = ('{% for field in fields %}<div class="{{ field.id }}"></div>'
+            '{% endfor %}')
+
+
+def _fields(count):
+    """Make the form fields."""
+    return [dict(id='field-{0}'.format(i),
+                 classes=['form-control', 'input-sm', 'field-{0}'.format(i)],
+                 data_attrs={'fieldIndex': i, 'required': 'true'})
+            for i in range(count)]
+
+
+def main():
+    """Run the benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    renders = 200
+    app = FlaskExtras(Flask('bench_apply_helpers'))
+    fields = _fields(count)
+    calls = count * 3 * renders
+    print('apply_* helpers, {0} fields, {1} renders'.format(count, renders))
+    results, times = {}, {}
+    runs = [('baseline', BASELINE), ('macros', MACROS), ('native', NATIVE)]
+    with app.app_context():
+        for name, source in runs:
+            tmpl = app.jinja_env.from_string(source)
+            tmpl.render(fields=fields)
+            start = time.time()
+            for _ in range(renders):
+                results[name] = tmpl.render(fields=fields)
+            times[name] = time.time() - start
+    for name in ['macros', 'native']:
+        taken = times[name] - times['baseline']
+        print('  {0:<7}: {1:.3f}s, {2:.2f}us per call'.format(
+            name, times[name], taken / calls * 1e6))
+    print('  identical output: {0}'.format(
+        results['macros'] == results['native']))
+
+
+if __name__ == '__main__':
+    main()
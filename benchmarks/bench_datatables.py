@@ -0,0 +1,61 @@
+"""Benchmark DataTables server-side requests over a large list of rows.
+
+Each request is timed over the plain list of rows, and over a (warm)
+`SortIndex` of them, as when the same data is paged repeatedly.
+
+Usage:
+    python benchmarks/bench_datatables.py [rows]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from flask_extras.filters.munging import SortIndex
+from flask_extras.views.datatables import datatable_json
+
+COLUMNS = ['id', 'name', 'email', 'score']
+
+REQUESTS = [
+    ('first page', {'start': '0', 'length': '25'}),
+    ('last page', {'start': '-1', 'length': '25'}),
+    ('order by name', {'start': '100', 'length': '25',
+                       'order[0][column]': '1', 'order[0][dir]': 'asc'}),
+    ('order by 2 columns', {'start': '0', 'length': '25',
+                            'order[0][column]': '3', 'order[0][dir]': 'desc',
+                            'order[1][column]': '0', 'order[1][dir]': 'asc'}),
+    ('search', {'start': '0', 'length': '25', 'search[value]': 'user12'}),
+]
+
+
+def _rows(rows):
+    """Generate rows that look like a typical admin report."""
+    return [
+        dict(id=i, name='name{0}'.format(i % 1000),
+             email='user{0}@foo.com'.format(i), score=i % 97)
+        for i in range(rows)
+    ]
+
+
+def main():
+    """Run the benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rows = _rows(count)
+    index = SortIndex(rows)
+    print('datatables server-side processing, {0} rows'.format(count))
+    for name, args in REQUESTS:
+        args = dict(args, draw='1')
+        if args['start'] == '-1':
+            args['start'] = str(count - 25)
+        taken = [
+            min(timeit.repeat(
+                lambda: datatable_json(data, COLUMNS, args=args),
+                number=1, repeat=3))
+            for data in (rows, index)]
+        print('  {0:<20}: list {1:.4f}s, sort index {2:.4f}s'.format(
+            name, *taken))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark formatting a date column per row against in one batch.
+
+Usage:
+    python benchmarks/bench_date_columns.py [rows]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from dateutil.parser import parse as dtparse
+
+from flask_extras.filters import datetimes
+
+
+def _timestrs(rows):
+    """Generate unique ISO-8601 timestamps, as returned by a database."""
+    return ['{0:04d}-{1:02d}-{2:02d} {3:02d}:{4:02d}:{5:02d}'.format(
+        2000 + i % 20, i % 12 + 1, i % 28 + 1, i % 24, i % 60, i % 59)
+        for i in range(rows)]
+
+
+def bench(name, func, timestrs):
+    """Time formatting the whole column with func."""
+    start = time.time()
+    func(timestrs)
+    print('  {0:<30} {1:.3f}s'.format(name, time.time() - start))
+
+
+def main():
+    """Run the benchmark."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    timestrs = _timestrs(rows)
+    fmt = '%Y-%m-%d %H:%M:%S'
+    print('date columns, {0} rows'.format(rows))
+    bench('per row, dateutil (before)', lambda col: [
+        dtparse(t).strftime(fmt) for t in col], timestrs)
+    bench('per row, str2dt', lambda col: [
+        datetimes.str2dt(t, cache=False).strftime(fmt) for t in col],
+        timestrs)
+    if datetimes.numpy is not None:
+        bench('strftime_column, numpy', lambda col: (
+            datetimes.strftime_column(col, fmt=fmt)), timestrs)
+    numpy, datetimes.numpy = datetimes.numpy, None
+    datetimes._PARSE_CACHE.clear()
+    bench('strftime_column, pure python', lambda col: (
+        datetimes.strftime_column(col, fmt=fmt)), timestrs)
+    datetimes.numpy = numpy
+
+
+if __name__ == '__main__':
+    main()
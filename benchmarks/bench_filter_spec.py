@@ -0,0 +1,68 @@
+"""Benchmark filtering keys and values against large exclusion lists.
+
+Compares membership tests against a list (as the macros did for every
+cell) and a compiled `FilterSpec`, and renders `objects2table` with a
+large `filterkeys` list and the same list compiled ahead of time.
+
+Usage:
+    python benchmarks/bench_filter_spec.py [rows] [filters]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from flask import Flask, render_template_string
+
+from flask_extras import FlaskExtras
+from flask_extras.filters.munging import compile_filter
+
+app = Flask('bench_filter_spec')
+FlaskExtras(app)
+
+MACRO = ("{% from 'macros.html' import objects2table %}"
+         "{{ objects2table(objs, filterkeys=filterkeys, "
+         "filtervals=filtervals) }}")
+
+
+def _objs(rows, columns=10):
+    """Generate rows."""
+    keys = ['column{0}'.format(i) for i in range(columns)]
+    return [dict((key, '{0}-{1}'.format(key, i)) for key in keys)
+            for i in range(rows)]
+
+
+def bench(func, number=3):
+    """Return the best time (seconds) of a function."""
+    return min(timeit.repeat(func, number=1, repeat=number))
+
+
+def _cells(objs, keys, vals):
+    """Check every cell of the rows, as the macros do."""
+    return [(k, v) for obj in objs for k, v in obj.items()
+            if k not in keys and v not in vals]
+
+
+def main():
+    """Run the benchmark."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    filters = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    objs = _objs(rows)
+    filterkeys = ['hidden{0}'.format(i) for i in range(filters)]
+    filtervals = ['value{0}'.format(i) for i in range(filters)]
+    print('{0} rows, {1} filter keys and values'.format(rows, filters))
+    for name, keys, vals in [
+            ('lists', filterkeys, filtervals),
+            ('compiled', compile_filter(filterkeys),
+             compile_filter(filtervals))]:
+        taken = bench(lambda: _cells(objs, keys, vals))
+        print('  {0:<24}: {1:.3f}s'.format('cells, ' + name, taken))
+        with app.app_context():
+            taken = bench(lambda: render_template_string(
+                MACRO, objs=objs, filterkeys=keys, filtervals=vals))
+        print('  {0:<24}: {1:.3f}s'.format('objects2table, ' + name, taken))
+
+
+if __name__ == '__main__':
+    main()
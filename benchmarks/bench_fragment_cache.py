@@ -0,0 +1,69 @@
+"""Benchmark rendering a page of cached fragments with each cache backend.
+
+Usage:
+    python benchmarks/bench_fragment_cache.py [rows]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from flask_extras import FlaskExtras
+from flask_extras.cache.backends import MemoryCache
+from flask_extras.cache.shared import SharedMemoryCache
+from flask_extras.cache.sqlite import SQLiteCache
+
+SOURCE = ("{% from 'macros.html' import objects2table %}"
+          "{% for i in range(5) %}"
+          "{% cache 'table-%s'|format(i) %}{{ objects2table(objs) }}"
+          "{% endcache %}{% endfor %}")
+
+
+def _backends(directory):
+    """Get the backends to benchmark."""
+    return [
+        ('no cache', None),
+        ('memory', MemoryCache()),
+        ('shared memory', SharedMemoryCache(
+            path=os.path.join(directory, 'shared.cache'), maxsize=64,
+            slot_size=1024 * 1024)),
+        ('sqlite', SQLiteCache(path=os.path.join(directory, 'cache.db'))),
+    ]
+
+
+def main():
+    """Run the benchmark."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    renders = 50
+    objs = [dict(id=i, name='name{0}'.format(i), email='foo@bar.com')
+            for i in range(rows)]
+    directory = tempfile.mkdtemp()
+    print('fragment cache, 5 tables of {0} rows, {1} renders'.format(
+        rows, renders))
+    for name, cache in _backends(directory):
+        app = Flask('bench_fragment_cache')
+        app.config['FLASK_EXTRAS_FRAGMENT_CACHE'] = \
+            cache if cache is not None else True
+        FlaskExtras(app)
+        if cache is None:
+            app.jinja_env.fragment_cache = None
+        with app.app_context():
+            tmpl = app.jinja_env.from_string(SOURCE)
+            start = time.time()
+            tmpl.render(objs=objs)
+            first = time.time() - start
+            start = time.time()
+            for _ in range(renders):
+                tmpl.render(objs=objs)
+            taken = time.time() - start
+        print('  {0:<14}: first {1:.4f}s, {2:.5f}s per render'.format(
+            name, first, taken / renders))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark grouping large lists of objects with group_by.
+
+Compares the previous per group scans, the single pass grouping and
+reusing a compiled groups spec.
+
+Usage:
+    python benchmarks/bench_group_by.py [objects] [groups]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from collections import OrderedDict
+
+from flask_extras.filters.munging import compile_groups
+from flask_extras.filters.munging import group_by
+
+
+class Obj(object):
+    """A named object, e.g. a form field."""
+
+    def __init__(self, name):
+        """Set the name."""
+        self.name = name
+
+
+def _linear(objs, groups, attr='name', fallback='__unlabeled'):
+    """The previous group_by, scanning all objects once per group."""
+    grouped = OrderedDict()
+    for label, _ in groups:
+        grouped[label] = []
+    seen = []
+    for label, matches in groups:
+        for curr in objs:
+            attr_label = getattr(curr, attr) if hasattr(curr, attr) else ''
+            if attr_label in seen:
+                continue
+            if attr_label in matches:
+                grouped[label].insert(matches.index(attr_label), curr)
+                seen.append(attr_label)
+    grouped[fallback] = [
+        curr for curr in objs if getattr(curr, attr) not in seen]
+    return grouped
+
+
+def bench(func, number=3):
+    """Return the best time (seconds) of a function."""
+    return min(timeit.repeat(func, number=1, repeat=number))
+
+
+def main():
+    """Run the benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ngroups = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    objs = [Obj('field{0}'.format(i)) for i in range(count)]
+    # Group nine tenths of the objects, matched in reverse order.
+    size = count * 9 // 10 // ngroups
+    names = [obj.name for obj in reversed(objs)]
+    groups = [('group{0}'.format(i), tuple(names[i * size:(i + 1) * size]))
+              for i in range(ngroups)]
+    spec = compile_groups(groups)
+    print('group_by, {0} objects in {1} groups'.format(count, ngroups))
+    for name, func, arg in [
+            ('linear', _linear, groups),
+            ('single pass', group_by, groups),
+            ('compiled', group_by, spec)]:
+        taken = bench(lambda: func(objs, arg))
+        print('  {0:<12}: {1:.4f}s'.format(name, taken))
+
+
+if __name__ == '__main__':
+    main()
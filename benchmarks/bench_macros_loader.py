@@ -0,0 +1,70 @@
+"""Benchmark filesystem calls made when rendering with the bundled macros.
+
+With `auto_reload` (the default in debug mode), jinja checks every cached
+template for changes on each load; the filesystem loader does so with a
+`stat` call per template, while the in-memory macros loader makes none.
+
+Usage:
+    python benchmarks/bench_macros_loader.py [renders]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+from flask import Flask
+
+from flask_extras import FlaskExtras
+
+SOURCE = ("{% from '{prefix}macros.html' import dict2list %}"
+          "{% from '{prefix}bootstrap.html' import bs3_label %}"
+          "{{ dict2list({'foo': 'bar'}, classes=['a']) }}"
+          "{{ bs3_label('prod', {'prod': 'danger'}) }}")
+
+
+def _run(renders, prefix='', **config):
+    """Render `renders` times, returning the stat calls and time taken."""
+    app = Flask('bench_macros_loader')
+    app.config.update(config)
+    FlaskExtras(app)
+    app.jinja_env.auto_reload = True
+    source = SOURCE.replace('{prefix}', prefix)
+    calls = [0]
+    stat = os.stat
+
+    def counting_stat(*args, **kwargs):
+        calls[0] += 1
+        return stat(*args, **kwargs)
+    with app.app_context():
+        app.jinja_env.from_string(source).render()
+        os.stat = counting_stat
+        try:
+            start = time.time()
+            for _ in range(renders):
+                app.jinja_env.from_string(source).render()
+            taken = time.time() - start
+        finally:
+            os.stat = stat
+    return calls[0], taken
+
+
+def main():
+    """Run the benchmark."""
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print('macros loader, {0} renders'.format(renders))
+    runs = [
+        ('filesystem (reload)', dict(FLASK_EXTRAS_RELOAD_MACROS=True), ''),
+        ('in-memory', {}, ''),
+        ('in-memory, prefixed', {}, 'extras/'),
+    ]
+    for name, config, prefix in runs:
+        calls, taken = _run(renders, prefix=prefix, **config)
+        print('  {0:<20}: {1:.3f}s, {2} stat calls '
+              '({3:.1f} per render)'.format(
+                  name, taken, calls, calls / float(renders)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark the objects2table macro against the native renderer.
+
+Usage:
+    python benchmarks/bench_objects2table.py [rows]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from flask import Flask, render_template_string
+
+from flask_extras import FlaskExtras
+
+app = Flask('bench_objects2table')
+FlaskExtras(app)
+
+MACRO = ("{% from 'macros.html' import objects2table %}"
+         "{{ objects2table(objs, order=order, filterkeys=['secret'], "
+         "pk_link='/items') }}")
+NATIVE = ("{{ render_objects2table(objs, order=order, filterkeys=['secret'], "
+          "pk_link='/items') }}")
+
+
+def _objs(rows):
+    """Generate rows that look like a typical admin report."""
+    return [
+        dict(id=i, name='name{0}'.format(i), email='user{0}@foo.com'.format(i),
+             url='http://foo.com/{0}'.format(i), secret='shh', active=True)
+        for i in range(rows)
+    ]
+
+
+def bench(source, objs, order, number=3):
+    """Return the best render time (seconds) for a template source."""
+    with app.app_context():
+        return min(timeit.repeat(
+            lambda: render_template_string(source, objs=objs, order=order),
+            number=1, repeat=number))
+
+
+def main():
+    """Run the benchmark."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    objs = _objs(rows)
+    order = ['id', 'name', 'email', 'url', 'active']
+    macro = bench(MACRO, objs, order)
+    native = bench(NATIVE, objs, order)
+    print('objects2table, {0} rows'.format(rows))
+    print('  macro:  {0:.3f}s'.format(macro))
+    print('  native: {0:.3f}s'.format(native))
+    print('  speedup: {0:.1f}x'.format(macro / native))
+
+
+if __name__ == '__main__':
+    main()
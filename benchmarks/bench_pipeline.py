@@ -0,0 +1,80 @@
+"""Benchmark chained munging filters against a lazy pipeline.
+
+Each chained filter builds a full list of intermediate rows; the pipeline
+runs every step per row in one pass, keeping only the final rows (or none,
+when streaming them).
+
+Usage:
+    python benchmarks/bench_pipeline.py [rows]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from flask_extras.filters.munging import filter_keys
+from flask_extras.filters.munging import filter_vals
+from flask_extras.filters.munging import munge
+from flask_extras.filters.munging import sort_dict_keys_from_reflist
+
+ORDER = ['id', 'name', 'email', 'url', 'active']
+HIDDEN = ['secret', 'token']
+
+
+def _rows(count):
+    """Generate rows that look like a typical admin report."""
+    for i in range(count):
+        yield dict(id=i, name='name{0}'.format(i), secret='shh', token='t',
+                   email='user{0}@foo.com'.format(i) if i % 3 else None,
+                   url='http://foo.com/{0}'.format(i), active=True)
+
+
+def chained(count):
+    """Run the filters one after another, as chained in a template."""
+    rows = [filter_keys(row, HIDDEN) for row in _rows(count)]
+    rows = [filter_vals(row, [None]) for row in rows]
+    return [sort_dict_keys_from_reflist(row, ORDER) for row in rows]
+
+
+def pipeline(count):
+    """Run the filters as a pipeline."""
+    return list(munge(_rows(count)).filter_keys(HIDDEN)
+                .filter_vals([None]).sort_dict_keys_from_reflist(ORDER))
+
+
+def streamed(count):
+    """Run the pipeline, consuming each row as it is produced."""
+    for _ in munge(_rows(count)).filter_keys(HIDDEN) \
+            .filter_vals([None]).sort_dict_keys_from_reflist(ORDER):
+        pass
+
+
+def _peak(func, count):
+    """Get the peak memory use (MB) of a function, if it can be traced."""
+    if tracemalloc is None:
+        return float('nan')
+    tracemalloc.start()
+    func(count)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024.0 / 1024.0
+
+
+def main():
+    """Run the benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('munging {0} rows'.format(count))
+    for func in (chained, pipeline, streamed):
+        taken = min(timeit.repeat(lambda: func(count), number=1, repeat=3))
+        print('  {0:<9}: {1:.3f}s, peak {2:.1f}MB'.format(
+            func.__name__, taken, _peak(func, count)))
+
+
+if __name__ == '__main__':
+    main()
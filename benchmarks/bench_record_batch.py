@@ -0,0 +1,81 @@
+"""Benchmark rendering tables from dicts and from columnar record batches.
+
+Compares the memory used to hold a large report as a list of dicts, as a
+`RecordBatch` of arrays and lists, and as a memory mapped batch of numeric
+columns, and the time to render each with the native `objects2table`.
+
+Usage:
+    python benchmarks/bench_record_batch.py [rows]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from flask_extras.filters.munging import RecordBatch
+from flask_extras.renderers.tables import render_objects2table
+
+HEADER = ('id', 'user_id', 'amount', 'quantity', 'name')
+NUMERIC = ('l', 'l', 'd', 'l')
+
+
+def _dicts(rows):
+    """Generate rows that look like a typical admin report."""
+    return [dict(id=i, user_id=i % 97, amount=i * 1.5, quantity=i % 7,
+                 name='name{0}'.format(i)) for i in range(rows)]
+
+
+def _batch(rows):
+    """Build the same rows by column."""
+    return RecordBatch.from_rows(
+        _dicts(rows), header=HEADER, typecodes=dict(zip(HEADER, NUMERIC)))
+
+
+def _mapped(rows, path):
+    """Write and map the numeric columns of the rows."""
+    batch = _batch(rows).select(HEADER[:-1])
+    batch.to_file(path)
+    return RecordBatch.from_file(path, HEADER[:-1], NUMERIC)
+
+
+def _size(func, *args):
+    """Get the memory (MB) held by the result of a function."""
+    if tracemalloc is None:
+        return func(*args), float('nan')
+    tracemalloc.start()
+    result = func(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size / 1024.0 / 1024.0
+
+
+def main():
+    """Run the benchmark."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    path = os.path.join(tempfile.mkdtemp(), 'batch.bin')
+    print('{0} rows'.format(rows))
+    for name, func, args in [
+            ('dicts', _dicts, (rows,)),
+            ('record batch', _batch, (rows,)),
+            ('mapped batch', _mapped, (rows, path))]:
+        data, size = _size(func, *args)
+        taken = min(timeit.repeat(
+            lambda: render_objects2table(data, pk_link='/items'),
+            number=1, repeat=3))
+        print('  {0:<13}: {1:.1f}MB, render {2:.3f}s'.format(
+            name, size, taken))
+        if isinstance(data, RecordBatch):
+            data.close()
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
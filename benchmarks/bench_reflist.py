@@ -0,0 +1,68 @@
+"""Benchmark ordering wide rows by a reference list of keys.
+
+Compares the previous linear `reflist.index` ordering, passing the list
+(compiled per call) and passing a compiled reference list, and renders a
+wide `objects2table` with an order.
+
+Usage:
+    python benchmarks/bench_reflist.py [rows] [columns]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from flask import Flask, render_template_string
+
+from flask_extras import FlaskExtras
+from flask_extras.filters.munging import compile_reflist
+from flask_extras.filters.munging import sort_dict_keys_from_reflist
+
+app = Flask('bench_reflist')
+FlaskExtras(app)
+
+MACRO = ("{% from 'macros.html' import objects2table %}"
+         "{{ objects2table(objs, order=order) }}")
+
+
+def _linear(dct, reflist):
+    """The previous ordering, with a linear scan per key."""
+    items = [d for d in dct.items() if d[0] in reflist]
+    return sorted(items, key=lambda x: reflist.index(x[0]))
+
+
+def _objs(rows, columns):
+    """Generate wide rows."""
+    keys = ['column{0}'.format(i) for i in range(columns)]
+    return [dict((key, i) for key in keys) for i in range(rows)]
+
+
+def bench(func, number=3):
+    """Return the best time (seconds) of a function."""
+    return min(timeit.repeat(func, number=1, repeat=number))
+
+
+def main():
+    """Run the benchmark."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    objs = _objs(rows, columns)
+    order = sorted(objs[0], reverse=True)
+    compiled = compile_reflist(order)
+    print('ordering {0} rows x {1} columns'.format(rows, columns))
+    for name, ref, func in [
+            ('linear', order, _linear),
+            ('list', order, sort_dict_keys_from_reflist),
+            ('compiled', compiled, sort_dict_keys_from_reflist)]:
+        taken = bench(lambda: [func(obj, ref) for obj in objs])
+        print('  {0:<10}: {1:.3f}s'.format(name, taken))
+    with app.app_context():
+        taken = bench(lambda: render_template_string(
+            MACRO, objs=objs[:rows // 10], order=order))
+    print('objects2table, {0} rows x {1} columns: {2:.3f}s'.format(
+        rows // 10, columns, taken))
+
+
+if __name__ == '__main__':
+    main()
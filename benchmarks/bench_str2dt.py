@@ -0,0 +1,46 @@
+"""Benchmark str2dt against plain dateutil parsing.
+
+Usage:
+    python benchmarks/bench_str2dt.py [count]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from dateutil.parser import parse as dtparse
+
+from flask_extras.filters import datetimes
+
+
+def _timestrs(count, distinct=1000):
+    """Generate ISO-8601 timestamps, as typically returned by a database."""
+    unique = ['2016-01-{0:02d} {1:02d}:{2:02d}:{3:02d}'.format(
+        i % 28 + 1, i % 24, i % 60, (i * 7) % 60) for i in range(distinct)]
+    return [unique[i % distinct] for i in range(count)]
+
+
+def bench(name, func, timestrs):
+    """Time parsing all timestrs with func."""
+    start = time.time()
+    for timestr in timestrs:
+        func(timestr)
+    print('  {0:<28} {1:.3f}s'.format(name, time.time() - start))
+
+
+def main():
+    """Run the benchmark."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    timestrs = _timestrs(count)
+    print('str2dt, {0} parses'.format(count))
+    bench('dateutil (before)', dtparse, timestrs)
+    bench('str2dt, iso fast path', lambda t: datetimes.str2dt(
+        t, cache=False), timestrs)
+    datetimes._PARSE_CACHE.clear()
+    bench('str2dt, iso + cache', datetimes.str2dt, timestrs)
+    print('  cache: {0}'.format(datetimes._PARSE_CACHE.info()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark time to first byte of the streaming objects2table renderer.
+
+Rows are generated lazily, so the streamed render never holds more than
+one chunk in memory; time to first chunk should stay flat as rows grow.
+
+Usage:
+    python benchmarks/bench_stream_objects2table.py [chunksize]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from flask_extras.renderers.tables import render_objects2table
+from flask_extras.renderers.tables import stream_objects2table
+
+
+def _objs(rows):
+    """Lazily generate rows, like a `yield_per` query would."""
+    for i in range(rows):
+        yield dict(id=i, name='name{0}'.format(i), active=True,
+                   url='http://foo.com/{0}'.format(i))
+
+
+def main():
+    """Run the benchmark."""
+    chunksize = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print('stream_objects2table, chunksize={0}'.format(chunksize))
+    for rows in (1000, 10000, 100000, 200000):
+        start = time.time()
+        stream = stream_objects2table(_objs(rows), chunksize=chunksize)
+        next(stream)
+        next(stream)
+        first = time.time() - start
+        largest = max(len(chunk) for chunk in stream)
+        total = time.time() - start
+        start = time.time()
+        full = len(render_objects2table(_objs(rows)))
+        buffered = time.time() - start
+        print('  {0:>7} rows: first chunk {1:.4f}s, streamed {2:.3f}s '
+              '(largest chunk {3} bytes), buffered {4:.3f}s '
+              '({5} bytes)'.format(
+                  rows, first, total, largest, buffered, full))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark the wtform_form macro against the native renderer.
+
+Usage:
+    python benchmarks/bench_wtform_form.py [fields]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from flask import Flask, render_template_string
+from wtforms import BooleanField
+from wtforms import Form
+from wtforms import IntegerField
+from wtforms import SelectField
+from wtforms import StringField
+from wtforms import validators
+
+from flask_extras import FlaskExtras
+
+app = Flask('bench_wtform_form')
+FlaskExtras(app)
+
+OPTIONS = ("horizontal=True, input_classes=['form-control'], "
+           "fieldset_groups=groups")
+MACRO = ("{% from 'macros.html' import wtform_form %}"
+         "{{ wtform_form(form, " + OPTIONS + ") }}")
+NATIVE = "{{ render_wtform_form(form, " + OPTIONS + ") }}"
+
+
+def _form_class(fields):
+    """Make a settings style form class with many fields."""
+    attrs = {}
+    for i in range(fields):
+        kind = i % 4
+        if kind == 0:
+            field = StringField(validators=[validators.DataRequired()],
+                                description='Field {0}'.format(i))
+        elif kind == 1:
+            field = BooleanField()
+        elif kind == 2:
+            field = IntegerField()
+        else:
+            field = SelectField(choices=[('a', 'A'), ('b', 'B')])
+        attrs['field_{0:04d}'.format(i)] = field
+    return type('SettingsForm', (Form,), attrs)
+
+
+def _groups(fields):
+    """Group the fields in fieldsets of 20."""
+    names = ['field_{0:04d}'.format(i) for i in range(fields)]
+    return [('Group {0}'.format(i), tuple(names[i:i + 20]))
+            for i in range(0, fields, 20)]
+
+
+def bench(source, form_class, groups, number=5):
+    """Return the best render time (seconds) for a template source."""
+    with app.test_request_context():
+        return min(timeit.repeat(
+            lambda: render_template_string(
+                source, form=form_class(), groups=groups),
+            number=1, repeat=number))
+
+
+def main():
+    """Run the benchmark."""
+    fields = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    form_class = _form_class(fields)
+    groups = _groups(fields)
+    macro = bench(MACRO, form_class, groups)
+    native = bench(NATIVE, form_class, groups)
+    print('wtform_form, {0} fields'.format(fields))
+    print('  macro:  {0:.4f}s'.format(macro))
+    print('  native: {0:.4f}s'.format(native))
+    print('  speedup: {0:.1f}x'.format(macro / native))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,40 @@
 """Hook to setup app easily."""
 
-import os
-
-from flask_extras import macros
+from flask_extras import optimizer
+from flask_extras import templating
+from flask_extras.cache import config as cache_conf
 from flask_extras.filters import config as filter_conf
+from flask_extras.renderers import config as render_conf
+
+__version__ = '4.0.4'
+
 
-import jinja2
+def FlaskExtras(app, filters=None, modules=None, globals=None):
+    """Setup app config.
 
+    Args:
+        app (object): The Flask application instance.
+        filters (list, optional): Only register these filters by name.
+        modules (list, optional): Only register filters from these modules
+            (e.g. ['filters', 'munging']).
+        globals (list, optional): Only register these template globals
+            (native renderers, or filters) by name.
 
-def FlaskExtras(app):
-    """Setup app config."""
-    extra_folders = jinja2.ChoiceLoader([
-        app.jinja_loader,
-        jinja2.FileSystemLoader(os.path.dirname(macros.__file__)),
-    ])
-    app.jinja_loader = extra_folders
+    Returns:
+        app (object): The modified Flask application instance.
+    """
+    # Setup the macros template loader
+    templating.config_macros_loader(app)
+    # Setup the optional whitespace trimming of the macros
+    templating.config_trim_macros(app)
+    # Setup the optional macros bytecode cache
+    templating.config_bytecode_cache(app, version=__version__)
     # Setup template filters
-    filter_conf.config_flask_filters(app)
+    filter_conf.config_flask_filters(app, filters=filters, modules=modules)
+    # Setup native renderers
+    render_conf.config_flask_renderers(app, names=globals)
+    # Setup the optional template optimizer
+    optimizer.config_template_optimizer(app)
+    # Setup the optional fragment cache
+    cache_conf.config_fragment_cache(app)
+    return app
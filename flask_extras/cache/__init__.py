@@ -0,0 +1 @@
+"""Caching of rendered template fragments."""
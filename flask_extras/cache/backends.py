@@ -0,0 +1,105 @@
+"""Fragment cache backends.
+
+A backend stores rendered fragments (text) by key, and implements the
+`BaseCache` interface. Custom backends (e.g. memcached or redis) can be used
+by implementing it, and setting an instance as the
+`app.config['FLASK_EXTRAS_FRAGMENT_CACHE']`.
+"""
+
+from __future__ import absolute_import
+
+from markupsafe import Markup
+
+from flask_extras.filters.memoize import LRUCache
+
+# The type tags of text values stored by the persistent and shared backends.
+_TEXT_TAG = b's'
+_MARKUP_TAG = b'm'
+
+
+def dump_text(value):
+    """Encode a text value as utf-8 bytes, tagged with its type.
+
+    Backends that store bytes use this to return `Markup` as `Markup`, so
+    it is not escaped again.
+
+    Args:
+        value (str): The text or markup.
+
+    Returns:
+        data (bytes): The type tag and encoded value.
+    """
+    tag = _MARKUP_TAG if isinstance(value, Markup) else _TEXT_TAG
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    return tag + value
+
+
+def load_text(data):
+    """Decode a value encoded with `dump_text`.
+
+    Args:
+        data (bytes): The type tag and encoded value.
+
+    Returns:
+        value (str): The text, or `Markup`.
+    """
+    data = bytes(data)
+    value = data[1:].decode('utf-8')
+    if data[:1] == _MARKUP_TAG:
+        return Markup(value)
+    return value
+
+
+class BaseCache(object):
+    """The interface all fragment cache backends implement."""
+
+    def get(self, key, default=None):
+        """Get a value by key.
+
+        Args:
+            key (str): The key.
+            default (mixed, optional): The value to return on a miss.
+
+        Returns:
+            value (str): The cached value, or the default.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Set a value by key.
+
+        Args:
+            key (str): The key.
+            value (str): The value to cache.
+            ttl (int, optional): The number of seconds to keep the value
+                for, overriding the backend default.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove a value by key, if cached.
+
+        Args:
+            key (str): The key.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all entries and reset statistics."""
+        raise NotImplementedError
+
+    def info(self):
+        """Return the hit/miss statistics for the cache.
+
+        Returns:
+            info (CacheInfo): The statistics.
+        """
+        raise NotImplementedError
+
+
+class MemoryCache(LRUCache, BaseCache):
+    """An in-process, size bounded LRU cache, with optional expiry.
+
+    Each process (e.g. each worker) has its own cache.
+    """
@@ -0,0 +1,49 @@
+"""Provides configuration utilities for the fragment cache."""
+
+from __future__ import absolute_import
+
+from .backends import MemoryCache
+from .extension import FragmentCacheExtension
+
+
+def config_fragment_cache(app):
+    """Register the `{% cache %}` tag with a Flask app, if enabled.
+
+    Enable with `app.config['FLASK_EXTRAS_FRAGMENT_CACHE'] = True` for an
+    in-process `MemoryCache`, sized by `FLASK_EXTRAS_FRAGMENT_CACHE_SIZE`
+    (default 1000 fragments) and expiring after
+    `FLASK_EXTRAS_FRAGMENT_CACHE_TTL` seconds (default never), or set it to
+    any `BaseCache` backend instance.
+
+    Args:
+        app (object): The Flask application instance.
+
+    Returns:
+        app (object): The modified Flask application instance.
+    """
+    cache = app.config.get('FLASK_EXTRAS_FRAGMENT_CACHE')
+    # Backends define `__len__`, so an empty one is falsy.
+    if cache is None or cache is False:
+        return app
+    if cache is True:
+        cache = MemoryCache(
+            maxsize=app.config.get('FLASK_EXTRAS_FRAGMENT_CACHE_SIZE', 1000),
+            ttl=app.config.get('FLASK_EXTRAS_FRAGMENT_CACHE_TTL'))
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = cache
+    return app
+
+
+def fragment_cache_info(app):
+    """Get the hit/miss statistics of the fragment cache of an app.
+
+    Args:
+        app (object): The Flask application instance.
+
+    Returns:
+        info (CacheInfo): The statistics, or None if not enabled.
+    """
+    cache = getattr(app.jinja_env, 'fragment_cache', None)
+    if cache is None:
+        return None
+    return cache.info()
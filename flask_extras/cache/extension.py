@@ -0,0 +1,64 @@
+"""A jinja extension for caching rendered template fragments.
+
+Usage:
+{% cache 'users-table', 300 %}
+    {{ objects2table(users) }}
+{% endcache %}
+
+The key can be any expression (e.g. `'user-%s'|format(user.id)`), and is
+namespaced by the template name and a digest of the fragment's template
+code, so editing a fragment never serves stale output. The timeout, in
+seconds, is optional and defaults to that of the backend.
+"""
+
+from __future__ import absolute_import
+
+from hashlib import md5
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCacheExtension(Extension):
+    """Adds the `{% cache key[, timeout] %}...{% endcache %}` tag.
+
+    Fragments are stored in `environment.fragment_cache`, a `BaseCache`
+    backend; if it is None, fragments are rendered as usual.
+    """
+
+    tags = set(['cache'])
+
+    def __init__(self, environment):
+        """Setup the environment."""
+        super(FragmentCacheExtension, self).__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        """Parse the cache tag."""
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        args.append(nodes.ContextReference())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        digest = md5(repr(body).encode('utf-8')).hexdigest()[:16]
+        args.insert(0, nodes.Const('%s:%s' % (parser.name, digest)))
+        return nodes.CallBlock(
+            self.call_method('_cache', args), [], [], body).set_lineno(lineno)
+
+    def _cache(self, prefix, key, ttl, context, caller):
+        """Render a fragment, or get it from the cache."""
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = '%s:%s' % (prefix, key)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, value, ttl=ttl)
+        if context.eval_ctx.autoescape:
+            return Markup(value)
+        return value
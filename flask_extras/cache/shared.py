@@ -0,0 +1,287 @@
+"""A fragment cache backend shared by all processes on a host.
+
+Entries are stored in a memory mapped file (by default in `/dev/shm`, so
+in memory), which every worker maps, so a fragment is rendered and stored
+once per host rather than once per worker.
+
+The file is split into stripes, each with its own lock and a fixed number
+of fixed size slots. A key always maps to the same stripe, so workers only
+contend when using the same stripe, and the least recently used slot of a
+stripe is evicted when it is full. Values larger than a slot are not cached.
+
+Requires `fcntl`, i.e. Linux or another unix.
+"""
+
+from __future__ import absolute_import
+
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+
+from contextlib import contextmanager
+from hashlib import md5
+from threading import Lock
+from time import time
+
+from flask_extras.filters.memoize import CacheInfo
+
+from .backends import BaseCache
+from .backends import dump_text
+from .backends import load_text
+
+# magic, layout version, stripes, slots per stripe, slot size.
+HEADER = struct.Struct('<8sIIII')
+HEADER_SIZE = 64
+MAGIC = b'FXCACHE1'
+VERSION = 2
+
+# Per stripe: LRU clock, hits, misses.
+STRIPE = struct.Struct('<QQQ')
+
+# Per slot: key hash, last used (stripe clock), expiry time (0 for never),
+# key length (0 for an empty slot), value length.
+SLOT = struct.Struct('<QQdII')
+
+try:
+    _TEXT_TYPES = (str, unicode)
+except NameError:
+    _TEXT_TYPES = (str,)
+
+
+def _default_path():
+    """Get the default cache file path, in memory if possible."""
+    directory = '/dev/shm'
+    if not os.path.isdir(directory):
+        directory = tempfile.gettempdir()
+    return os.path.join(directory, 'flask_extras_fragments.cache')
+
+
+def _encode(text):
+    """Encode text as utf-8 bytes."""
+    if isinstance(text, bytes):
+        return text
+    return text.encode('utf-8')
+
+
+class SharedMemoryCache(BaseCache):
+    """A size bounded, lock striped LRU cache shared between processes.
+
+    Only text values are cached; `Markup` is returned as `Markup`.
+    """
+
+    def __init__(self, path=None, maxsize=1024, slot_size=65536, stripes=64,
+                 ttl=None):
+        """Setup the cache, creating the file if needed.
+
+        Args:
+            path (str, optional): The cache file, defaults to one in
+                `/dev/shm` (or the system temp folder).
+            maxsize (int, optional): The number of entries to keep, rounded
+                up to a multiple of `stripes`.
+            slot_size (int, optional): The maximum size of an entry, in bytes.
+            stripes (int, optional): The number of independently locked
+                stripes.
+            ttl (int, optional): The default number of seconds to keep
+                entries for. Defaults to forever.
+        """
+        self.path = path or _default_path()
+        self.stripes = stripes
+        self.slots = max(1, -(-maxsize // stripes))
+        self.maxsize = self.slots * stripes
+        self.slot_size = slot_size
+        self.ttl = ttl
+        self._slots_offset = HEADER_SIZE + stripes * STRIPE.size
+        self._size = self._slots_offset + self.maxsize * slot_size
+        self._locks = [Lock() for _ in range(stripes)]
+        self._fd = self._open()
+        self._map = mmap.mmap(self._fd, self._size)
+
+    def _open(self):
+        """Open the cache file, creating it if needed.
+
+        If the file has a different layout (e.g. another `maxsize`), it is
+        replaced rather than resized, as other processes may have it mapped.
+
+        Returns:
+            fd (int): The open file descriptor.
+        """
+        header = HEADER.pack(
+            MAGIC, VERSION, self.stripes, self.slots, self.slot_size)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            size = os.fstat(fd).st_size
+            if size == 0:
+                self._init_file(fd, header)
+                return fd
+            if size == self._size and os.read(fd, HEADER.size) == header:
+                return fd
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, 0)
+        os.close(fd)
+        tmp = '{0}.{1}.tmp'.format(self.path, os.getpid())
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        self._init_file(fd, header)
+        os.rename(tmp, self.path)
+        return fd
+
+    def _init_file(self, fd, header):
+        """Size an empty cache file and write its header."""
+        os.ftruncate(fd, self._size)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, header)
+
+    @contextmanager
+    def _locked(self, stripe):
+        """Lock a stripe, for threads and other processes."""
+        with self._locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe + 1)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe + 1)
+
+    def _key(self, key):
+        """Get the encoded key, hash and stripe of a key."""
+        key = _encode(key)
+        keyhash = struct.unpack('<Q', md5(key).digest()[:8])[0]
+        return key, keyhash, keyhash % self.stripes
+
+    def _stripe_offset(self, stripe):
+        """Get the offset of a stripe header."""
+        return HEADER_SIZE + stripe * STRIPE.size
+
+    def _slot_offsets(self, stripe):
+        """Get the offsets of all slots in a stripe."""
+        start = self._slots_offset + stripe * self.slots * self.slot_size
+        return range(start, start + self.slots * self.slot_size,
+                     self.slot_size)
+
+    def _find(self, stripe, key, keyhash):
+        """Find the slot of a key in a stripe.
+
+        Returns:
+            slot (tuple): The slot offset and header, or None if not found.
+        """
+        data = self._map
+        for offset in self._slot_offsets(stripe):
+            slot = SLOT.unpack_from(data, offset)
+            if slot[0] == keyhash and slot[3] == len(key):
+                start = offset + SLOT.size
+                if data[start:start + slot[3]] == key:
+                    return offset, slot
+        return None
+
+    def _count(self, stripe, clock=0, hits=0, misses=0):
+        """Update the clock and statistics of a stripe, returning the clock."""
+        offset = self._stripe_offset(stripe)
+        stats = STRIPE.unpack_from(self._map, offset)
+        stats = (stats[0] + clock, stats[1] + hits, stats[2] + misses)
+        STRIPE.pack_into(self._map, offset, *stats)
+        return stats[0]
+
+    def _clear_slot(self, offset):
+        """Mark a slot as empty."""
+        SLOT.pack_into(self._map, offset, 0, 0, 0.0, 0, 0)
+
+    def get(self, key, default=None):
+        """Get a value by key, marking it as recently used."""
+        key, keyhash, stripe = self._key(key)
+        with self._locked(stripe):
+            found = self._find(stripe, key, keyhash)
+            if found is not None:
+                offset, slot = found
+                if slot[2] and slot[2] < time():
+                    self._clear_slot(offset)
+                    found = None
+            if found is None:
+                self._count(stripe, misses=1)
+                return default
+            clock = self._count(stripe, clock=1, hits=1)
+            SLOT.pack_into(self._map, offset, keyhash, clock, *slot[2:])
+            start = offset + SLOT.size + slot[3]
+            value = self._map[start:start + slot[4]]
+        return load_text(value)
+
+    def set(self, key, value, ttl=None):
+        """Set a value by key, evicting the least recently used if full.
+
+        Values that are not text, or are too large for a slot, are not
+        cached.
+        """
+        if not isinstance(value, _TEXT_TYPES):
+            return
+        key, keyhash, stripe = self._key(key)
+        value = dump_text(value)
+        if SLOT.size + len(key) + len(value) > self.slot_size:
+            self.delete(key)
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = time() + ttl if ttl else 0.0
+        with self._locked(stripe):
+            found = self._find(stripe, key, keyhash)
+            if found is not None:
+                offset = found[0]
+            else:
+                offset = self._evictable(stripe)
+            clock = self._count(stripe, clock=1)
+            start = offset + SLOT.size
+            self._map[start:start + len(key) + len(value)] = key + value
+            SLOT.pack_into(self._map, offset, keyhash, clock, expires,
+                           len(key), len(value))
+
+    def _evictable(self, stripe):
+        """Get an empty or expired slot, or the least recently used."""
+        now = time()
+        lru, lru_used = None, None
+        for offset in self._slot_offsets(stripe):
+            slot = SLOT.unpack_from(self._map, offset)
+            if not slot[3] or (slot[2] and slot[2] < now):
+                return offset
+            if lru is None or slot[1] < lru_used:
+                lru, lru_used = offset, slot[1]
+        return lru
+
+    def delete(self, key):
+        """Remove a value by key, if cached."""
+        key, keyhash, stripe = self._key(key)
+        with self._locked(stripe):
+            found = self._find(stripe, key, keyhash)
+            if found is not None:
+                self._clear_slot(found[0])
+
+    def clear(self):
+        """Remove all entries and reset statistics, for all processes."""
+        for stripe in range(self.stripes):
+            with self._locked(stripe):
+                STRIPE.pack_into(
+                    self._map, self._stripe_offset(stripe), 0, 0, 0)
+                for offset in self._slot_offsets(stripe):
+                    self._clear_slot(offset)
+
+    def info(self):
+        """Return the hit/miss statistics of all processes."""
+        hits = misses = size = 0
+        now = time()
+        for stripe in range(self.stripes):
+            with self._locked(stripe):
+                stats = STRIPE.unpack_from(
+                    self._map, self._stripe_offset(stripe))
+                hits += stats[1]
+                misses += stats[2]
+                for offset in self._slot_offsets(stripe):
+                    slot = SLOT.unpack_from(self._map, offset)
+                    if slot[3] and not (slot[2] and slot[2] < now):
+                        size += 1
+        return CacheInfo(hits, misses, self.maxsize, size)
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return self.info().currsize
+
+    def close(self):
+        """Unmap and close the cache file."""
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,273 @@
+"""A persistent fragment cache backend, stored in a SQLite database.
+
+Entries survive restarts and deploys, so new workers start with a warm
+cache, and the database can be shared by all processes on a host. Entries
+are versioned: those written by another version of the package (or app,
+see `SQLiteCache`) are never returned, and are evicted first. Releases with
+another table layout use their own tables, which are left as they are.
+
+The cache is bounded by number of entries and optionally total size;
+expired, then other versions', then least recently used entries are evicted.
+"""
+
+from __future__ import absolute_import
+
+import os
+import sqlite3
+import tempfile
+
+from threading import Lock
+from threading import local
+from time import time
+
+from flask_extras.filters.memoize import CacheInfo
+
+from .backends import BaseCache
+from .backends import dump_text
+from .backends import load_text
+
+# Bump when the table layout changes. Tables are named by layout, so releases
+# of other layouts running side by side (e.g. during a rolling deploy) keep
+# their own entries.
+SCHEMA_VERSION = 2
+
+TABLE = 'fragments_v{0}'.format(SCHEMA_VERSION)
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        key TEXT NOT NULL,
+        version TEXT NOT NULL,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires REAL NOT NULL,
+        used REAL NOT NULL,
+        PRIMARY KEY (key, version)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS {table}_used ON {table} (used)',
+    # The number and total size of entries, kept up to date by triggers so
+    # bounds are checked without scanning the table.
+    '''
+    CREATE TABLE IF NOT EXISTS {table}_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        count INTEGER NOT NULL,
+        size INTEGER NOT NULL
+    )
+    ''',
+    'INSERT OR IGNORE INTO {table}_stats VALUES (0, 0, 0)',
+    '''
+    CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {table}
+    BEGIN
+        UPDATE {table}_stats SET count = count + 1, size = size + NEW.size;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {table}
+    BEGIN
+        UPDATE {table}_stats SET count = count - 1, size = size - OLD.size;
+    END
+    ''',
+]
+
+# When the cache is over its bounds, entries are evicted until it is this
+# fraction under them, so eviction runs once every many writes.
+EVICT_MARGIN = 0.1
+
+# How often (in seconds) the last used time of an entry is updated on a hit,
+# which avoids a write for every read.
+USED_RESOLUTION = 60
+
+try:
+    _TEXT_TYPES = (str, unicode)
+except NameError:
+    _TEXT_TYPES = (str,)
+
+
+def _default_path():
+    """Get the default database path."""
+    return os.path.join(tempfile.gettempdir(), 'flask_extras_fragments.db')
+
+
+class SQLiteCache(BaseCache):
+    """A persistent, size bounded LRU cache shared between processes.
+
+    Only text values are cached; `Markup` is returned as `Markup`. Entries
+    are keyed by key and version, so processes of different versions (e.g.
+    during a rolling deploy) never overwrite each other's. Hit/miss
+    statistics are per process, and the cache can be shared by threads.
+    """
+
+    def __init__(self, path=None, maxsize=10000, max_bytes=None, ttl=None,
+                 version=None, timeout=5):
+        """Setup the cache, creating the database if needed.
+
+        Args:
+            path (str, optional): The database file, defaults to one in the
+                system temp folder.
+            maxsize (int, optional): The number of entries to keep.
+            max_bytes (int, optional): The total size of values to keep, in
+                bytes.
+            ttl (int, optional): The default number of seconds to keep
+                entries for. Defaults to forever.
+            version (str, optional): The app version, e.g. a release or
+                commit. Entries of other versions (of the app or this
+                package) are ignored.
+            timeout (int, optional): The number of seconds to wait for
+                other processes' writes, before giving up.
+        """
+        from flask_extras import __version__
+        self.path = path or _default_path()
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version = '{0}:{1}'.format(__version__, version or '')
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._local = local()
+        self._create(self._connect())
+
+    def _connect(self):
+        """Get the connection of this process and thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create(self, conn):
+        """Create the tables of this layout, if needed."""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for statement in SCHEMA:
+                conn.execute(statement.format(table=TABLE))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get(self, key, default=None):
+        """Get a value by key, marking it as recently used."""
+        now = time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT value, expires, used FROM ' + TABLE +
+                ' WHERE key = ? AND version = ?', (key, self.version)
+            ).fetchone()
+            if row is not None and row[1] and row[1] < now:
+                row = None
+            if row is not None and row[2] < now - USED_RESOLUTION:
+                conn.execute('UPDATE ' + TABLE + ' SET used = ? WHERE key = ? '
+                             'AND version = ?', (now, key, self.version))
+        except sqlite3.Error:
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return load_text(row[0])
+
+    def set(self, key, value, ttl=None):
+        """Set a value by key, evicting entries if the cache is full.
+
+        Values that are not text are not cached.
+        """
+        if not isinstance(value, _TEXT_TYPES):
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time()
+        value = dump_text(value)
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Delete, then insert, as a replace does not run the delete
+                # trigger.
+                conn.execute('DELETE FROM ' + TABLE + ' WHERE key = ? AND '
+                             'version = ?', (key, self.version))
+                conn.execute(
+                    'INSERT INTO ' + TABLE + ' '
+                    '(key, version, value, size, expires, used) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, self.version, sqlite3.Binary(value), len(value),
+                     now + ttl if ttl else 0, now))
+                self._evict(conn, now)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn, now):
+        """Evict entries if the cache is over its bounds.
+
+        Expired, then other versions', then least recently used entries are
+        evicted, until the cache is `EVICT_MARGIN` under its bounds.
+        """
+        count, size = conn.execute(
+            'SELECT count, size FROM ' + TABLE + '_stats').fetchone()
+        if count <= self.maxsize and (
+                self.max_bytes is None or size <= self.max_bytes):
+            return
+        max_count = self.maxsize - int(self.maxsize * EVICT_MARGIN)
+        max_bytes = size if self.max_bytes is None else \
+            self.max_bytes - int(self.max_bytes * EVICT_MARGIN)
+        evicted = []
+        rows = conn.execute(
+            'SELECT key, version, size FROM ' + TABLE + ' ORDER BY '
+            '(expires > 0 AND expires < ?) DESC, version = ?, used',
+            (now, self.version))
+        for key, version, entry_size in rows:
+            if count <= max_count and size <= max_bytes:
+                break
+            evicted.append((key, version))
+            count -= 1
+            size -= entry_size
+        rows.close()
+        conn.executemany(
+            'DELETE FROM ' + TABLE + ' WHERE key = ? AND version = ?',
+            evicted)
+
+    def delete(self, key):
+        """Remove a value by key, if cached."""
+        try:
+            self._connect().execute(
+                'DELETE FROM ' + TABLE + ' WHERE key = ? AND version = ?',
+                (key, self.version))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        """Remove all entries, of all versions, and reset statistics."""
+        self._connect().execute('DELETE FROM ' + TABLE)
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def info(self):
+        """Return the hit/miss statistics of this process."""
+        size = self._connect().execute(
+            'SELECT COUNT(*) FROM ' + TABLE + ' WHERE version = ? AND '
+            '(expires = 0 OR expires >= ?)', (self.version, time())
+        ).fetchone()[0]
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, size)
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return self.info().currsize
+
+    def close(self):
+        """Close the connection of this process and thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
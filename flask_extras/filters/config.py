@@ -2,17 +2,78 @@
 
 from __future__ import absolute_import
 
+from importlib import import_module
 from inspect import getmembers
 from inspect import isfunction
 
-from . import datetimes
-from . import filters
-from . import munging
-from . import random
+from flask_extras.renderers import forms as render_forms
+from flask_extras.renderers import utils as render_utils
+
+from .memoize import memoize
+
+# Static manifest of all registered filters, by module, so that filter
+# modules (and their dependencies, e.g. dateutil) are only imported when
+# a filter is first used. Must match the public functions of each module.
+FILTERS_MANIFEST = {
+    'datetimes': (
+        'dtparse', 'simpledate_column', 'simpledatetime_column', 'str2dt',
+        'str2dt_column', 'strftime_column',
+    ),
+    'filters': (
+        'add', 'addslashes', 'camel2hyphen', 'css_selector', 'cut',
+        'default', 'default_if_none', 'firstof', 'get_digit', 'greet',
+        'is_url', 'islist', 'length_is', 'ljust', 'make_list', 'pagetitle',
+        'phone2numeric', 'questionize_label', 'rjust', 'slugify', 'sql2dict',
+        'title', 'to_json',
+    ),
+    'munging': (
+        'compile_filter', 'compile_groups', 'compile_reflist', 'filter_keys',
+        'filter_list', 'filter_vals', 'group_by', 'munge',
+        'sort_dict_keys_from_reflist', 'sort_dict_vals_from_reflist',
+    ),
+    'random': (
+        'rand_choice', 'rand_color', 'rand_name_title',
+    ),
+}
+
+# The modules registered by default.
+DEFAULT_MODULES = ('filters', 'random', 'munging', 'datetimes')
+
+# Pure filters that are safe to memoize, and their default cache sizes.
+# Enable with `app.config['FLASK_EXTRAS_MEMOIZE_FILTERS'] = True`, and
+# override sizes with `app.config['FLASK_EXTRAS_MEMOIZE_SIZES']`, or share
+# one cache backend (e.g. between processes) with
+# `app.config['FLASK_EXTRAS_MEMOIZE_BACKEND']`.
+MEMOIZED_FILTERS = {
+    'camel2hyphen': 1024,
+    'css_selector': 1024,
+    'phone2numeric': 256,
+    'questionize_label': 1024,
+    'slugify': 1024,
+    'title': 1024,
+}
+
+
+# Native versions of the `utils.html` helpers used by all bundled macros,
+# which are always registered as globals.
+MACRO_HELPERS = {
+    'apply_classes': render_utils.apply_classes,
+    'apply_dattrs': render_utils.apply_dattrs,
+    'apply_prop': render_utils.apply_prop,
+    'wtform_plan': render_forms.wtform_plan,
+}
+
+# The filters of this package used by the bundled macros, which are always
+# registered (unless the app defines its own), whichever filters are
+# selected.
+MACRO_FILTERS = (
+    'camel2hyphen', 'compile_filter', 'compile_reflist', 'css_selector',
+    'cut', 'is_url', 'islist', 'sort_dict_keys_from_reflist', 'str2dt',
+)
 
 
 def _get_funcs(module):
-    """Extract all functions from a module.
+    """Extract all public functions from a module.
 
     Args:
         module (module): A python module reference.
@@ -22,7 +83,97 @@ def _get_funcs(module):
 
     """
     return {name: func for name, func
-            in getmembers(module) if isfunction(func)}
+            in getmembers(module)
+            if isfunction(func) and not name.startswith('_')}
+
+
+class LazyFilter(object):
+    """A proxy for a filter function that is imported on first use."""
+
+    def __init__(self, module, name):
+        """Setup the proxy.
+
+        Args:
+            module (str): The module name, relative to `flask_extras.filters`.
+            name (str): The function name.
+        """
+        self.__module__ = 'flask_extras.filters.{0}'.format(module)
+        self.__name__ = name
+        self.__doc__ = None
+        self._func = None
+
+    def resolve(self):
+        """Import and return the real filter function."""
+        if self._func is None:
+            self._func = getattr(import_module(self.__module__), self.__name__)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        """Call the real filter function."""
+        return (self._func or self.resolve())(*args, **kwargs)
+
+    def __repr__(self):
+        """Return the proxy representation."""
+        return '<LazyFilter {0}.{1}>'.format(self.__module__, self.__name__)
+
+
+def _build_registry():
+    """Build lazy proxies for every filter in the manifest.
+
+    Returns:
+        registry (dict): A dictionary of module names, each with a
+            dictionary of filter names and lazy proxies.
+    """
+    return {module: {name: LazyFilter(module, name) for name in names}
+            for module, names in FILTERS_MANIFEST.items()}
+
+
+# Computed once per process and shared by all apps, so each filter module
+# is imported (and each proxy resolved) at most once.
+REGISTRY = _build_registry()
+
+
+def _get_lazy_funcs(module):
+    """Get lazy proxies for all functions of a module in the manifest.
+
+    Args:
+        module (str): The module name, relative to `flask_extras.filters`.
+
+    Returns:
+        funcs (dict): A dictionary of names and lazy proxies.
+    """
+    try:
+        return dict(REGISTRY[module])
+    except KeyError:
+        raise ValueError('Unknown filter module: {}'.format(module))
+
+
+def get_filters(names=None, modules=None):
+    """Select filters from the shared registry.
+
+    Args:
+        names (list, optional): Filter names to select.
+        modules (list, optional): Module names to select all filters from.
+            If neither `names` nor `modules` are given, all filters are
+            selected.
+
+    Returns:
+        funcs (dict): A dictionary of names and lazy proxies.
+    """
+    if names is None and modules is None:
+        modules = DEFAULT_MODULES
+    funcs = {}
+    for module in modules or []:
+        funcs.update(_get_lazy_funcs(module))
+    if names:
+        allfuncs = {}
+        for module in REGISTRY:
+            allfuncs.update(REGISTRY[module])
+        missing = [name for name in names if name not in allfuncs]
+        if missing:
+            raise ValueError('Unknown filter(s): {}'.format(missing))
+        funcs.update({name: allfuncs[name] for name in names})
+    return funcs
 
 
 def _inject_filters(app, filters):
@@ -40,24 +191,71 @@ def _inject_filters(app, filters):
     return app
 
 
-def config_flask_filters(app):
+def config_flask_filters(app, filters=None, modules=None):
     """Register a Flask app with all the available filters.
 
+    The helpers and filters used by the bundled macros (`MACRO_HELPERS`
+    and `MACRO_FILTERS`) are always registered, whichever filters are
+    selected.
+
     Args:
         app (object): The Flask application instance.
-        filters (list): The list of filter functions to use.
+        filters (list, optional): The list of filter names to use.
+        modules (list, optional): The list of filter modules to use all
+            filters from. Defaults to all filters if neither are given.
 
     Returns:
         app (object): The modified Flask application instance.
     """
-    # Manually register all module functions that were imported.
-    app = _inject_filters(app, _get_funcs(filters))
-    app = _inject_filters(app, _get_funcs(random))
-    app = _inject_filters(app, _get_funcs(munging))
-    app = _inject_filters(app, _get_funcs(datetimes))
+    # Register the shared lazy proxies from the manifest.
+    app = _inject_filters(app, get_filters(names=filters, modules=modules))
+    app = _inject_filters(app, dict(
+        (name, func) for name, func
+        in get_filters(names=MACRO_FILTERS).items()
+        if name not in app.jinja_env.filters))
+    app = _inject_template_globals(app, MACRO_HELPERS)
+    if app.config.get('FLASK_EXTRAS_MEMOIZE_FILTERS'):
+        app = _memoize_filters(
+            app, app.config.get('FLASK_EXTRAS_MEMOIZE_SIZES', {}),
+            cache=app.config.get('FLASK_EXTRAS_MEMOIZE_BACKEND'))
     return app
 
 
+def _memoize_filters(app, sizes, cache=None):
+    """Replace the pure filters of a Flask app with memoized versions.
+
+    Args:
+        app (object): The Flask application.
+        sizes (dict): A dictionary of filter names and cache sizes,
+            overriding the defaults in `MEMOIZED_FILTERS`.
+        cache (object, optional): A cache backend shared by all filters,
+            instead of an LRU cache per filter.
+
+    Returns:
+        app (object): The Flask application.
+    """
+    for name, maxsize in MEMOIZED_FILTERS.items():
+        func = app.jinja_env.filters.get(name)
+        if func is None or hasattr(func, 'cache_info'):
+            continue
+        app.jinja_env.filters[name] = memoize(
+            func, maxsize=sizes.get(name, maxsize), cache=cache)
+    return app
+
+
+def filter_cache_info(app):
+    """Get the hit/miss statistics of all memoized filters of an app.
+
+    Args:
+        app (object): The Flask application instance.
+
+    Returns:
+        stats (dict): A dictionary of filter names and `CacheInfo` tuples.
+    """
+    return {name: func.cache_info() for name, func
+            in app.jinja_env.filters.items() if hasattr(func, 'cache_info')}
+
+
 def _inject_template_globals(app, funcs):
     """Inject a set of functions into a Flask app as template_globals.
 
@@ -69,11 +267,11 @@ def _inject_template_globals(app, funcs):
         app (object): The Flask application.
     """
     for name, func in funcs.iteritems():
-        app.add_template_global(name, func)
+        app.add_template_global(func, name=name)
     return app
 
 
 def config_flask_globals(app):
     """Configure a Flask app to use all functions as template_globals."""
-    app = _inject_template_globals(app, _get_funcs(filters))
+    app = _inject_template_globals(app, _get_lazy_funcs('filters'))
     return app
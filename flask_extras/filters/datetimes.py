@@ -1,19 +1,236 @@
 """Date and date-time related filters."""
 
+import re
+import warnings
+
+from datetime import datetime
+
 from dateutil.parser import parse as dtparse
+from dateutil.tz import tzoffset, tzutc
+
+from .memoize import LRUCache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Strict ISO-8601 dates and date-times, e.g. as returned by most databases.
+_ISO_RE = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?'
+    r'(Z|[+-]\d{2}:?\d{2})?)?\Z'
+)
+
+# Bounded cache of parsed values; datetimes are immutable so can be shared.
+_PARSE_CACHE = LRUCache(maxsize=4096)
+
+_MISSING = object()
+
+# Formats numpy can produce directly, as (datetime_as_string unit, separator).
+_NUMPY_FORMATS = {
+    '%Y-%m-%d': ('D', None),
+    '%Y-%m-%d %H:%M:%S': ('s', ' '),
+    '%Y-%m-%dT%H:%M:%S': ('s', None),
+}
+
+try:
+    _STRING_TYPES = (str, unicode)
+except NameError:
+    _STRING_TYPES = (str,)
+
+
+def _parse_tz(tzstr):
+    """Convert an ISO-8601 timezone designator to a tzinfo, like dateutil.
+
+    Args:
+        tzstr (str): The designator, e.g. 'Z', '+05:00' or '-0130'.
+
+    Returns:
+        tzinfo (tzinfo): The timezone, or None if not specified.
+    """
+    if not tzstr:
+        return None
+    if tzstr == 'Z':
+        return tzutc()
+    sign = -1 if tzstr[0] == '-' else 1
+    tzstr = tzstr[1:].replace(':', '')
+    offset = sign * (int(tzstr[:2]) * 3600 + int(tzstr[2:]) * 60)
+    if offset == 0:
+        return tzutc()
+    return tzoffset(None, offset)
+
+
+def _parse_iso(timestr):
+    """Parse a strict ISO-8601 string without going through dateutil.
+
+    Args:
+        timestr (str) - the datetime as a raw string.
+    Returns:
+        datetime - the parsed datetime, or None if the string is not ISO-8601.
+    """
+    try:
+        match = _ISO_RE.match(timestr)
+    except TypeError:
+        return None
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, frac, tzstr = match.groups()
+    try:
+        return datetime(
+            int(year), int(month), int(day),
+            int(hour or 0), int(minute or 0), int(second or 0),
+            int((frac or '0').ljust(6, '0')), _parse_tz(tzstr))
+    except ValueError:
+        return None
+
+
+def _parse_formats(timestr, formats):
+    """Parse a string with the first matching strptime format.
+
+    Args:
+        timestr (str) - the datetime as a raw string.
+        formats (list) - the strptime formats to try, in order.
+    Returns:
+        datetime - the parsed datetime, or None if no format matched.
+    """
+    for fmt in formats:
+        try:
+            return datetime.strptime(timestr, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
 
 
-def str2dt(timestr):
+def str2dt(timestr, formats=None, cache=True):
     """Convert a string date to a real date.
 
+    Strict ISO-8601 strings are parsed directly, then any given strptime
+    `formats` are tried, before falling back to `dateutil`.
+
+    Usage:
+    {{ timestr|str2dt }}
+    {{ timestr|str2dt(['%d/%m/%Y %H:%M']) }}
+
     Args:
         timestr (str) - the datetime as a raw string.
+        formats (list, optional) - strptime format hints to try first.
+        cache (bool, optional) - use the bounded cache of parsed values
+            (only ISO-8601 and `formats` results are cached).
     Returns:
         dateutil.parser.parse - the parsed datetime object.
     """
+    key = _MISSING
+    if cache and isinstance(timestr, _STRING_TYPES):
+        key = (timestr, tuple(formats)) if formats else timestr
+        parsed = _PARSE_CACHE.get(key, _MISSING)
+        if parsed is not _MISSING:
+            return parsed
+    parsed = _parse_iso(timestr)
+    if parsed is None and formats:
+        parsed = _parse_formats(timestr, formats)
+    if parsed is None:
+        # Not cached, as dateutil fills in missing parts (e.g. of '10:30')
+        # from the current date, and unparseable input is returned as is.
+        return _parse_fallback(timestr)
+    if key is not _MISSING:
+        _PARSE_CACHE.set(key, parsed)
+    return parsed
+
+
+def _parse_fallback(timestr):
+    """Parse a string with dateutil, returning it as is if unparseable."""
     try:
         return dtparse(timestr)
     except (TypeError, ValueError):
         if timestr in ['None', 'null']:
             return None
         return timestr
+
+
+def _numpy_parse(timestrs):
+    """Parse a column of naive ISO-8601 strings with numpy, in one call.
+
+    Args:
+        timestrs (list) - the datetimes as raw strings.
+    Returns:
+        numpy.ndarray - the `datetime64[us]` array, or None if numpy is
+            unavailable or any value is not a naive ISO-8601 date(time).
+    """
+    if numpy is None or not timestrs:
+        return None
+    # Only full dates are safe; numpy and dateutil disagree on partial ones.
+    if not set(map(type, timestrs)).issubset(_STRING_TYPES):
+        return None
+    if min(map(len, timestrs)) < 10:
+        return None
+    with warnings.catch_warnings():
+        # Timezone aware strings warn, and are converted to UTC; skip them.
+        warnings.simplefilter('error')
+        try:
+            parsed = numpy.array(timestrs, dtype='datetime64[us]')
+        except (TypeError, ValueError, Warning):
+            return None
+    if numpy.isnat(parsed).any():
+        return None
+    return parsed
+
+
+def str2dt_column(timestrs, formats=None):
+    """Convert a whole column of string dates to real dates.
+
+    Uses a single numpy `datetime64` conversion when numpy is installed and
+    every value is a naive ISO-8601 date(time), otherwise `str2dt` per value.
+
+    Args:
+        timestrs (list) - the datetimes as raw strings.
+        formats (list, optional) - strptime format hints, see `str2dt`.
+    Returns:
+        list - the parsed values, as `str2dt` would return them.
+    """
+    timestrs = list(timestrs)
+    parsed = _numpy_parse(timestrs)
+    if parsed is not None:
+        return parsed.astype(object).tolist()
+    return [str2dt(timestr, formats=formats) for timestr in timestrs]
+
+
+def strftime_column(timestrs, fmt='%Y-%m-%d %H:%M:%S', formats=None):
+    """Convert and format a whole column of string dates.
+
+    Values that can not be parsed are returned as `str2dt` returns them,
+    like the `simpledate` and `simpledatetime` macros do.
+
+    Usage:
+    {% for date in dates|strftime_column('%Y-%m-%d') %}{{ date }}{% endfor %}
+
+    Args:
+        timestrs (list) - the datetimes as raw strings.
+        fmt (str, optional) - the strftime output format.
+        formats (list, optional) - strptime format hints, see `str2dt`.
+    Returns:
+        list - the formatted values.
+    """
+    timestrs = list(timestrs)
+    parsed = _numpy_parse(timestrs)
+    if parsed is not None and fmt in _NUMPY_FORMATS:
+        unit, sep = _NUMPY_FORMATS[fmt]
+        strs = numpy.datetime_as_string(parsed, unit=unit)
+        if sep is not None:
+            strs = numpy.char.replace(strs, 'T', sep)
+        return strs.tolist()
+    if parsed is not None:
+        dts = parsed.astype(object).tolist()
+    else:
+        dts = [str2dt(timestr, formats=formats) for timestr in timestrs]
+    return [dt.strftime(fmt) if hasattr(dt, 'strftime') else dt for dt in dts]
+
+
+def simpledate_column(timestrs):
+    """Format a whole column of string dates, like the `simpledate` macro."""
+    return strftime_column(timestrs, fmt='%Y-%m-%d')
+
+
+def simpledatetime_column(timestrs):
+    """Format a whole column of string dates, like `simpledatetime`."""
+    return strftime_column(timestrs, fmt='%Y-%m-%d %H:%M:%S')
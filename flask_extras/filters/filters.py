@@ -414,11 +414,13 @@ def islist(item):
     return isinstance(item, list)
 
 
-def sql2dict(queryset):
+def sql2dict(queryset, lazy=False):
     """Return a SQL alchemy style query result into a list of dicts.
 
     Args:
         queryset (object): The SQL alchemy result.
+        lazy (bool, optional): Return a generator instead of a list, so
+            large (e.g. `yield_per`) queries are never fully materialized.
 
     Returns:
         result (list): The converted query set.
@@ -426,4 +428,6 @@ def sql2dict(queryset):
     """
     if queryset is None:
         return []
+    if lazy:
+        return (record.__dict__ for record in queryset)
     return [record.__dict__ for record in queryset]
@@ -0,0 +1,188 @@
+"""Bounded, thread-safe memoization for pure filters."""
+
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from collections import namedtuple
+from functools import wraps
+from threading import Lock
+from time import time
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+_MISSING = object()
+
+# The argument types whose reprs are stable across processes and unique per
+# value, so are used in the keys of a shared cache backend.
+try:
+    _SHARED_TYPES = (str, unicode, int, long, float, bool, type(None))
+except NameError:
+    _SHARED_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def _shareable(args, kwargs):
+    """Check if all arguments can be keyed in a shared cache backend."""
+    return all(type(arg) in _SHARED_TYPES for arg in args) and \
+        all(type(val) in _SHARED_TYPES for val in kwargs.values())
+
+
+class LRUCache(object):
+    """A thread-safe, size bounded, least recently used cache.
+
+    Entries can optionally expire after a number of seconds.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        """Setup the cache.
+
+        Args:
+            maxsize (int, optional): The maximum number of entries to keep.
+            ttl (int, optional): The default number of seconds to keep
+                entries for. Defaults to forever.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._expires = {}
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Get a value by key, marking it as recently used.
+
+        Args:
+            key (mixed): A hashable key.
+            default (mixed, optional): The value to return on a miss.
+
+        Returns:
+            value (mixed): The cached value, or the default.
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            expires = self._expires.get(key) if self._expires else None
+            if expires is not None and expires < time():
+                del self._expires[key]
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Set a value by key, evicting the least recently used if full.
+
+        Args:
+            key (mixed): A hashable key.
+            value (mixed): The value to cache.
+            ttl (int, optional): The number of seconds to keep the value
+                for, overriding the default.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            if ttl:
+                self._expires[key] = time() + ttl
+            elif self._expires:
+                self._expires.pop(key, None)
+            while len(self._data) > self.maxsize:
+                oldest, _ = self._data.popitem(last=False)
+                self._expires.pop(oldest, None)
+
+    def delete(self, key):
+        """Remove a value by key, if cached.
+
+        Args:
+            key (mixed): A hashable key.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset statistics."""
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        """Return the hit/miss statistics for the cache.
+
+        Returns:
+            info (CacheInfo): The statistics.
+        """
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self._data)
+
+
+def memoize(func, maxsize=1024, cache=None):
+    """Memoize a pure function using a bounded LRU cache.
+
+    Calls with unhashable arguments are passed straight through. Keys
+    include the argument types, like `lru_cache(typed=True)`, so equal
+    values of different types (e.g. `Markup` and `str`, `1` and `True`)
+    are cached separately.
+    Like `functools.lru_cache`, the wrapper exposes `cache_info()`
+    and `cache_clear()`.
+
+    Args:
+        func (function): The function to memoize.
+        maxsize (int, optional): The maximum number of results to keep.
+        cache (object, optional): A shared cache backend (see
+            `flask_extras.cache.backends`) to use instead of a new LRU
+            cache. Keys are prefixed with the function name, and made of
+            the argument reprs, so only calls with builtin string and
+            scalar arguments (e.g. not `Markup`) use it; others use a new
+            LRU cache.
+
+    Returns:
+        wrapper (function): The memoized function.
+    """
+    local = LRUCache(maxsize=maxsize)
+    if cache is None:
+        cache = local
+        prefix = None
+    else:
+        prefix = '{0}.{1}'.format(func.__module__, func.__name__)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        store = local
+        if prefix is not None and _shareable(args, kwargs):
+            # The reprs of equal values of different types differ.
+            key = '%s:%r:%r' % (prefix, args, sorted(kwargs.items()))
+            store = cache
+        else:
+            key = args + tuple(type(arg) for arg in args)
+            if kwargs:
+                items = tuple(sorted(kwargs.items()))
+                key += (_MISSING,) + items + tuple(type(v) for _, v in items)
+        try:
+            value = store.get(key, _MISSING)
+        except TypeError:
+            return func(*args, **kwargs)
+        if value is _MISSING:
+            value = func(*args, **kwargs)
+            store.set(key, value)
+        return value
+
+    def cache_clear():
+        """Clear the cache, and the LRU cache used alongside a shared one."""
+        cache.clear()
+        local.clear()
+
+    wrapper.cache = cache
+    wrapper.cache_info = cache.info
+    wrapper.cache_clear = cache_clear
+    return wrapper
@@ -1,6 +1,165 @@
 """Filters for working with data structures, munging, etc..."""
 
+import mmap
+import os
+import sys
+
+from array import array
 from collections import OrderedDict
+from functools import partial
+from itertools import chain
+from numbers import Real
+from operator import itemgetter
+from threading import Lock
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+try:
+    from itertools import imap as _imap
+except ImportError:
+    _imap = map
+
+try:
+    _TEXT_TYPE = unicode
+except NameError:
+    _TEXT_TYPE = str
+
+# Dicts keep insertion order from python 3.7.
+_ORDERED_DICT = dict if sys.version_info >= (3, 7) else OrderedDict
+
+
+class RefOrder(object):
+    """A reference list compiled for ordering, see `compile_reflist`.
+
+    The position of each reference value is looked up in a rank map built
+    once, rather than with `reflist.index` for every item. If any reference
+    value is unhashable (e.g. a dict), values are looked up linearly.
+    Iterating, `len` and `in` work as for the reference list itself.
+    """
+
+    def __init__(self, reflist):
+        """Compile the rank map.
+
+        Args:
+            reflist (list): The reference list of keys (or values).
+        """
+        self.reflist = list(reflist)
+        ranks = {}
+        try:
+            for rank, val in enumerate(self.reflist):
+                ranks.setdefault(val, rank)
+        except TypeError:
+            ranks = None
+        self.ranks = ranks
+
+    def rank(self, val):
+        """Get the position of a value in the reference list, or None."""
+        if self.ranks is not None:
+            try:
+                return self.ranks.get(val)
+            except TypeError:
+                pass
+        try:
+            return self.reflist.index(val)
+        except ValueError:
+            return None
+
+    def sort_keys(self, dct):
+        """Keep and sort the items of a dict found in the reference list.
+
+        Args:
+            dct (dict): The dictionary (or its items), ordered by its keys.
+        Returns:
+            list: The sorted items, as in `dict.items()`.
+        """
+        items = dct.items() if isinstance(dct, Mapping) else dct
+        if self.ranks is None:
+            return self._sort_items(items, 0)
+        if not isinstance(dct, (Mapping, list, tuple)):
+            # Items may be sorted twice, see below.
+            items = list(items)
+        try:
+            slotted = self._slot_items(items)
+        except TypeError:
+            # An unhashable key, in a list of items.
+            slotted = None
+        if slotted is None:
+            return self._sort_items(items, 0)
+        return slotted
+
+    def _slot_items(self, items):
+        """Place each item in the slot of its key's rank, so no sort is needed.
+
+        Returns:
+            list: The sorted items, or None if keys repeat (which items
+                other than those of a dict can), as they share a slot.
+        """
+        get = self.ranks.get
+        slots = [None] * len(self.reflist)
+        for item in items:
+            rank = get(item[0])
+            if rank is not None:
+                if slots[rank] is not None:
+                    return None
+                slots[rank] = item
+        return [item for item in slots if item is not None]
+
+    def sort_vals(self, dct):
+        """Keep and sort the items of a dict found in the reference list.
+
+        Args:
+            dct (dict): The dictionary (or its items), ordered by its
+                values.
+        Returns:
+            list: The sorted items, as in `dict.items()`.
+        """
+        items = dct.items() if isinstance(dct, Mapping) else dct
+        return self._sort_items(items, 1)
+
+    def _sort_items(self, items, pos):
+        """Keep and sort items by the rank of the value at `pos`."""
+        rank = self.rank
+        ranked = []
+        for item in items:
+            idx = rank(item[pos])
+            if idx is not None:
+                ranked.append((idx, item))
+        ranked.sort(key=itemgetter(0))
+        return [item for _, item in ranked]
+
+    def __iter__(self):
+        """Iterate over the reference list."""
+        return iter(self.reflist)
+
+    def __len__(self):
+        """Return the length of the reference list."""
+        return len(self.reflist)
+
+    def __contains__(self, val):
+        """Check if a value is in the reference list."""
+        return self.rank(val) is not None
+
+
+def compile_reflist(reflist):
+    """Compile a reference list, for ordering many dicts by it.
+
+    Usage:
+    {% set order = ['id', 'name', 'email']|compile_reflist %}
+    {% for obj in objs %}{{ obj|sort_dict_keys_from_reflist(order) }}...
+
+    Args:
+        reflist (list): The reference list of keys (or values).
+    Returns:
+        RefOrder: The compiled reference list, which can be passed in place
+            of the list to `sort_dict_keys_from_reflist`,
+            `sort_dict_vals_from_reflist` and `objects2table(order=...)`.
+    """
+    if isinstance(reflist, RefOrder):
+        return reflist
+    return RefOrder(reflist)
 
 
 def sort_dict_vals_from_reflist(dct, reflist):
@@ -8,29 +167,120 @@ def sort_dict_vals_from_reflist(dct, reflist):
 
     Args:
         dct (dict): The original dictionary
-        reflist (list): The reference list of keys to use for sorting.
+        reflist (list): The reference list of keys to use for sorting,
+            or a compiled one (see `compile_reflist`).
     Returns:
         list: A sorted list of 2-tuples representing
             the dictionary (as found in `dict.items()`)
     """
-    items = dct.items()
-    items = [d for d in items if d[1] in reflist]
-    return sorted(items, key=lambda x: reflist.index(x[1]))
+    if isinstance(dct, (Pipeline, RecordBatch)):
+        return munge(dct).sort_dict_vals_from_reflist(reflist)
+    return compile_reflist(reflist).sort_vals(dct)
 
 
 def sort_dict_keys_from_reflist(dct, reflist, omit=False):
     """Return sorted dict vals from reference list for reference (of keys).
 
     Args:
-        dct (dict): The original dictionary
-        reflist (list): The reference list of keys to use for sorting.
+        dct (dict): The original dictionary, or a `RecordBatch`, whose
+            columns are sorted (and kept) instead.
+        reflist (list): The reference list of keys to use for sorting,
+            or a compiled one (see `compile_reflist`).
     Returns:
         list: A sorted list of 2-tuples representing
-            the dictionary (as found in `dict.items()`)
+            the dictionary (as found in `dict.items()`), or a `RecordBatch`
+            of the sorted columns, given one.
+    """
+    if isinstance(dct, Pipeline):
+        return dct.sort_dict_keys_from_reflist(reflist)
+    order = compile_reflist(reflist)
+    if isinstance(dct, RecordBatch):
+        # Every row has the same keys, so the columns are ordered instead.
+        header = order.sort_keys([(key, None) for key in dct.header])
+        return dct.select(key for key, _ in header)
+    return order.sort_keys(dct)
+
+
+class FilterSpec(object):
+    """Keys or values to filter out, compiled for fast membership tests.
+
+    Built from a list (or set, tuple) of values, and optionally predicates:
+    a value is in the spec if it equals one of the values, or any predicate
+    returns True for it. Values are kept in a set; unhashable values (e.g.
+    dicts) are compared linearly, as with a list.
+
+    >>> hidden = FilterSpec(['password', 'token'],
+                            predicates=[lambda key: key.startswith('_')])
+    >>> '_id' in hidden
+    True
+    """
+
+    def __init__(self, values=(), predicates=()):
+        """Compile the values.
+
+        Args:
+            values (iterable, optional): The values to filter out.
+            predicates (list, optional): Functions of a value, returning
+                True if it should be filtered out.
+        """
+        self.values = list(values)
+        self.predicates = list(predicates)
+        self.hashed = set()
+        self.unhashable = []
+        for val in self.values:
+            try:
+                self.hashed.add(val)
+            except TypeError:
+                self.unhashable.append(val)
+
+    def __contains__(self, val):
+        """Check if a value is filtered out."""
+        try:
+            if val in self.hashed:
+                return True
+        except TypeError:
+            if val in self.values:
+                return True
+        else:
+            if self.unhashable and val in self.unhashable:
+                return True
+        return any(test(val) for test in self.predicates)
+
+    def __iter__(self):
+        """Iterate over the values (but not the predicates)."""
+        return iter(self.values)
+
+    def __bool__(self):
+        """Check if the spec filters anything."""
+        return bool(self.values or self.predicates)
+
+    __nonzero__ = __bool__
+
+
+def compile_filter(spec):
+    """Compile keys or values to filter out, for many membership tests.
+
+    Usage:
+    {% set hidden = ['password', 'token']|compile_filter %}
+    {{ objects2table(users, filterkeys=hidden) }}
+
+    Args:
+        spec (mixed): A list, tuple or set of values, a predicate function
+            of a value, or a compiled spec. None is an empty spec.
+    Returns:
+        FilterSpec: The compiled spec, accepted as `filterkeys` and
+            `filtervals` (and `filter_headings`) by all macros, renderers
+            and the filter functions. Text is returned as is, as the
+            macros have always tested it as a substring (e.g. a single
+            key, `filterkeys='name'`).
     """
-    items = dct.items()
-    items = [d for d in items if d[0] in reflist]
-    return sorted(items, key=lambda x: reflist.index(x[0]))
+    if isinstance(spec, (FilterSpec, str, _TEXT_TYPE)):
+        return spec
+    if spec is None:
+        return FilterSpec()
+    if callable(spec):
+        return FilterSpec(predicates=[spec])
+    return FilterSpec(spec)
 
 
 def filter_list(lst, vals):
@@ -42,6 +292,10 @@ def filter_list(lst, vals):
     Returns:
         string (dict): The filtered dict.
     """
+    if isinstance(lst, (Pipeline, RecordBatch)):
+        return munge(lst).filter_list(vals)
+    if isinstance(vals, FilterSpec) and isinstance(lst, list):
+        return list(set(val for val in lst if val not in vals))
     if any([not lst, not isinstance(lst, list), not isinstance(vals, list)]):
         return lst
     return list(set(lst).difference(set(vals)))
@@ -52,12 +306,16 @@ def filter_vals(obj, vals):
 
     Args:
         obj (dict): The dictionary to filter.
+        vals (list): The values to filter out, or a `FilterSpec`.
 
     Returns:
         obj (dict): The filtered dict.
     """
-    if obj is None or not isinstance(vals, list):
+    if isinstance(obj, (Pipeline, RecordBatch)):
+        return munge(obj).filter_vals(vals)
+    if obj is None or not isinstance(vals, (list, FilterSpec)):
         return obj
+    vals = compile_filter(vals)
     newdict = {}
     for k, v in obj.items():
         if v in vals:
@@ -70,13 +328,22 @@ def filter_keys(obj, keys):
     """Filter a dictionary by keys.
 
     Args:
-        obj (dict): The dictionary to filter.
+        obj (dict): The dictionary to filter, or a `RecordBatch`, whose
+            columns are filtered instead.
+        keys (list): The keys to filter out, or a `FilterSpec`.
 
     Returns:
-        obj (dict): The filtered dict.
+        obj (dict): The filtered dict, or a `RecordBatch` of the kept
+            columns, given one.
     """
-    if obj is None or not isinstance(keys, list):
+    if isinstance(obj, Pipeline):
+        return obj.filter_keys(keys)
+    if obj is None or not isinstance(keys, (list, FilterSpec)):
         return obj
+    if isinstance(obj, RecordBatch):
+        keys = compile_filter(keys)
+        return obj.select(key for key in obj.header if key not in keys)
+    keys = compile_filter(keys)
     newdict = {}
     for k, v in obj.items():
         if k in keys:
@@ -85,14 +352,163 @@ def filter_keys(obj, keys):
     return newdict
 
 
+class GroupSpec(object):
+    """A `group_by` groups spec compiled into a match index.
+
+    Each match maps to the position of the first group containing it, and
+    its index in that group, so objects are grouped in a single pass.
+    Groups with unhashable matches, or matches that are not a list or
+    tuple, are checked linearly, as before. Iterating and `len` work as
+    for the groups spec itself.
+    """
+
+    def __init__(self, groups):
+        """Compile the match index.
+
+        Args:
+            groups (list): A list of 2-tuples where the first index is the
+                group name, and the second key is a tuple of all matches.
+        """
+        self.groups = [tuple(group) for group in groups]
+        self.index = {}
+        self.linear = []
+        for pos, (_, matches) in enumerate(self.groups):
+            if not isinstance(matches, (list, tuple)):
+                self.linear.append((pos, matches))
+                continue
+            try:
+                for idx, match in enumerate(matches):
+                    self.index.setdefault(match, (pos, idx))
+            except TypeError:
+                self.linear.append((pos, matches))
+
+    def locate(self, label):
+        """Find the first group matching a label.
+
+        Args:
+            label (mixed): The label of an object.
+        Returns:
+            tuple: The group position and the index of the label in its
+                matches, or None if no group matches.
+        """
+        try:
+            found = self.index.get(label)
+        except TypeError:
+            found = None
+        for pos, matches in self.linear:
+            if found is not None and pos > found[0]:
+                break
+            try:
+                if label in matches:
+                    return pos, matches.index(label)
+            except TypeError:
+                continue
+        return found
+
+    def __iter__(self):
+        """Iterate over the groups."""
+        return iter(self.groups)
+
+    def __len__(self):
+        """Return the number of groups."""
+        return len(self.groups)
+
+
+def compile_groups(groups):
+    """Compile a `group_by` groups spec, for grouping many lists by it.
+
+    Args:
+        groups (list): A list of 2-tuples where the first index is the group
+            name, and the second key is a tuple of all matches.
+    Returns:
+        GroupSpec: The compiled groups, which can be passed in place of the
+            list to `group_by`.
+    """
+    if isinstance(groups, GroupSpec):
+        return groups
+    return GroupSpec(groups)
+
+
+def _label_getter(attr):
+    """Get a function returning the label of an object.
+
+    Args:
+        attr (mixed): An attribute (or key, for dicts) name, or a function
+            of an object such as `operator.attrgetter` or `itemgetter`.
+    Returns:
+        func (function): A function of an object, returning its label, or
+            '' if it has none.
+    """
+    if callable(attr):
+        def _label(obj):
+            try:
+                return attr(obj)
+            except (AttributeError, LookupError):
+                return ''
+        return _label
+
+    def _label(obj):
+        if isinstance(obj, Mapping):
+            return obj.get(attr, '')
+        return getattr(obj, attr, '')
+    return _label
+
+
+def _seen(label, seen, seen_unhashable, add=False):
+    """Check if a label has been seen, optionally marking it as seen."""
+    try:
+        if add:
+            seen.add(label)
+        return label in seen
+    except TypeError:
+        if add:
+            seen_unhashable.append(label)
+        return label in seen_unhashable
+
+
+def _place(objs, spec, label_of):
+    """Find the group of every object, in a single pass.
+
+    Args:
+        objs (list): The objects.
+        spec (GroupSpec): The compiled groups.
+        label_of (function): A function returning the label of an object.
+    Returns:
+        tuple: The (index, object) placements of each group, in object
+            order, and the objects no group matches.
+    """
+    placed = [[] for _ in spec.groups]
+    seen = set()
+    seen_unhashable = []
+    unlabeled = []
+    for curr in objs:
+        label = label_of(curr)
+        if _seen(label, seen, seen_unhashable):
+            continue
+        found = spec.locate(label)
+        if found is None:
+            unlabeled.append(curr)
+            continue
+        pos, idx = found
+        placed[pos].append((idx, curr))
+        _seen(label, seen, seen_unhashable, add=True)
+    return placed, unlabeled
+
+
 def group_by(objs, groups=[], attr='name', fallback='__unlabeled'):
     """Group a list of objects into an ordered dict grouped by specified keys.
 
+    Only the first object with a given label is grouped, and objects with
+    labels no group matches are grouped last, under the fallback label.
+
     Args:
-        objs: A list of objects
+        objs: A list of objects, or dicts.
         keys: A list of 2-tuples where the first index is the group name,
-            and the second key is a tuple of all matches.
-        attr: The attr to use to get fields for matching (default: 'name')
+            and the second key is a tuple of all matches, or the list
+            compiled with `compile_groups`.
+        attr: The attr to use to get fields for matching (default: 'name'),
+            the key for dicts, or a function of an object returning its
+            label, e.g. `operator.itemgetter('name')`.
         fallback: A fallback label to use for unspecified groups.
 
     Returns:
@@ -101,26 +517,604 @@ def group_by(objs, groups=[], attr='name', fallback='__unlabeled'):
     >>> group_by([obj1, obj2],
                  groups=[('g1', ('name1', 'name2'))], attr='name')
     """
-    grouped = OrderedDict()
     if not groups or attr is None:
         return {fallback: objs}
-    # Initial population since it's not a defaultdict.
-    for ordered_group in groups:
-        label, _ = ordered_group
-        grouped[label] = []
-    seen = []
-    for ordered_group in groups:
-        label, matches = ordered_group
-        for curr in objs:
-            attr_label = getattr(curr, attr) if hasattr(curr, attr) else ''
-            if attr_label in seen:
-                continue
-            if attr_label in matches:
-                idx = matches.index(attr_label)
-                grouped[label].insert(idx, curr)
-                seen.append(attr_label)
+    spec = compile_groups(groups)
+    grouped = OrderedDict((label, []) for label, _ in spec.groups)
+    placed, unlabeled = _place(objs, spec, _label_getter(attr))
+    # Objects are inserted at their match index, as they are placed, so the
+    # order within a group is unchanged when some matches are missing.
+    for (label, _), items in zip(spec.groups, placed):
+        group = grouped[label]
+        for idx, curr in items:
+            group.insert(idx, curr)
     # Add unlabeled extras last so order is preserved.
-    grouped[fallback] = [
-        curr for curr in objs if getattr(curr, attr) not in seen
-    ]
+    grouped[fallback] = unlabeled
     return grouped
+
+
+def _as_items(row):
+    """Get the items of a row, or of an object's `__dict__` (as `sql2dict`)."""
+    if isinstance(row, Mapping):
+        return list(row.items())
+    return list(row.__dict__.items())
+
+
+def _compose(funcs):
+    """Compose functions of the items of a row into a function of a row."""
+    def _row(row):
+        items = _as_items(row)
+        for func in funcs:
+            items = func(items)
+        return _ORDERED_DICT(items)
+    return _row
+
+
+class Pipeline(object):
+    """A lazy chain of munging operations over rows (dicts or objects).
+
+    Operations are recorded, not run: iterating the pipeline runs all of
+    them in a single pass over the rows, one row at a time, so only the
+    final rows are built and a generator (e.g. a SQLAlchemy `yield_per`
+    query) is never materialized. Row and key order is preserved. The
+    operations on keys and values convert rows that are not dicts by their
+    `__dict__`, as with `sql2dict`, while `filter_list` compares (and
+    yields) rows as they are, so a pipeline of only `filter_list` yields
+    the original rows.
+
+    As with the filter functions, operations given a spec that is not a
+    list (or `FilterSpec`) do nothing.
+
+    Each operation returns a new pipeline, and the munging filters return
+    one when given a pipeline, so they can be chained in templates:
+
+    {% for row in query|munge|filter_keys(['password'])
+                             |sort_dict_keys_from_reflist(order) %}
+
+    Note a pipeline over a generator can only be iterated once.
+    """
+
+    def __init__(self, rows, steps=()):
+        """Setup the pipeline.
+
+        Args:
+            rows (iterable): The rows.
+            steps (tuple, optional): The recorded operations, as
+                (per_row, func) 2-tuples: functions of the items of a row,
+                returning new items, or of an iterator of rows, returning
+                a new iterator.
+        """
+        self.rows = rows
+        self.steps = tuple(steps)
+
+    def _then(self, func, per_row=True):
+        """Return a new pipeline with an operation added."""
+        return Pipeline(self.rows, self.steps + ((per_row, func),))
+
+    def filter_keys(self, keys):
+        """Remove keys from every row, see `filter_keys`."""
+        if not isinstance(keys, (list, FilterSpec)):
+            return self
+        keys = compile_filter(keys)
+        if isinstance(keys, FilterSpec) and not keys.predicates and \
+                not keys.unhashable:
+            # Keys are hashable, so the set can be checked directly.
+            keys = keys.hashed
+        return self._then(
+            lambda items: [item for item in items if item[0] not in keys])
+
+    def filter_vals(self, vals):
+        """Remove values from every row, see `filter_vals`."""
+        if not isinstance(vals, (list, FilterSpec)):
+            return self
+        vals = compile_filter(vals)
+        return self._then(
+            lambda items: [item for item in items if item[1] not in vals])
+
+    def sort_dict_keys_from_reflist(self, reflist):
+        """Order (and keep) the keys of every row by a reference list."""
+        return self._then(compile_reflist(reflist).sort_keys)
+
+    def sort_dict_vals_from_reflist(self, reflist):
+        """Order (and keep) the values of every row by a reference list."""
+        return self._then(compile_reflist(reflist).sort_vals)
+
+    def filter_list(self, vals):
+        """Remove the rows in `vals`, keeping order and duplicates."""
+        if not isinstance(vals, (list, FilterSpec)):
+            return self
+        vals = compile_filter(vals)
+        return self._then(
+            lambda rows: (row for row in rows if row not in vals),
+            per_row=False)
+
+    def group_by(self, groups=[], attr='name', fallback='__unlabeled'):
+        """Run the pipeline and group the rows, see `group_by`."""
+        return group_by(self, groups=groups, attr=attr, fallback=fallback)
+
+    def __iter__(self):
+        """Run the pipeline, yielding the final rows."""
+        rows = iter(self.rows)
+        funcs = []
+        # Consecutive operations on rows run as one function of each row,
+        # which only builds the final dict.
+        for per_row, func in self.steps + ((False, None),):
+            if per_row:
+                funcs.append(func)
+                continue
+            if funcs:
+                rows = _imap(_compose(funcs), rows)
+                funcs = []
+            if func is not None:
+                rows = func(rows)
+        return rows
+
+
+def munge(rows):
+    """Start a lazy munging pipeline over rows, see `Pipeline`.
+
+    Usage:
+    {% for row in users|munge|filter_keys(['password'])|filter_vals([None]) %}
+
+    Args:
+        rows (iterable): The rows, as dicts or objects, e.g. a list, a
+            generator or a SQLAlchemy query.
+    Returns:
+        Pipeline: The pipeline.
+    """
+    if isinstance(rows, Pipeline):
+        return rows
+    return Pipeline(rows if rows is not None else [])
+
+
+def _sort_value(val, desc, text=False):
+    """Get the sort key of a value, ordering None last in either direction.
+
+    Args:
+        val (mixed): The value.
+        desc (bool): Whether the sort is descending (reversed).
+        text (bool, optional): Order numbers first, then other values as
+            text, for values of types that can not be compared.
+    Returns:
+        tuple: The sort key.
+    """
+    last = val is None
+    if text and not last:
+        val = (0, val) if isinstance(val, Real) else (1, _TEXT_TYPE(val))
+    return (last != desc, val)
+
+
+class SortIndex(object):
+    """Reusable sort orders over a list of dicts or objects.
+
+    The order of the rows for a sort order (a list of (key, descending)
+    2-tuples, e.g. `[('name', False), ('id', True)]`) is computed once and
+    kept, so paging through sorted rows is an O(page size) slice rather
+    than a sort per request. Orders are kept until the version changes, see
+    `update`. Sorting is stable, and None values sort after all others, in
+    either direction. Values of types that can not be compared (in python 3)
+    are ordered numbers first, then the others as text. An index can be
+    shared by threads, e.g. as a module level global.
+
+    >>> index = SortIndex(rows, version=etag)
+    >>> index.page([('name', False)], 0, 25)
+    """
+
+    def __init__(self, rows, version=None, maxorders=32):
+        """Setup the index.
+
+        Args:
+            rows (list): The rows, as dicts or objects.
+            version (mixed, optional): The version of the rows, e.g. a
+                timestamp or etag.
+            maxorders (int, optional): The number of sort orders to keep.
+        """
+        self.rows = rows
+        self.version = version
+        self.maxorders = maxorders
+        self._orders = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.rows)
+
+    def update(self, rows, version):
+        """Replace the rows and drop all orders, if the version changed.
+
+        Args:
+            rows (mixed): The rows, or a function returning them, which is
+                only called if the version changed.
+            version (mixed): The version of the rows.
+
+        Returns:
+            bool: Whether or not the rows were replaced.
+        """
+        with self._lock:
+            if version == self.version:
+                return False
+            self.rows = rows() if callable(rows) else rows
+            self.version = version
+            self._orders.clear()
+            return True
+
+    def _getter(self, key):
+        """Get a function returning the `key` value of a row."""
+        if self.rows and isinstance(self.rows[0], Mapping):
+            return lambda row: row.get(key)
+        return lambda row: getattr(row, key, None)
+
+    def _sort_key(self, key, desc, text=False):
+        """Get a sort key function of a row index, see `_sort_value`."""
+        rows, get = self.rows, self._getter(key)
+        return lambda i: _sort_value(get(rows[i]), desc, text=text)
+
+    def _sort(self, order, text=False):
+        """Sort the row indexes, from the least significant key."""
+        indexes = list(range(len(self.rows)))
+        for key, desc in reversed(order):
+            indexes.sort(key=self._sort_key(key, desc, text=text),
+                         reverse=desc)
+        return indexes
+
+    def _reverse(self, indexes, order):
+        """Stably reverse the indexes of the opposite sort order.
+
+        Rows with equal values keep their relative order, as a sort would,
+        so only the runs of equal rows are put back in order.
+
+        Returns:
+            list: The indexes, or None if any value is None, as None values
+                sort last in both directions.
+        """
+        rows = self.rows
+        getters = [self._getter(key) for key, _ in order]
+        reverse = []
+        run = []
+        prev = None
+        for i in reversed(indexes):
+            values = [get(rows[i]) for get in getters]
+            if None in values:
+                return None
+            if run and values != prev:
+                reverse.extend(reversed(run))
+                run = []
+            run.append(i)
+            prev = values
+        reverse.extend(reversed(run))
+        return reverse
+
+    def order(self, order):
+        """Get the row indexes in a sort order, computing them once.
+
+        Args:
+            order (list): A list of (key, descending) 2-tuples.
+
+        Returns:
+            indexes (array): The row indexes, in order.
+        """
+        with self._lock:
+            return self._order(order)
+
+    def _order(self, order):
+        """Get the row indexes in a sort order, see `order`."""
+        order = tuple((key, bool(desc)) for key, desc in order)
+        if order in self._orders:
+            self._orders[order] = indexes = self._orders.pop(order)
+            return indexes
+        opposite = tuple((key, not desc) for key, desc in order)
+        indexes = None
+        if opposite in self._orders:
+            indexes = self._reverse(self._orders[opposite], order)
+        if indexes is None:
+            try:
+                indexes = self._sort(order)
+            except TypeError:
+                # Mixed types can not be compared (in python 3).
+                indexes = self._sort(order, text=True)
+        indexes = array('l', indexes)
+        self._orders[order] = indexes
+        while len(self._orders) > self.maxorders:
+            self._orders.popitem(last=False)
+        return indexes
+
+    def page(self, order, start, stop):
+        """Get a page of rows in a sort order.
+
+        Args:
+            order (list): A list of (key, descending) 2-tuples, or None for
+                the original order.
+            start (int): The index of the first row.
+            stop (int): The index after the last row.
+
+        Returns:
+            rows (list): The rows.
+        """
+        with self._lock:
+            if not order:
+                return self.rows[start:stop]
+            rows = self.rows
+            return [rows[i] for i in self._order(order)[start:stop]]
+
+    def snapshot(self, order):
+        """Get the rows and their indexes in a sort order, of one version.
+
+        Args:
+            order (list): A list of (key, descending) 2-tuples, or None for
+                the original order.
+
+        Returns:
+            tuple: The rows, and the row indexes in order.
+        """
+        with self._lock:
+            if not order:
+                return self.rows, range(len(self.rows))
+            return self.rows, self._order(order)
+
+
+class Record(Mapping):
+    """A row of a `RecordBatch`: a read only dict view of its columns."""
+
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch, index):
+        """Setup the view of a row.
+
+        Args:
+            batch (RecordBatch): The batch.
+            index (int): The row index.
+        """
+        self._batch = batch
+        self._index = index
+
+    def __getitem__(self, key):
+        """Get the value of a column in this row."""
+        batch = self._batch
+        return batch.columns[batch.positions[key]][self._index]
+
+    def __iter__(self):
+        """Iterate over the keys (the batch header)."""
+        return iter(self._batch.header)
+
+    def __len__(self):
+        """Return the number of keys."""
+        return len(self._batch.header)
+
+    def items(self):
+        """Return the (key, value) items, in header order."""
+        index = self._index
+        return [(key, column[index]) for key, column in
+                zip(self._batch.header, self._batch.columns)]
+
+    def __repr__(self):
+        """Represent the row as a dict."""
+        return 'Record({0!r})'.format(dict(self.items()))
+
+
+class RecordBatch(object):
+    """Rows stored by column: a header of keys and one sequence per key.
+
+    Columns can be any indexable sequences of the same length: lists,
+    `array.array`, NumPy arrays, or memoryviews of a mapped file (see
+    `from_file`). Iterating a batch yields a `Record` (a read only dict
+    view) per row, so it can be used anywhere a list of dicts is, e.g.
+    `objects2table` or `table_panels`, without a dict per row. The native
+    table renderers read the columns directly.
+
+    >>> batch = RecordBatch(('id', 'name'), [array('l', [1, 2]),
+                                             ['foo', 'bar']])
+    >>> batch[1]['name']
+    'bar'
+    """
+
+    def __init__(self, header, columns):
+        """Setup the batch.
+
+        Args:
+            header (tuple): The column keys.
+            columns (list): The columns, in header order.
+
+        Raises:
+            ValueError: If the header and columns, or the columns, differ
+                in length.
+        """
+        self.header = tuple(header)
+        self.columns = list(columns)
+        if len(self.header) != len(self.columns):
+            raise ValueError('Expected {0} columns, got {1}'.format(
+                len(self.header), len(self.columns)))
+        lengths = set(len(column) for column in self.columns)
+        if len(lengths) > 1:
+            raise ValueError('Columns differ in length: {0}'.format(
+                sorted(lengths)))
+        self.length = lengths.pop() if lengths else 0
+        self.positions = dict(
+            (key, pos) for pos, key in enumerate(self.header))
+        # The mapping and its views, of a batch from `from_file`.
+        self._mapped = None
+
+    @classmethod
+    def from_rows(cls, rows, header=None, typecodes=None):
+        """Build a batch from rows, in a single pass.
+
+        Args:
+            rows (iterable): The rows, as dicts or objects (e.g. a
+                SQLAlchemy query).
+            header (tuple, optional): The keys (or attributes) to keep.
+                Defaults to the keys of the first row, which must then be
+                a dict.
+            typecodes (dict, optional): An `array` typecode per key, for
+                compact numeric columns. Other columns are lists.
+
+        Returns:
+            RecordBatch: The batch.
+        """
+        rows = iter(rows)
+        first = None
+        if header is None:
+            first = next(rows, None)
+            header = tuple(first) if first is not None else ()
+            if first is not None:
+                rows = chain([first], rows)
+        typecodes = typecodes or {}
+        columns = [array(typecodes[key]) if key in typecodes else []
+                   for key in header]
+        appends = [column.append for column in columns]
+        for row in rows:
+            if isinstance(row, Mapping):
+                get = row.get
+            else:
+                get = partial(getattr, row)
+            for key, append in zip(header, appends):
+                append(get(key, None))
+        return cls(header, columns)
+
+    @classmethod
+    def from_file(cls, path, header, typecodes):
+        """Map a file of numeric columns, written by `to_file`.
+
+        The file is memory mapped (read only), and the columns are views of
+        it, so a large batch is paged in as it is read, and shared by all
+        processes mapping the same file. Close the batch (or use it as a
+        context manager) to unmap the file; batches sharing its columns
+        (e.g. from `select`) can not be used after.
+
+        >>> with RecordBatch.from_file(path, header, typecodes) as batch:
+        ...     render_objects2table(batch)
+
+        Args:
+            path (str): The file path.
+            header (tuple): The column keys.
+            typecodes (list): The `array` typecode of each column.
+
+        Returns:
+            RecordBatch: The batch.
+
+        Raises:
+            ValueError: If the file is not a whole number of rows.
+        """
+        sizes = [array(typecode).itemsize for typecode in typecodes]
+        with open(path, 'rb') as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if not size:
+                return cls(header, [array(typecode)
+                                    for typecode in typecodes])
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        length, extra = divmod(size, sum(sizes) or 1)
+        if extra:
+            mapped.close()
+            raise ValueError('{0} is not a whole number of rows'.format(path))
+        if not hasattr(memoryview, 'cast'):
+            # No memoryviews of a mapping, nor casts (python 2), so the
+            # columns are copied.
+            columns = []
+            offset = 0
+            for typecode, itemsize in zip(typecodes, sizes):
+                end = offset + length * itemsize
+                column = array(typecode)
+                column.fromstring(mapped[offset:end])
+                columns.append(column)
+                offset = end
+            mapped.close()
+            return cls(header, columns)
+        view = memoryview(mapped)
+        views = [view]
+        offset = 0
+        for typecode, itemsize in zip(typecodes, sizes):
+            end = offset + length * itemsize
+            views.append(view[offset:end])
+            views.append(views[-1].cast(typecode))
+            offset = end
+        batch = cls(header, views[2::2])
+        batch._mapped = (mapped, views)
+        return batch
+
+    def close(self):
+        """Unmap the file of a batch from `from_file`, if any."""
+        if self._mapped is None:
+            return
+        mapped, views = self._mapped
+        self._mapped = None
+        # The views hold the mapping open, so they are released first.
+        for view in reversed(views):
+            view.release()
+        mapped.close()
+
+    def __enter__(self):
+        """Use the batch as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the batch."""
+        self.close()
+
+    def to_file(self, path):
+        """Write the (numeric) columns to a file, for `from_file`.
+
+        Args:
+            path (str): The file path.
+
+        Raises:
+            TypeError: If a column is not an `array` or memoryview.
+        """
+        with open(path, 'wb') as handle:
+            for key, column in zip(self.header, self.columns):
+                if isinstance(column, array):
+                    column.tofile(handle)
+                elif isinstance(column, memoryview):
+                    handle.write(column.tobytes())
+                else:
+                    raise TypeError(
+                        'Column {0!r} is not an array'.format(key))
+
+    def column(self, key):
+        """Get a column by key."""
+        return self.columns[self.positions[key]]
+
+    def select(self, keys):
+        """Get a batch of some of the columns (sharing them), in order.
+
+        Args:
+            keys (iterable): The keys to keep; unknown keys are skipped.
+
+        Returns:
+            RecordBatch: The new batch.
+        """
+        keys = [key for key in keys if key in self.positions]
+        return RecordBatch(keys, [self.column(key) for key in keys])
+
+    def with_column(self, key, column):
+        """Get a batch with a column replaced (or added last).
+
+        Args:
+            key (mixed): The column key.
+            column (sequence): The new column.
+
+        Returns:
+            RecordBatch: The new batch.
+        """
+        columns = list(self.columns)
+        header = self.header
+        if key in self.positions:
+            columns[self.positions[key]] = column
+        else:
+            header += (key,)
+            columns.append(column)
+        return RecordBatch(header, columns)
+
+    def __len__(self):
+        """Return the number of rows."""
+        return self.length
+
+    def __getitem__(self, index):
+        """Get a row by index."""
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('RecordBatch index out of range')
+        return Record(self, index)
+
+    def __iter__(self):
+        """Iterate over the rows."""
+        for index in range(self.length):
+            yield Record(self, index)
@@ -0,0 +1,266 @@
+"""A template optimizer that folds calls to the pure bundled helpers.
+
+Jinja already constant folds filters (e.g. `'fooBar'|camel2hyphen`) with
+constant arguments, but never calls. With the `OptimizerExtension` enabled,
+calls with constant arguments to the native `apply_*` helpers and to the
+`utils.html` macros are evaluated once, at compile time:
+
+    {{ apply_classes(['table', 'table-striped']) }}
+    {{ titleize('foo_bar') }}
+
+The constant part of a class list concatenation is rendered ahead of time:
+
+    {{ apply_classes(classes + ['carousel', 'slide']) }}
+
+And the `apply_*` macros imported from `utils.html` are replaced with calls
+to their identical native versions, avoiding the macro call entirely.
+
+Folding assumes these names refer to the registered helpers, so calls are
+left alone if a name is assigned, imported or a parameter anywhere in the
+template, or if the registered global is not the bundled helper.
+"""
+
+from __future__ import absolute_import
+
+import warnings
+
+from jinja2 import Environment
+from jinja2 import nodes
+from jinja2.compiler import CodeGenerator
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from flask_extras.renderers import utils as render_utils
+from flask_extras.templating import _is_macro
+
+# The pure native helpers, by global name.
+HELPERS = {
+    'apply_classes': render_utils.apply_classes,
+    'apply_dattrs': render_utils.apply_dattrs,
+    'apply_prop': render_utils.apply_prop,
+}
+
+# Whether jinja supports custom code generators (jinja >= 2.11).
+SUPPORTED = hasattr(Environment, 'code_generator_class')
+
+# The macros template whose (pure) macros can be folded.
+UTILS_TEMPLATE = 'utils.html'
+
+try:
+    _TEXT_TYPES = (str, unicode)
+except NameError:
+    _TEXT_TYPES = (str,)
+
+
+def _const_args(node, eval_ctx):
+    """Get the constant arguments of a call.
+
+    Args:
+        node (Call): The call node.
+        eval_ctx (EvalContext): The evaluation context.
+
+    Returns:
+        args (tuple): The positional and keyword arguments, or None if any
+            are not constant.
+    """
+    if node.dyn_args is not None or node.dyn_kwargs is not None:
+        return None
+    try:
+        args = [arg.as_const(eval_ctx) for arg in node.args]
+        kwargs = dict((kwarg.key, kwarg.value.as_const(eval_ctx))
+                      for kwarg in node.kwargs)
+    except Exception:
+        return None
+    return args, kwargs
+
+
+def _shadowed_names(template):
+    """Get all names a template assigns, imports or takes as parameters.
+
+    Args:
+        template (Template): The template node.
+
+    Returns:
+        names (set): The names.
+    """
+    names = set()
+    for node in template.find_all((nodes.Name, nodes.Macro, nodes.Import)):
+        if isinstance(node, nodes.Name):
+            if node.ctx != 'load':
+                names.add(node.name)
+        elif isinstance(node, nodes.Macro):
+            names.add(node.name)
+        else:
+            names.add(node.target)
+    return names
+
+
+class OptimizingCodeGenerator(CodeGenerator):
+    """A code generator that folds calls to the pure bundled helpers."""
+
+    _helpers = {}
+    _utils_macros = {}
+
+    def visit_Template(self, node, frame=None):
+        """Find the helper and `utils.html` macro names before compiling."""
+        shadowed = _shadowed_names(node)
+        self._utils_macros = {}
+        imported = set()
+        for imp in node.find_all(nodes.FromImport):
+            for name in imp.names:
+                name, alias = name if isinstance(name, tuple) else (name, name)
+                if alias in imported:
+                    shadowed.add(alias)
+                imported.add(alias)
+                module = self._utils_module(imp.template)
+                if module is not None:
+                    self._utils_macros[alias] = (module, name)
+        self._helpers = dict(
+            (name, func) for name, func in HELPERS.items()
+            if name not in shadowed and name not in imported and
+            self.environment.globals.get(name) is func)
+        for alias in shadowed:
+            self._utils_macros.pop(alias, None)
+        return super(OptimizingCodeGenerator, self).visit_Template(
+            node, frame)
+
+    def _utils_module(self, template):
+        """Get the bundled `utils.html` template, if that is imported.
+
+        Args:
+            template (Node): The imported template name node.
+
+        Returns:
+            template (Template): The template, or None.
+        """
+        if not isinstance(template, nodes.Const):
+            return None
+        name = template.value
+        if not isinstance(name, _TEXT_TYPES):
+            return None
+        if name.split('/')[-1] != UTILS_TEMPLATE:
+            return None
+        try:
+            tmpl = self.environment.get_template(name)
+        except Exception:
+            return None
+        if not _is_macro(tmpl.filename):
+            return None
+        return tmpl
+
+    def _write_const(self, value):
+        """Write a folded value, if it can be represented in code.
+
+        Args:
+            value (mixed): The value.
+
+        Returns:
+            bool: Whether or not the value was written.
+        """
+        if type(value) is not Markup and type(value) not in _TEXT_TYPES:
+            return False
+        self.write(repr(value))
+        return True
+
+    def _fold_helper(self, node, frame, name):
+        """Fold a call to a native helper global, if possible."""
+        args = _const_args(node, frame.eval_ctx)
+        if args is not None:
+            try:
+                value = self._helpers[name](*args[0], **args[1])
+            except Exception:
+                return False
+            return self._write_const(value)
+        if name != 'apply_classes' or len(node.args) != 1 or node.kwargs:
+            return False
+        arg = node.args[0]
+        if not isinstance(arg, nodes.Add):
+            return False
+        try:
+            extra = render_utils.classes_str(
+                arg.right.as_const(frame.eval_ctx))
+        except Exception:
+            return False
+        # apply_classes(a + b) == apply_classes(a) + classes_str(b)
+        self.write('(')
+        self.visit_Call(nodes.Call(node.node, [arg.left], [], None, None,
+                                   lineno=node.lineno), frame)
+        self.write(' + ')
+        self.write(repr(Markup(extra)))
+        self.write(')')
+        return True
+
+    def _fold_macro(self, node, frame, name):
+        """Fold a call to a `utils.html` macro, if possible."""
+        template, macro_name = self._utils_macros[name]
+        if macro_name in HELPERS and \
+                self.environment.globals.get(macro_name) is \
+                HELPERS[macro_name]:
+            # Call the identical native helper instead.
+            self.write('context.call(environment.globals[{0!r}]'.format(
+                macro_name))
+            self.signature(node, frame)
+            self.write(')')
+            return True
+        args = _const_args(node, frame.eval_ctx)
+        if args is None:
+            return False
+        try:
+            macro = getattr(template.module, macro_name)
+            if macro.caller:
+                return False
+            value = macro(*args[0], **args[1])
+        except Exception:
+            return False
+        return self._write_const(value)
+
+    def visit_Call(self, node, frame, forward_caller=False):
+        """Fold calls to the pure helpers, or compile them as usual."""
+        if not forward_caller and not self.environment.is_async and \
+                not self.environment.sandboxed and \
+                isinstance(node.node, nodes.Name):
+            name = node.node.name
+            if name in self._helpers and \
+                    self._fold_helper(node, frame, name):
+                return
+            if name in self._utils_macros and \
+                    self._fold_macro(node, frame, name):
+                return
+        super(OptimizingCodeGenerator, self).visit_Call(
+            node, frame, forward_caller=forward_caller)
+
+
+def config_template_optimizer(app):
+    """Enable the template optimizer, if configured.
+
+    Enable with `app.config['FLASK_EXTRAS_OPTIMIZE_TEMPLATES'] = True`.
+    Requires jinja 2.11 or later; with older versions, templates are
+    compiled as usual, with a warning.
+
+    Args:
+        app (object): The Flask application instance.
+
+    Returns:
+        app (object): The modified Flask application instance.
+    """
+    if not app.config.get('FLASK_EXTRAS_OPTIMIZE_TEMPLATES'):
+        return app
+    if not SUPPORTED:
+        warnings.warn('The template optimizer requires jinja 2.11 or later, '
+                      'templates are not optimized.')
+        return app
+    app.jinja_env.add_extension(OptimizerExtension)
+    return app
+
+
+class OptimizerExtension(Extension):
+    """Compile templates with the `OptimizingCodeGenerator`.
+
+    Usage:
+    app.jinja_env.add_extension(OptimizerExtension)
+    """
+
+    def __init__(self, environment):
+        """Setup the environment to use the optimizing code generator."""
+        super(OptimizerExtension, self).__init__(environment)
+        environment.code_generator_class = OptimizingCodeGenerator
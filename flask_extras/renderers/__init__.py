@@ -0,0 +1 @@
+"""Native python renderers for some of the bundled macros."""
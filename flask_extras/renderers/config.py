@@ -0,0 +1,33 @@
+"""Provides configuration utilities for using the native renderers."""
+
+from __future__ import absolute_import
+
+from flask_extras.filters import config as filter_conf
+
+from . import forms
+from . import tables
+
+RENDERERS = {
+    'render_objects2table': tables.render_objects2table,
+    'stream_objects2table': tables.stream_objects2table,
+    'render_wtform_form': forms.render_wtform_form,
+}
+
+
+def config_flask_renderers(app, names=None):
+    """Register a Flask app with the native renderers as globals.
+
+    Args:
+        app (object): The Flask application instance.
+        names (list, optional): The names of globals to register. These can
+            be any renderer or filter name. Defaults to all renderers.
+
+    Returns:
+        app (object): The modified Flask application instance.
+    """
+    if names is None:
+        return filter_conf._inject_template_globals(app, RENDERERS)
+    funcs = {name: RENDERERS[name] for name in names if name in RENDERERS}
+    funcs.update(filter_conf.get_filters(
+        names=[name for name in names if name not in RENDERERS]))
+    return filter_conf._inject_template_globals(app, funcs)
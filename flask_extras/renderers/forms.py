@@ -0,0 +1,493 @@
+"""Cached render plans and a native renderer for the `wtform_form` macro.
+
+The layout of a form (field grouping, fieldset legends, input classes,
+label suffixes and which fields are hidden or use a field macro) only
+depends on its fields and the macro options, never on submitted values. So
+it is computed once per form class, fields and options, and cached; each
+render then only binds the (per request) field objects to the plan.
+
+`render_wtform_form` renders the same markup as the macro from the same
+plan, without a macro call per field. Only the whitespace differs: a single
+newline wherever the macro has a run of whitespace (browsers collapse both
+to a space), and none around attribute values.
+"""
+
+from __future__ import absolute_import
+
+from collections import namedtuple
+
+from markupsafe import Markup, escape
+
+from flask_extras.filters.filters import css_selector
+from flask_extras.filters.memoize import LRUCache
+from flask_extras.filters.munging import group_by
+
+from .utils import classes_str
+from .utils import dattrs_str
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+# The number of form plans to keep.
+PLANS_SIZE = 256
+
+# Field types rendered as-is, without labels or wrappers.
+HIDDEN_TYPES = ('CSRFTokenField', 'HiddenField')
+
+PLANS = LRUCache(maxsize=PLANS_SIZE)
+
+# The static layout of a field. `index` is the position of the field in the
+# form, and `subindex` its position in a flattened `FormField`, if any.
+FieldPlan = namedtuple('FieldPlan', [
+    'index', 'subindex', 'hidden', 'last', 'label', 'qmark', 'classes',
+    'macro'])
+
+# The static layout of a fieldset group. `opens` and `closes` are whether a
+# fieldset is opened and closed around its fields.
+GroupPlan = namedtuple('GroupPlan', [
+    'legend', 'legend_desc', 'selector', 'opens', 'closes', 'fields'])
+
+# The options of `render_wtform_form` used to render each field.
+FieldOptions = namedtuple('FieldOptions', [
+    'colsizes', 'horizontal', 'hrule', 'align', 'linebreaks', 'wrap_inputs',
+    'field_macros'])
+
+
+def _freeze(value):
+    """Convert (nested) option lists and dicts into hashable values.
+
+    Args:
+        value (mixed): The option value.
+
+    Returns:
+        value (mixed): The hashable value.
+    """
+    if isinstance(value, Mapping):
+        return frozenset((key, _freeze(val)) for key, val in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(val) for val in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+def _flatten(field, preserve_formfield):
+    """Check if a field is a `FormField` rendered as its subfields."""
+    return not preserve_formfield and field.type == 'FormField'
+
+
+def _field_plan(field, index, subindex, last, options):
+    """Compute the static layout of a single field.
+
+    Args:
+        field (Field): The field.
+        index (int): The position of the field in the form.
+        subindex (int): The position of the field in its `FormField`.
+        last (bool): Whether or not this is the last field of its group.
+        options (dict): The `wtform_form` options.
+
+    Returns:
+        plan (FieldPlan): The field layout.
+    """
+    macro = field.name in options['field_macros']
+    classes = options['input_classes']
+    if options['field_classes'].get(field.name):
+        classes = classes + list(options['field_classes'][field.name])
+    qmark = '?' if field.type == 'BooleanField' and \
+        options['questionize'] else ''
+    return FieldPlan(
+        index=index,
+        subindex=subindex,
+        hidden=field.type in HIDDEN_TYPES,
+        last=last,
+        label=not macro and field.type != 'SubmitField',
+        qmark=qmark,
+        classes=' '.join(['%s' % css for css in classes]),
+        macro=macro,
+    )
+
+
+def _group_plan(label, fields, positions, options):
+    """Compute the static layout of a fieldset group.
+
+    Args:
+        label (mixed): The group label, or a 2-tuple of label and
+            description.
+        fields (list): The fields of the group.
+        positions (dict): The position of every field in the form, by id.
+        options (dict): The `wtform_form` options.
+
+    Returns:
+        plan (GroupPlan): The group layout.
+    """
+    if label is None:
+        legend, legend_desc = None, ''
+    elif len(label) == 2:
+        legend, legend_desc = label[0], label[1]
+    else:
+        legend, legend_desc = label, ''
+    opens = label is not None and label != '__unlabeled' and bool(fields)
+    closes = label is not None and legend != '__unlabeled' and bool(fields)
+    plans = []
+    for i, field in enumerate(fields):
+        index = positions[id(field)]
+        last = i == len(fields) - 1
+        if not _flatten(field, options['preserve_formfield']):
+            plans.append(_field_plan(field, index, None, last, options))
+            continue
+        subfields = list(field)
+        for subindex, subfield in enumerate(subfields):
+            plans.append(_field_plan(
+                subfield, index, subindex, subindex == len(subfields) - 1,
+                options))
+    return GroupPlan(
+        legend=legend,
+        legend_desc=legend_desc,
+        selector=css_selector(legend) if opens else None,
+        opens=opens,
+        closes=closes,
+        fields=tuple(plans),
+    )
+
+
+def build_plan(fields, options):
+    """Compute the static layout of a form.
+
+    Args:
+        fields (list): The form fields.
+        options (dict): The `wtform_form` options.
+
+    Returns:
+        plan (tuple): The `GroupPlan` of every fieldset group.
+    """
+    positions = dict((id(field), i) for i, field in enumerate(fields))
+    if not options['fieldset_groups']:
+        return (_group_plan(None, fields, positions, options),)
+    groups = group_by(fields, options['fieldset_groups'], 'name',
+                      fallback=options['fieldset_fallback'])
+    return tuple(_group_plan(label, group, positions, options)
+                 for label, group in groups.items())
+
+
+def _bind(plan, fields):
+    """Bind the fields of a form render to a plan.
+
+    Args:
+        plan (tuple): The form plan.
+        fields (list): The form fields.
+
+    Returns:
+        groups (list): A list of (GroupPlan, [(field, FieldPlan), ...]).
+    """
+    subfields = {}
+    bound = []
+    for group in plan:
+        group_fields = []
+        for item in group.fields:
+            field = fields[item.index]
+            if item.subindex is not None:
+                if item.index not in subfields:
+                    subfields[item.index] = list(field)
+                field = subfields[item.index][item.subindex]
+            group_fields.append((field, item))
+        bound.append((group, group_fields))
+    return bound
+
+
+def wtform_plan(formobj, fieldset_groups=(), fieldset_fallback='__unlabeled',
+                preserve_formfield=True, input_classes=(), field_classes={},
+                field_macros={}, questionize=True):
+    """Get the (cached) layout of a form, bound to its fields.
+
+    The plan is cached by form class, field names and types, and options.
+
+    Usage:
+    {% for group, fields in wtform_plan(form) %}
+        {% for field, item in fields %}...{% endfor %}
+    {% endfor %}
+
+    Args:
+        formobj (object): The form, or any iterable of fields.
+        fieldset_groups (list, optional): See `wtform_form`.
+        fieldset_fallback (str, optional): See `wtform_form`.
+        preserve_formfield (bool, optional): See `wtform_form`.
+        input_classes (list, optional): See `wtform_form`.
+        field_classes (dict, optional): See `wtform_form`.
+        field_macros (dict, optional): See `wtform_form`, only the field
+            names are used.
+        questionize (bool, optional): See `wtform_form`.
+
+    Returns:
+        groups (list): A list of (GroupPlan, [(field, FieldPlan), ...]).
+    """
+    fields = list(formobj)
+    preserve_formfield = bool(preserve_formfield)
+    signature = tuple(
+        (field.name, field.type,
+         tuple((sub.name, sub.type) for sub in field)
+         if _flatten(field, preserve_formfield) else None)
+        for field in fields)
+    options = dict(
+        fieldset_groups=fieldset_groups,
+        fieldset_fallback=fieldset_fallback,
+        preserve_formfield=preserve_formfield,
+        input_classes=list(input_classes),
+        field_classes=field_classes,
+        field_macros=frozenset(field_macros),
+        questionize=bool(questionize),
+    )
+    try:
+        key = (type(formobj), signature, _freeze(sorted(options.items())))
+        hash(key)
+    except TypeError:
+        return _bind(build_plan(fields, options), fields)
+    plan = PLANS.get(key)
+    if plan is None:
+        plan = build_plan(fields, options)
+        PLANS.set(key, plan)
+    return _bind(plan, fields)
+
+
+def _render_errors(label, errors):
+    """Render the errors of a field, as `wtform_errors_field` with `bg=False`.
+
+    Args:
+        label (Label): The field label.
+        errors (list): The field errors.
+
+    Returns:
+        html (str): The rendered errors.
+    """
+    return u'\n'.join(
+        [u'<p class="text-danger"><strong>Error(s) for \'%s\': </strong>'
+         u'</p>' % escape(label), u'<ul class="text-danger">'] +
+        [u'<li>%s</li>' % escape(error) for error in errors] +
+        [u'</ul>'])
+
+
+def _wrapper(field):
+    """Get the opening tag of the input wrapper of a field."""
+    return u'<span class="input-wrapper-%s">' % escape(field.name)
+
+
+def _open_field(out, field, opts):
+    """Open the row, label column and input wrapper of a field."""
+    if not opts.horizontal:
+        if opts.wrap_inputs:
+            out.append(_wrapper(field))
+        return
+    out.append('<div class="row">')
+    out.append(
+        u'<div class="col-lg-%s col-md-%s col-sm-12 col-xs-12 %s">' % (
+            escape(opts.colsizes[0]), escape(opts.colsizes[1]),
+            escape(u'text-' + opts.align)))
+    if opts.wrap_inputs:
+        out.append(_wrapper(field))
+
+
+def _render_label(out, field, layout, opts):
+    """Render the label, required marker and description of a field."""
+    breaks = opts.horizontal and opts.linebreaks
+    if layout.label:
+        out.append(field.label(text=field.label.text + layout.qmark))
+        if field.flags.required:
+            if breaks:
+                out.append('<br>')
+            out.append(
+                '<small class="text-danger required-label">* Required</small>')
+            if opts.linebreaks:
+                out.append('<br>')
+    if field.description and not layout.macro:
+        if breaks:
+            out.append('<br>')
+        out.append(u'<small class="field-description">%s</small>' % (
+            field.description,))
+
+
+def _open_input_column(out, field, opts):
+    """Close the label column of a horizontal field, opening its input."""
+    out.append('</div><!--end horizontal-col-->')
+    if opts.wrap_inputs:
+        out.append('</span>')
+    size = escape(opts.colsizes[1])
+    out.append(u'<div class="col-lg-%s col-md-%s col-sm-12 col-xs-12">' % (
+        size, size))
+    if opts.wrap_inputs:
+        out.append(_wrapper(field))
+    out.append(u'<div class="%s text-left">' % (
+        u'has-error' if field.errors else u''))
+
+
+def _render_input(out, field, layout, opts):
+    """Render the input (or field macro) and errors of a field."""
+    if layout.macro:
+        out.append(escape(opts.field_macros[field.name](field)))
+        return
+    if field.errors:
+        out.append('<div class="has-error">')
+    out.append(field(class_=layout.classes))
+    if field.errors:
+        out.append('</div>')
+    if opts.linebreaks:
+        out.append('<br>')
+    if field.errors:
+        out.append(_render_errors(field.label, field.errors))
+
+
+def _close_field(out, layout, opts):
+    """Close the columns, row and input wrapper of a field."""
+    if opts.horizontal:
+        out.append('</div>')
+    if opts.linebreaks and not layout.macro:
+        out.append('<br>')
+    if not opts.horizontal:
+        if opts.wrap_inputs:
+            out.append('</span>')
+        return
+    out.append('</div>')
+    if opts.wrap_inputs:
+        out.append('</span>')
+    out.append('</div>')
+    if not layout.last and opts.hrule:
+        out.append('<hr>')
+
+
+def _render_field(out, field, layout, opts):
+    """Render a single field, as the `_wtform_field` macro.
+
+    Args:
+        out (list): The list to append the rendered markup to.
+        field (Field): The field.
+        layout (FieldPlan): The static layout of the field.
+        opts (FieldOptions): The render options.
+    """
+    _open_field(out, field, opts)
+    _render_label(out, field, layout, opts)
+    if opts.horizontal:
+        _open_input_column(out, field, opts)
+    _render_input(out, field, layout, opts)
+    _close_field(out, layout, opts)
+
+
+def _render_group(out, group, fields, opts):
+    """Render a fieldset group and its fields.
+
+    Args:
+        out (list): The list to append the rendered markup to.
+        group (GroupPlan): The static layout of the group.
+        fields (list): The bound (field, FieldPlan) of the group.
+        opts (FieldOptions): The render options.
+    """
+    if group.opens:
+        out.append(u'<fieldset class="fieldset-group-%s">' % escape(
+            group.selector))
+        out.append('<legend>')
+        out.append(escape(group.legend))
+        if group.legend_desc:
+            out.append(u'<span class="fieldset-legend-description">'
+                       u'%s</span>' % escape(group.legend_desc))
+        out.append('</legend>')
+    for field, layout in fields:
+        if layout.hidden:
+            out.append(escape(field))
+        else:
+            _render_field(out, field, layout, opts)
+    if group.closes:
+        out.append('</fieldset>')
+
+
+def _open_form(action, method, classes, enctype, data_attrs, formid):
+    """Render the opening tag of a form."""
+    attrs = [u'<form action="%s" method="%s" class="%s"' % (
+        escape(action), escape(method), classes_str(classes))]
+    if enctype:
+        attrs.append(u'enctype="%s"' % escape(enctype))
+    attrs.append(u'%srole="form"' % dattrs_str(data_attrs))
+    if formid:
+        attrs.append(u'id="%s"' % escape(formid))
+    return u' '.join(attrs) + u'>'
+
+
+def _render_buttons(out, btn_classes, btn_text, button_wrapper, reset_btn,
+                    reset_btn_classes):
+    """Render the submit and reset buttons of a form."""
+    if button_wrapper:
+        out.append('<div class="wtform-form button-wrapper">')
+    out.append(u'<button type="submit" class="%s">%s</button>' % (
+        classes_str(btn_classes), escape(btn_text)))
+    if reset_btn:
+        out.append(u'<button type="reset" class="%s">Reset</button>' % (
+            classes_str(reset_btn_classes)))
+    if button_wrapper:
+        out.append('</div>')
+
+
+def render_wtform_form(formobj,
+                       action='.',
+                       align='left',
+                       btn_classes=[],
+                       btn_text='Submit',
+                       button_wrapper=True,
+                       colsizes=[4, 8],
+                       classes=[],
+                       data_attrs=[],
+                       enctype=None,
+                       field_classes={},
+                       field_macros={},
+                       fieldset_groups=[],
+                       fieldset_fallback='__unlabeled',
+                       formid=None,
+                       horizontal=False,
+                       hrule=True,
+                       input_classes=[],
+                       legend=None,
+                       linebreaks=False,
+                       method='GET',
+                       questionize=True,
+                       preserve_formfield=True,
+                       reset_btn=True,
+                       reset_btn_classes=[],
+                       submit=True,
+                       uploads=True,
+                       use_fieldset=True,
+                       wrap_inputs=False):
+    """Render a wtform object, as the `wtform_form` macro.
+
+    Accepts all the options of the macro, see its documentation.
+
+    Usage:
+    {{ render_wtform_form(form, horizontal=True, classes=['form']) }}
+
+    Returns:
+        markup (Markup): The rendered form.
+    """
+    groups = wtform_plan(
+        formobj,
+        fieldset_groups=fieldset_groups,
+        fieldset_fallback=fieldset_fallback,
+        preserve_formfield=preserve_formfield,
+        input_classes=input_classes,
+        field_classes=field_classes,
+        field_macros=field_macros,
+        questionize=questionize)
+    opts = FieldOptions(colsizes, horizontal, hrule, align, linebreaks,
+                        wrap_inputs, field_macros)
+    out = [_open_form(action, method, classes, enctype, data_attrs, formid)]
+    fieldset = use_fieldset and not fieldset_groups
+    if fieldset:
+        out.append(u'<fieldset class="text-%s">' % escape(align))
+    if legend and not fieldset_groups:
+        out.append(u'<legend>%s</legend>' % escape(legend))
+    for group, fields in groups:
+        _render_group(out, group, fields, opts)
+    if fieldset:
+        out.append('</fieldset>')
+    if submit:
+        _render_buttons(out, btn_classes, btn_text, button_wrapper,
+                        reset_btn, reset_btn_classes)
+    out.append('</form>')
+    # Separate tags by whitespace where the macro does, as it can render as
+    # a space (e.g. between a label and its input).
+    return Markup(u'\n'.join(out))
@@ -0,0 +1,381 @@
+"""Native python renderer for the `objects2table` macro.
+
+The macro version walks the whole list of objects to build the header, and
+re-sorts and re-filters every row. Here the column plan is compiled once
+per call (per distinct row shape), and rows are emitted through a single join.
+
+A `RecordBatch` (rows stored by column) is rendered from its columns
+directly, without a dict per row.
+"""
+
+from __future__ import absolute_import
+
+from array import array
+from itertools import chain
+from itertools import islice
+
+from markupsafe import Markup, escape
+
+from flask_extras.filters.filters import is_url
+from flask_extras.filters.munging import RecordBatch
+from flask_extras.filters.munging import compile_filter
+
+from .utils import classes_str
+from .utils import dattrs_str
+
+# The `array` and `struct` typecodes of numbers (and bools), whose values
+# never need escaping.
+NUMERIC_TYPECODES = frozenset('bBhHiIlLqQnNefd?')
+
+try:
+    from itertools import izip as _zip
+except ImportError:
+    _zip = zip
+
+try:
+    _TEXT_TYPE = unicode
+except NameError:
+    _TEXT_TYPE = str
+
+
+def _row_keys(obj, order):
+    """Get the ordered keys of a single row.
+
+    Matches `sort_dict_keys_from_reflist` when an order is given: only keys
+    in the reference list are kept, in reference list order.
+
+    Args:
+        obj (dict): The row.
+        order (list): The optional reference list of keys.
+
+    Returns:
+        keys (tuple): The keys to render, in order.
+    """
+    if not order:
+        return tuple(obj.keys())
+    seen = set()
+    keys = []
+    for key in order:
+        if key in obj and key not in seen:
+            seen.add(key)
+            keys.append(key)
+    return tuple(keys)
+
+
+def _cell_renderer(key, pk_link, handle_links, field_macros):
+    """Compile the function used to render every cell of a column.
+
+    Args:
+        key (str): The column key.
+        pk_link (str): The optional primary key link prefix.
+        handle_links (bool): Whether or not to render urls as links.
+        field_macros (dict): The optional per column macros.
+
+    Returns:
+        func (function): A function that renders a cell value as a string.
+    """
+    if pk_link and key == 'id':
+        prefix = escape(pk_link)
+
+        def _pk(val):
+            val = escape(val)
+            return u'<a href="%s/%s">%s</a>' % (prefix, val, val)
+        return _pk
+    macro = field_macros.get(key)
+
+    def _cell(val):
+        if handle_links and is_url(val):
+            val = escape(val)
+            return u'<a href="%s" target="_blank">%s</a>' % (val, val)
+        if macro is not None:
+            return escape(macro(val))
+        return escape(val)
+    return _cell
+
+
+def _compile_plan(keys, filterkeys, filtervals, pk_link, handle_links,
+                  field_macros):
+    """Compile the column plan for a given row shape.
+
+    Args:
+        keys (tuple): The ordered row keys.
+        filterkeys (FilterSpec): The keys to exclude.
+        filtervals (FilterSpec): The values to render as empty cells.
+        pk_link (str): The optional primary key link prefix.
+        handle_links (bool): Whether or not to render urls as links.
+        field_macros (dict): The optional per column macros.
+
+    Returns:
+        plan (list): A list of (key, renderer) 2-tuples.
+    """
+    plan = []
+    for key in keys:
+        if key in filterkeys:
+            continue
+        render = _cell_renderer(key, pk_link, handle_links, field_macros)
+        if filtervals:
+            render = _filtered(render, filtervals)
+        plan.append((key, render))
+    return plan
+
+
+def _filtered(render, filtervals):
+    """Wrap a cell renderer so filtered values render as empty cells."""
+    def _cell(val):
+        if val in filtervals:
+            return u''
+        return render(val)
+    return _cell
+
+
+def _iter_rows(objs, order=None, filterkeys=[], filtervals=[],
+               pk_link=None, handle_links=True, field_macros={}):
+    """Yield the rendered `<tr>` markup for each object.
+
+    Args:
+        objs (iterable): The objects (dictionaries) to render.
+        See `render_objects2table` for all other arguments.
+
+    Yields:
+        row (str): The rendered row.
+    """
+    # Plans are keyed by the (unordered) row shape, so the ordering and
+    # filtering of keys only happens once per distinct shape.
+    plans = {}
+    for obj in objs:
+        shape = tuple(obj)
+        plan = plans.get(shape)
+        if plan is None:
+            plan = _compile_plan(
+                _row_keys(obj, order), filterkeys, filtervals,
+                pk_link, handle_links, field_macros)
+            plans[shape] = plan
+        if not plan:
+            yield u'<tr></tr>'
+            continue
+        yield u'<tr><td>%s</td></tr>' % u'</td><td>'.join(
+            [render(obj[key]) for key, render in plan])
+
+
+def _is_numeric(column):
+    """Check if a column only holds numbers (an array, or NumPy array).
+
+    Arrays and memoryviews of characters (e.g. `array('u')`) are not.
+    """
+    if isinstance(column, array):
+        return column.typecode in NUMERIC_TYPECODES
+    if isinstance(column, memoryview):
+        return column.format.lstrip('@=<>!') in NUMERIC_TYPECODES
+    dtype = getattr(column, 'dtype', None)
+    return getattr(dtype, 'kind', None) in ('b', 'i', 'u', 'f')
+
+
+def _iter_batch_rows(batch, order=None, filterkeys=[], filtervals=[],
+                     pk_link=None, handle_links=True, field_macros={}):
+    """Yield the rendered `<tr>` markup for each row of a `RecordBatch`.
+
+    All rows share the header, so the plan is compiled once, and values are
+    read from the columns directly.
+
+    Args:
+        batch (RecordBatch): The rows.
+        See `render_objects2table` for all other arguments.
+
+    Yields:
+        row (str): The rendered row.
+    """
+    if not len(batch):
+        return
+    plan = _compile_plan(
+        _row_keys(batch[0], order), filterkeys, filtervals,
+        pk_link, handle_links, field_macros)
+    if not plan:
+        for _ in range(len(batch)):
+            yield u'<tr></tr>'
+        return
+    columns = [batch.column(key) for key, _ in plan]
+    renders = []
+    for (key, render), column in zip(plan, columns):
+        if _is_numeric(column) and not filtervals and key not in \
+                field_macros and not (pk_link and key == 'id'):
+            # Numbers never need escaping, nor are links.
+            render = _TEXT_TYPE
+        renders.append(render)
+    for values in _zip(*columns):
+        yield u'<tr><td>%s</td></tr>' % u'</td><td>'.join(
+            [render(val) for render, val in _zip(renders, values)])
+
+
+def _render_header(obj, order=None, filterkeys=[], filter_headings=[],
+                   header_macros={}):
+    """Render the `<th>` cells for the first object."""
+    if obj is None:
+        return u''
+    cells = []
+    for heading in _row_keys(obj, order):
+        if heading in filterkeys:
+            continue
+        if heading in filter_headings:
+            continue
+        macro = header_macros.get(heading)
+        if macro is not None:
+            heading = macro(heading)
+        cells.append(u'<th>%s</th>' % escape(heading))
+    return u''.join(cells)
+
+
+def _format_date_fields(objs, date_fields, chunksize=500):
+    """Yield objects with their date fields formatted a column at a time.
+
+    Args:
+        objs (iterable): The objects (dictionaries) to render.
+        date_fields (dict): A dictionary of keys and strftime formats.
+        chunksize (int, optional): The number of rows to format per batch.
+
+    Yields:
+        obj (dict): A copy of each object, with formatted date fields.
+    """
+    # Imported here so dateutil/numpy are only loaded when needed.
+    from flask_extras.filters.datetimes import strftime_column
+    objs = iter(objs)
+    while True:
+        chunk = [obj.copy() for obj in islice(objs, chunksize)]
+        if not chunk:
+            return
+        for key, fmt in date_fields.items():
+            rows = [obj for obj in chunk if key in obj]
+            column = strftime_column([obj[key] for obj in rows], fmt=fmt)
+            for obj, val in zip(rows, column):
+                obj[key] = val
+        for obj in chunk:
+            yield obj
+
+
+def _format_date_columns(batch, date_fields):
+    """Format the date columns of a `RecordBatch`, a column at a time.
+
+    Args:
+        batch (RecordBatch): The rows.
+        date_fields (dict): A dictionary of keys and strftime formats.
+
+    Returns:
+        batch (RecordBatch): A batch with the formatted columns.
+    """
+    from flask_extras.filters.datetimes import strftime_column
+    for key, fmt in date_fields.items():
+        if key in batch.positions:
+            batch = batch.with_column(
+                key, strftime_column(list(batch.column(key)), fmt=fmt))
+    return batch
+
+
+def _iter_table(objs, classes=[], data_attrs=[], filterkeys=[],
+                filtervals=[], filter_headings=[], pk_link=None,
+                handle_links=True, id=None, field_macros={},
+                header_macros={}, asdict=False, order=None,
+                date_fields={}, date_chunksize=500):
+    """Yield the table markup as fragments; the opening tag, rows, closing.
+
+    See `render_objects2table` for all arguments.
+    """
+    filterkeys = compile_filter(filterkeys)
+    filtervals = compile_filter(filtervals)
+    filter_headings = compile_filter(filter_headings)
+    field_macros = field_macros or {}
+    header_macros = header_macros or {}
+    if isinstance(objs, RecordBatch):
+        if date_fields:
+            objs = _format_date_columns(objs, date_fields)
+        first = objs[0] if len(objs) else None
+        rows = _iter_batch_rows(
+            objs, order=order, filterkeys=filterkeys, filtervals=filtervals,
+            pk_link=pk_link, handle_links=handle_links,
+            field_macros=field_macros)
+    else:
+        objs = iter(objs if objs is not None else [])
+        if asdict:
+            objs = (obj._asdict() for obj in objs)
+        if date_fields:
+            objs = _format_date_fields(objs, date_fields, date_chunksize)
+        first = next(objs, None)
+        if first is not None:
+            objs = chain([first], objs)
+        rows = _iter_rows(
+            objs, order=order, filterkeys=filterkeys, filtervals=filtervals,
+            pk_link=pk_link, handle_links=handle_links,
+            field_macros=field_macros)
+    yield u'<table %sclass="%s" %s><thead>%s</thead><tbody>' % (
+        u'id="%s" ' % escape(id) if id else u'',
+        classes_str(classes),
+        dattrs_str(data_attrs),
+        _render_header(
+            first, order=order, filterkeys=filterkeys,
+            filter_headings=filter_headings, header_macros=header_macros),
+    )
+    for row in rows:
+        yield row
+    yield u'</tbody></table>'
+
+
+def render_objects2table(objs, **kwargs):
+    """Render a table from a list of objects, like the `objects2table` macro.
+
+    Supports the same options as the macro: `classes`, `data_attrs`,
+    `filterkeys`, `filtervals`, `filter_headings`, `pk_link`,
+    `handle_links`, `id`, `field_macros`, `header_macros`, `asdict`
+    and `order`.
+
+    Date columns can be formatted in batches (see `strftime_column`) by
+    passing `date_fields`, a dictionary of keys and strftime formats, e.g.
+    `date_fields={'created': '%Y-%m-%d'}`; `date_chunksize` sets the batch
+    size. Values are formatted before `filtervals` are checked.
+
+    Usage:
+    {{ render_objects2table(data, order=['id', 'name'], pk_link='/users') }}
+
+    Args:
+        objs (iterable): A list of objects (dictionaries) to render, or
+            a `RecordBatch`.
+
+    Returns:
+        html (Markup): The rendered table.
+    """
+    return Markup(u''.join(_iter_table(objs, **kwargs)))
+
+
+def stream_objects2table(objs, chunksize=500, **kwargs):
+    """Render a table from objects lazily, in chunks of `chunksize` rows.
+
+    The opening tag and header are yielded first, then every `chunksize`
+    rows are joined and yielded, so memory use and time to first byte
+    do not depend on the number of rows. Accepts any iterable, e.g.
+    a SQLAlchemy `yield_per` query fed through `sql2dict(query, lazy=True)`.
+
+    Accepts the same options as `render_objects2table`.
+
+    Usage (in a view):
+    rows = sql2dict(User.query.yield_per(1000), lazy=True)
+    return Response(stream_with_context(stream_objects2table(rows)))
+
+    Or inside a template rendered with `stream_template`:
+    {% for chunk in stream_objects2table(rows) %}{{ chunk }}{% endfor %}
+
+    Args:
+        objs (iterable): An iterable of objects (dictionaries) to render,
+            or a `RecordBatch`.
+        chunksize (int, optional): The number of rows per chunk.
+
+    Yields:
+        html (Markup): The rendered table, chunk by chunk.
+    """
+    chunksize = max(int(chunksize), 1)
+    fragments = _iter_table(objs, **kwargs)
+    yield Markup(next(fragments))
+    chunk = []
+    for fragment in fragments:
+        chunk.append(fragment)
+        if len(chunk) >= chunksize:
+            yield Markup(u''.join(chunk))
+            chunk = []
+    if chunk:
+        yield Markup(u''.join(chunk))
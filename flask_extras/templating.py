@@ -0,0 +1,362 @@
+"""Template loading and compilation utilities for the bundled macros."""
+
+from __future__ import absolute_import
+
+import io
+import os
+import re
+import sys
+
+from jinja2 import BaseLoader
+from jinja2 import ChoiceLoader
+from jinja2 import FileSystemLoader
+from jinja2 import ModuleLoader
+from jinja2 import TemplateNotFound
+from jinja2.bccache import Bucket
+from jinja2.bccache import FileSystemBytecodeCache
+from jinja2.ext import Extension
+from jinja2.lexer import Token
+
+from flask_extras import macros
+
+MACROS_DIR = os.path.dirname(os.path.abspath(macros.__file__))
+
+# The default prefix the macros are available under, e.g. 'extras/utils.html'
+MACROS_PREFIX = 'extras'
+
+# Macro template sources, read once per process (see `_read_macros`).
+_MACROS = {}
+
+# Elements whose whitespace is significant, and is never trimmed.
+_PRESERVE_RE = re.compile(r'(<(/?)(?:pre|textarea)\b)', re.IGNORECASE)
+
+# A run of whitespace spanning lines.
+_NEWLINES_RE = re.compile(r'\s*\n\s*')
+
+
+def _is_macro(filename):
+    """Check if a template file is one of the bundled macro templates.
+
+    Args:
+        filename (str): The template filename, may be None.
+
+    Returns:
+        bool: True if the template is in the macros directory.
+    """
+    if not filename:
+        return False
+    return os.path.dirname(os.path.abspath(filename)) == MACROS_DIR
+
+
+def _read_macros():
+    """Read all the bundled macro templates into memory, once.
+
+    Returns:
+        macros (dict): A dictionary of template names and sources.
+    """
+    if not _MACROS:
+        for name in sorted(os.listdir(MACROS_DIR)):
+            if not name.endswith('.html'):
+                continue
+            filename = os.path.join(MACROS_DIR, name)
+            with io.open(filename, encoding='utf-8') as fobj:
+                _MACROS[name] = fobj.read()
+    return _MACROS
+
+
+def _prefix_imports(source, names, prefix):
+    """Rewrite the imports between macro templates to use a prefix.
+
+    Args:
+        source (str): The template source.
+        names (list): The macro template names.
+        prefix (str): The prefix, e.g. 'extras'.
+
+    Returns:
+        source (str): The rewritten source.
+    """
+    pattern = r'((?:from|import|include|extends)\s+)([\'"])({0})\2'.format(
+        '|'.join(re.escape(name) for name in names))
+    return re.sub(pattern, r'\1\2{0}/\3\2'.format(prefix), source)
+
+
+def _uptodate():
+    """The bundled macros are immutable, so are always up to date."""
+    return True
+
+
+class MacrosLoader(BaseLoader):
+    """An immutable, in-memory loader for the bundled macro templates.
+
+    Macros are available under a prefix (e.g. 'extras/utils.html'), which
+    never touch the filesystem, and whose imports of other macros resolve
+    to prefixed names too. Unprefixed names (e.g. 'utils.html') are first
+    looked up with the wrapped `loader`, as before, so they can still be
+    overridden by app templates.
+    """
+
+    def __init__(self, loader=None, prefix=MACROS_PREFIX):
+        """Setup the loader.
+
+        Args:
+            loader (object, optional): The loader to try for unprefixed names.
+            prefix (str, optional): The prefix to make the macros available
+                under.
+        """
+        self.loader = loader
+        self.prefix = prefix
+        macros = _read_macros()
+        self.sources = dict(macros)
+        for name, source in macros.items():
+            self.sources['{0}/{1}'.format(prefix, name)] = _prefix_imports(
+                source, macros.keys(), prefix)
+
+    def get_source(self, environment, template):
+        """Get the template source, filename and up to date function."""
+        if self.loader is not None and template not in self.sources:
+            return self.loader.get_source(environment, template)
+        if self.loader is not None and template in _MACROS:
+            try:
+                return self.loader.get_source(environment, template)
+            except TemplateNotFound:
+                pass
+        try:
+            source = self.sources[template]
+        except KeyError:
+            raise TemplateNotFound(template)
+        filename = os.path.join(MACROS_DIR, template.split('/')[-1])
+        return source, filename, _uptodate
+
+    def list_templates(self):
+        """List all templates, including those of the wrapped loader."""
+        templates = set(self.sources)
+        if self.loader is not None:
+            templates.update(self.loader.list_templates())
+        return sorted(templates)
+
+
+def _trim_whitespace(text, preserve=False):
+    """Collapse all whitespace spanning lines into a single newline.
+
+    A run of whitespace containing a newline renders the same as a single
+    newline (in html, and javascript). Whitespace inside `<pre>` and
+    `<textarea>` elements is kept as is.
+
+    Args:
+        text (str): The template text.
+        preserve (bool, optional): Whether the text starts inside a `<pre>`
+            or `<textarea>` element.
+
+    Returns:
+        tuple: The trimmed text, and whether it ends inside a `<pre>` or
+            `<textarea>` element.
+    """
+    parts = _PRESERVE_RE.split(text)
+    trimmed = []
+    # Parts are (text, tag, closing slash) repeated, ending with text.
+    for i in range(0, len(parts), 3):
+        if preserve:
+            trimmed.append(parts[i])
+        else:
+            trimmed.append(_NEWLINES_RE.sub('\n', parts[i]))
+        if i + 1 < len(parts):
+            trimmed.append(parts[i + 1])
+            preserve = not parts[i + 2]
+    return ''.join(trimmed), preserve
+
+
+class TrimMacrosExtension(Extension):
+    """Trim the indentation and blank lines of the bundled macros output.
+
+    Only the text of the bundled macro templates is changed, at compile
+    time, so app templates and rendering speed are unaffected.
+
+    Usage:
+    app.jinja_env.add_extension(TrimMacrosExtension)
+    """
+
+    def filter_stream(self, stream):
+        """Trim the text tokens of the bundled macro templates."""
+        if not _is_macro(stream.filename):
+            return stream
+        return self._trim(stream)
+
+    def _trim(self, stream):
+        """Yield tokens, trimming the whitespace of text."""
+        preserve = False
+        for token in stream:
+            if token.type == 'data':
+                value, preserve = _trim_whitespace(token.value, preserve)
+                token = Token(token.lineno, 'data', value)
+            yield token
+
+
+def config_trim_macros(app):
+    """Trim the whitespace of the bundled macros output, if configured.
+
+    Enable with `app.config['FLASK_EXTRAS_TRIM_MACROS'] = True`.
+
+    Args:
+        app (object): The Flask application instance.
+
+    Returns:
+        app (object): The modified Flask application instance.
+    """
+    if app.config.get('FLASK_EXTRAS_TRIM_MACROS'):
+        app.jinja_env.add_extension(TrimMacrosExtension)
+    return app
+
+
+class MacrosBytecodeCache(FileSystemBytecodeCache):
+    """A filesystem bytecode cache for only the bundled macro templates.
+
+    Cache files include the package version, so upgrading the package
+    never loads bytecode compiled from older macros.
+    """
+
+    def __init__(self, directory=None, version=''):
+        """Setup the cache.
+
+        Args:
+            directory (str, optional): The cache directory, defaults to
+                a directory in the system temp folder.
+            version (str, optional): The package version.
+        """
+        pattern = '__flask_extras_{0}_%s.cache'.format(version)
+        super(MacrosBytecodeCache, self).__init__(
+            directory=directory, pattern=pattern)
+        self._keys = set()
+
+    def get_bucket(self, environment, name, filename, source):
+        """Return a cache bucket, which is only loaded for macro templates."""
+        if not _is_macro(filename):
+            return Bucket(environment, self.get_cache_key(name, filename),
+                          self.get_source_checksum(source))
+        bucket = super(MacrosBytecodeCache, self).get_bucket(
+            environment, name, filename, source)
+        self._keys.add(bucket.key)
+        return bucket
+
+    def set_bucket(self, bucket):
+        """Store a cache bucket, if it belongs to a macro template."""
+        if bucket.key in self._keys:
+            super(MacrosBytecodeCache, self).set_bucket(bucket)
+
+
+def config_bytecode_cache(app, version=''):
+    """Setup a bytecode cache for the bundled macros, if enabled.
+
+    Enable with `app.config['FLASK_EXTRAS_BYTECODE_CACHE'] = True`, and set
+    the location with `app.config['FLASK_EXTRAS_BYTECODE_CACHE_DIR']`.
+
+    Args:
+        app (object): The Flask application instance.
+        version (str, optional): The package version.
+
+    Returns:
+        app (object): The modified Flask application instance.
+    """
+    if not app.config.get('FLASK_EXTRAS_BYTECODE_CACHE'):
+        return app
+    if app.config.get('FLASK_EXTRAS_TRIM_MACROS'):
+        # Trimmed macros compile to different bytecode.
+        version = '{0}-trimmed'.format(version)
+    if app.config.get('FLASK_EXTRAS_OPTIMIZE_TEMPLATES'):
+        # So do optimized macros, with the bundled helpers inlined.
+        version = '{0}-optimized'.format(version)
+    directory = app.config.get('FLASK_EXTRAS_BYTECODE_CACHE_DIR')
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    app.jinja_env.bytecode_cache = MacrosBytecodeCache(
+        directory=directory, version=version)
+    return app
+
+
+def config_macros_loader(app):
+    """Make the bundled macros available to the app templates.
+
+    The macros are served from memory by `MacrosLoader`, under the
+    `app.config['FLASK_EXTRAS_MACROS_PREFIX']` prefix (default 'extras', e.g.
+    'extras/utils.html'), and unprefixed after the app templates. Set
+    `app.config['FLASK_EXTRAS_RELOAD_MACROS']` to load them from the package
+    folder instead, reloading on changes (only useful when editing them).
+    If `app.config['FLASK_EXTRAS_COMPILED_MACROS']` is set to a folder (or
+    zip file) created by `compile_macros`, the precompiled python modules
+    are loaded instead, so templates are never parsed in production.
+
+    Args:
+        app (object): The Flask application instance.
+
+    Returns:
+        app (object): The modified Flask application instance.
+    """
+    compiled = app.config.get('FLASK_EXTRAS_COMPILED_MACROS')
+    if compiled:
+        # Flask only asks its loaders for template source, which compiled
+        # modules can not provide, so they are added to the environment.
+        app.jinja_env.loader = ChoiceLoader([
+            app.jinja_env.loader,
+            ModuleLoader(compiled),
+        ])
+        return app
+    if app.config.get('FLASK_EXTRAS_RELOAD_MACROS'):
+        app.jinja_loader = ChoiceLoader([
+            app.jinja_loader,
+            FileSystemLoader(MACROS_DIR),
+        ])
+        return app
+    app.jinja_loader = MacrosLoader(
+        loader=app.jinja_loader,
+        prefix=app.config.get('FLASK_EXTRAS_MACROS_PREFIX', MACROS_PREFIX))
+    return app
+
+
+def compile_macros(target, app=None, zip=None, trim=False):
+    """Compile all bundled macro templates into python modules.
+
+    Templates are compiled with the jinja environment of the given app (by
+    default a new app setup with `FlaskExtras`), so autoescaping and any
+    extensions match what is used at runtime.
+
+    Args:
+        target (str): The output folder, or zip file if `zip` is given.
+        app (object, optional): The Flask application instance.
+        zip (str, optional): Zip compression ('deflated' or 'stored').
+        trim (bool, optional): Trim the macros whitespace, if no app is
+            given (see `TrimMacrosExtension`).
+    """
+    if app is None:
+        from flask import Flask
+        from flask_extras import FlaskExtras
+        app = Flask('flask_extras')
+        app.config['FLASK_EXTRAS_TRIM_MACROS'] = trim
+        app = FlaskExtras(app)
+    if zip is None and not os.path.isdir(target):
+        os.makedirs(target)
+    env = app.jinja_env.overlay(loader=MacrosLoader(
+        prefix=app.config.get('FLASK_EXTRAS_MACROS_PREFIX', MACROS_PREFIX)))
+    env.compile_templates(
+        target, extensions=['html'], zip=zip, ignore_errors=False)
+
+
+def main(argv=None):
+    """Compile the bundled macros from the command line.
+
+    Usage:
+    flask-extras-compile-macros /path/to/compiled [--zip deflated] [--trim]
+    """
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description=(
+        'Compile the flask_extras macros into python modules, for use with '
+        'FLASK_EXTRAS_COMPILED_MACROS.'))
+    parser.add_argument('target', help='The output folder (or zip file).')
+    parser.add_argument('--zip', choices=['deflated', 'stored'],
+                        default=None, help='Write a zip file instead.')
+    parser.add_argument('--trim', action='store_true',
+                        help='Trim the whitespace of the macros output.')
+    args = parser.parse_args(argv)
+    compile_macros(args.target, zip=args.zip, trim=args.trim)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
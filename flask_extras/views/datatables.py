@@ -0,0 +1,350 @@
+"""Server-side processing for DataTables (https://datatables.net).
+
+Rather than rendering every row into the page (e.g. with `objects2table`
+and `data_attrs={'datatable': 'true'}`), the table is rendered empty, and
+DataTables requests only the visible window from a view:
+
+    @app.route('/users/data')
+    def users_data():
+        return datatable_response(
+            users, columns=['id', 'name', 'email'], filterkeys=['password'])
+
+    $('#users').DataTable({serverSide: true, ajax: '/users/data'});
+
+Searching (global and per column, case insensitive substring matches),
+ordering (by any number of columns) and paging follow the DataTables
+server-side processing protocol. Only the rows of the visible window are
+converted for the response, and ordering a single column only keeps the
+rows up to the end of the window, rather than sorting everything.
+
+DataTables renders cell data as HTML, so string values are escaped, as in
+`objects2table`, unless `autoescape=False` is passed.
+
+For data that is paged and re-sorted repeatedly (e.g. polling dashboards),
+pass a `SortIndex` of the rows instead, which keeps each sort order between
+requests, until its version changes:
+
+    index = SortIndex([])
+
+    @app.route('/users/data')
+    def users_data():
+        index.update(load_users, version=users_version())
+        return datatable_response(index, columns=['id', 'name', 'email'])
+"""
+
+from __future__ import absolute_import
+
+import heapq
+
+from collections import OrderedDict
+
+from flask import jsonify, request
+from markupsafe import escape
+
+from flask_extras.filters.munging import FilterSpec
+from flask_extras.filters.munging import SortIndex
+from flask_extras.filters.munging import _sort_value
+from flask_extras.filters.munging import compile_filter
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+# The default maximum number of rows returned per request.
+MAX_LENGTH = 1000
+
+try:
+    _TEXT_TYPE = unicode
+    _STRING_TYPES = (str, unicode)
+except NameError:
+    _TEXT_TYPE = str
+    _STRING_TYPES = (str,)
+
+
+def _int(val, default):
+    """Convert a request argument to an int, or return the default."""
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        return default
+
+
+def _bool(val):
+    """Convert a request argument ('true'/'false') to a bool."""
+    return val != 'false'
+
+
+def parse_args(args, columns):
+    """Parse the DataTables server-side processing request arguments.
+
+    Args:
+        args (dict): The request arguments, e.g. `request.args`.
+        columns (list): The column keys, in table order.
+
+    Returns:
+        params (dict): The draw counter, start, length, global search,
+            per column searches (key, value), orderable and searchable
+            columns and order (a list of (key, descending) 2-tuples).
+    """
+    searchable = []
+    orderable = []
+    searches = []
+    for i, key in enumerate(columns):
+        prefix = 'columns[{0}]'.format(i)
+        if _bool(args.get(prefix + '[searchable]')):
+            searchable.append(key)
+            value = args.get(prefix + '[search][value]')
+            if value:
+                searches.append((key, value.lower()))
+        if _bool(args.get(prefix + '[orderable]')):
+            orderable.append(key)
+    order = []
+    i = 0
+    while 'order[{0}][column]'.format(i) in args:
+        prefix = 'order[{0}]'.format(i)
+        index = _int(args.get(prefix + '[column]'), -1)
+        if 0 <= index < len(columns) and columns[index] in orderable:
+            order.append((columns[index],
+                          args.get(prefix + '[dir]') == 'desc'))
+        i += 1
+    return dict(
+        draw=_int(args.get('draw'), 0),
+        start=max(0, _int(args.get('start'), 0)),
+        length=_int(args.get('length'), 10),
+        search=(args.get('search[value]') or '').lower(),
+        searches=searches,
+        searchable=searchable,
+        order=order,
+    )
+
+
+def _as_dict(row):
+    """Get a row as a dict, or an object's `__dict__` (as `sql2dict`)."""
+    if isinstance(row, Mapping):
+        return row
+    return row.__dict__
+
+
+def _text(val):
+    """Get the lowercase text of a value, for searching."""
+    if val is None:
+        return ''
+    return _TEXT_TYPE(val).lower()
+
+
+def _matcher(search, searches, searchable):
+    """Compile a function checking if a row matches the searches.
+
+    Args:
+        search (str): The lowercase global search.
+        searches (list): The lowercase per column searches, as
+            (key, value) 2-tuples.
+        searchable (list): The columns the global search applies to.
+
+    Returns:
+        func (function): A function of a row, returning a bool.
+    """
+    text = _text
+
+    def _match(row):
+        get = _as_dict(row).get
+        for key, value in searches:
+            if value not in text(get(key)):
+                return False
+        if not search:
+            return True
+        # A single search of all columns, separated so values never match
+        # across columns.
+        return search in '\x00'.join([text(get(key)) for key in searchable])
+    return _match
+
+
+def _sort_key(key, desc, text=False):
+    """Get a sort key function for a column, ordering None after values."""
+    def _key(row):
+        return _sort_value(_as_dict(row).get(key), desc, text=text)
+    return _key
+
+
+def _order(rows, order, stop):
+    """Order rows, keeping at least the first `stop` rows.
+
+    Args:
+        rows (list): The rows.
+        order (list): A list of (key, descending) 2-tuples.
+        stop (int): The end of the window, or None for all rows.
+
+    Returns:
+        rows (list): The ordered rows.
+    """
+    try:
+        return _order_by(rows, order, stop)
+    except TypeError:
+        # Mixed types can not be compared (in python 3), compare numbers
+        # first, then other values as text.
+        return _order_by(rows, order, stop, text=True)
+
+
+def _order_by(rows, order, stop, text=False):
+    """Order rows, comparing values as text if given, see `_order`."""
+    if len(order) == 1 and stop is not None and stop < len(rows):
+        key, desc = order[0]
+        select = heapq.nlargest if desc else heapq.nsmallest
+        return select(stop, rows, key=_sort_key(key, desc, text=text))
+    rows = list(rows)
+    # Stable sorts, from the least significant column.
+    for key, desc in reversed(order):
+        rows.sort(key=_sort_key(key, desc, text=text), reverse=desc)
+    return rows
+
+
+def _cells(row, columns, filtervals, as_objects, autoescape=True):
+    """Convert a row for the response.
+
+    Every column has a cell, empty for missing and filtered values, so
+    DataTables finds all the columns it requests.
+
+    Args:
+        row (mixed): The row, a dict or an object.
+        columns (list): The column keys, in table order, without the
+            filtered keys.
+        filtervals (FilterSpec): The values to return as empty cells.
+        as_objects (bool): Return an object, rather than an array.
+        autoescape (bool, optional): Escape string values (`Markup` is
+            kept as is).
+
+    Returns:
+        cells (mixed): The row as an array, or object.
+    """
+    get = _as_dict(row).get
+    cells = [get(key, '') for key in columns]
+    if isinstance(filtervals, FilterSpec) and filtervals:
+        cells = ['' if val in filtervals else val for val in cells]
+    if autoescape:
+        cells = [escape(val) if isinstance(val, _STRING_TYPES) else val
+                 for val in cells]
+    if as_objects:
+        return OrderedDict(zip(columns, cells))
+    return cells
+
+
+def _window(rows, params, start, stop):
+    """Search, order and page rows.
+
+    Args:
+        rows (iterable): The rows.
+        params (dict): The parsed request, see `parse_args`.
+        start (int): The index of the first row of the window.
+        stop (int): The index after the last row of the window.
+
+    Returns:
+        tuple: The total and filtered number of rows, and the window rows.
+    """
+    searching = params['search'] or params['searches']
+    if isinstance(rows, (list, tuple)) and not searching:
+        total = filtered = len(rows)
+    else:
+        rows = list(rows)
+        total = len(rows)
+        if searching:
+            match = _matcher(params['search'], params['searches'],
+                             params['searchable'])
+            rows = [row for row in rows if match(row)]
+        filtered = len(rows)
+    if params['order']:
+        rows = _order(rows, params['order'], stop)
+    return total, filtered, rows[start:stop]
+
+
+def _index_window(index, params, start, stop):
+    """Search and page the rows of a `SortIndex`, in a kept order.
+
+    Args:
+        index (SortIndex): The rows index.
+        params (dict): The parsed request, see `parse_args`.
+        start (int): The index of the first row of the window.
+        stop (int): The index after the last row of the window.
+
+    Returns:
+        tuple: The total and filtered number of rows, and the window rows.
+    """
+    # The rows and order of a single version, as the index can be updated
+    # by another thread meanwhile.
+    rows, indexes = index.snapshot(params['order'])
+    total = len(rows)
+    if not (params['search'] or params['searches']):
+        return total, total, [rows[i] for i in indexes[start:stop]]
+    match = _matcher(params['search'], params['searches'],
+                     params['searchable'])
+    matched = [i for i in indexes if match(rows[i])]
+    return total, len(matched), [rows[i] for i in matched[start:stop]]
+
+
+def datatable_json(rows, columns, args=None, filterkeys=[], filtervals=[],
+                   max_length=MAX_LENGTH, as_objects=False, autoescape=True):
+    """Process a DataTables server-side request over a list of dicts.
+
+    Args:
+        rows (iterable): The rows, as dictionaries or objects (whose
+            `__dict__` is used, as `sql2dict`), or a `SortIndex` of them to
+            reuse sort orders between requests.
+        columns (list): The column keys, in table order (as the table
+            header). Keys in `filterkeys` are removed.
+        args (dict, optional): The request arguments, defaults to
+            `request.args`.
+        filterkeys (list, optional): The keys to never return, or a
+            `FilterSpec`.
+        filtervals (list, optional): The values to return as empty cells,
+            or a `FilterSpec`.
+        max_length (int, optional): The maximum rows returned per request,
+            also used when all rows (a length of -1) are requested.
+        as_objects (bool, optional): Return rows as objects (for tables
+            using `columns.data` names), rather than arrays.
+        autoescape (bool, optional): Escape string values, as DataTables
+            renders cell data as HTML. Pass False for tables rendering
+            cells as text, or with their own `columns.render`.
+
+    Returns:
+        data (dict): The response data.
+    """
+    if args is None:
+        args = request.args
+    filterkeys = compile_filter(filterkeys)
+    filtervals = compile_filter(filtervals)
+    columns = [key for key in columns if key not in filterkeys]
+    params = parse_args(args, columns)
+    start = params['start']
+    length = params['length']
+    if length < 0 or length > max_length:
+        length = max_length
+    stop = start + length
+    if isinstance(rows, SortIndex):
+        total, filtered, rows = _index_window(rows, params, start, stop)
+    else:
+        total, filtered, rows = _window(rows, params, start, stop)
+    return dict(
+        draw=params['draw'],
+        recordsTotal=total,
+        recordsFiltered=filtered,
+        data=[_cells(row, columns, filtervals, as_objects, autoescape)
+              for row in rows],
+    )
+
+
+def datatable_response(rows, columns, **kwargs):
+    """Respond to a DataTables server-side request, from a view.
+
+    Usage:
+    return datatable_response(users, columns=['id', 'name', 'email'])
+
+    Args:
+        rows (iterable): The rows, as dictionaries or objects, or a
+            `SortIndex`.
+        columns (list): The column keys, in table order.
+        kwargs: See `datatable_json`.
+
+    Returns:
+        response (Response): The JSON response.
+    """
+    return jsonify(datatable_json(rows, columns, **kwargs))
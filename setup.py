@@ -1,5 +1,7 @@
 """Setup for Flask Extras."""
 
+import re
+
 from setuptools import setup
 
 requirements = [
@@ -10,6 +12,13 @@ requirements = [
 ]
 
 
+def version():
+    """Grab the version from the package, without importing it."""
+    with open('flask_extras/__init__.py', 'r') as fobj:
+        return re.search(
+            r"^__version__ = '([^']+)'", fobj.read(), re.M).group(1)
+
+
 def readme():
     """Grab the long README file."""
     try:
@@ -25,7 +34,7 @@ def readme():
 
 setup(
     name='flask_extras',
-    version='4.0.4',
+    version=version(),
     description=('Assorted useful flask views, blueprints, '
                  'Jinja2 template filters, and templates/macros'),
     long_description=readme(),
@@ -38,6 +47,10 @@ setup(
         'Programming Language :: Python :: 2.7',
     ],
     install_requires=requirements,
+    extras_require={
+        # Optional, used for batch date column parsing/formatting.
+        'numpy': ['numpy'],
+    },
     package_dir={'flask_extras': 'flask_extras'},
     packages=['flask_extras'],
     package_data={
@@ -45,6 +58,11 @@ setup(
             'macros/*.html',
         ],
     },
+    entry_points={
+        'console_scripts': [
+            'flask-extras-compile-macros=flask_extras.templating:main',
+        ],
+    },
     zip_safe=False,
     include_package_data=True,
 )
@@ -0,0 +1,183 @@
+"""Test the fragment cache."""
+
+import pytest
+
+from flask import Flask
+from jinja2 import TemplateSyntaxError
+
+from flask_extras import FlaskExtras
+from flask_extras.cache import backends
+from flask_extras.cache import config
+from flask_extras.filters import memoize
+
+
+def _app(cache=True, **kwargs):
+    """Make an app with the fragment cache."""
+    app = Flask('test_cache')
+    app.config['FLASK_EXTRAS_FRAGMENT_CACHE'] = cache
+    app.config.update(kwargs)
+    return FlaskExtras(app)
+
+
+def _render(app, source, **kwargs):
+    """Render a template string."""
+    with app.app_context():
+        return app.jinja_env.from_string(source).render(**kwargs)
+
+
+class Counter(object):
+    """Count renders of a fragment."""
+
+    def __init__(self):
+        """Setup the counter."""
+        self.count = 0
+
+    def __call__(self):
+        """Count a render."""
+        self.count += 1
+        return self.count
+
+
+class DictCache(backends.BaseCache):
+    """A minimal custom backend."""
+
+    def __init__(self):
+        """Setup the backend."""
+        self.data = {}
+
+    def get(self, key, default=None):
+        """Get a value."""
+        return self.data.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        """Set a value."""
+        self.data[key] = value
+
+
+class TestBaseCache:
+    """All tests for BaseCache class."""
+
+    def test_interface(self):
+        """Test function."""
+        cache = backends.BaseCache()
+        for method, args in [('get', ['a']), ('set', ['a', 'b']),
+                             ('delete', ['a']), ('clear', []), ('info', [])]:
+            with pytest.raises(NotImplementedError):
+                getattr(cache, method)(*args)
+
+
+class TestMemoryCache:
+    """All tests for MemoryCache class."""
+
+    def test_size(self):
+        """Test function."""
+        cache = backends.MemoryCache(maxsize=2)
+        for key in 'abc':
+            cache.set(key, key)
+        assert cache.get('a') is None
+        assert cache.get('c') == 'c'
+        assert cache.info() == memoize.CacheInfo(1, 1, 2, 2)
+
+    def test_ttl(self, monkeypatch):
+        """Test function."""
+        now = [1000.0]
+        monkeypatch.setattr(memoize, 'time', lambda: now[0])
+        cache = backends.MemoryCache(ttl=5)
+        cache.set('a', 'a')
+        now[0] += 6
+        assert cache.get('a') is None
+
+
+class TestConfig:
+    """All tests for enabling the fragment cache."""
+
+    def test_disabled_by_default(self):
+        """Test function."""
+        app = FlaskExtras(Flask('test_cache'))
+        assert config.fragment_cache_info(app) is None
+        with pytest.raises(TemplateSyntaxError):
+            _render(app, '{% cache "a" %}{% endcache %}')
+
+    def test_memory_cache(self):
+        """Test function."""
+        app = _app(FLASK_EXTRAS_FRAGMENT_CACHE_SIZE=10,
+                   FLASK_EXTRAS_FRAGMENT_CACHE_TTL=60)
+        cache = app.jinja_env.fragment_cache
+        assert isinstance(cache, backends.MemoryCache)
+        assert cache.maxsize == 10
+        assert cache.ttl == 60
+
+    def test_backend_instance(self):
+        """Test function."""
+        cache = backends.MemoryCache(maxsize=5)
+        app = _app(cache)
+        assert app.jinja_env.fragment_cache is cache
+
+    def test_custom_backend(self):
+        """Test function."""
+        cache = DictCache()
+        app = _app(cache)
+        assert _render(app, '{% cache "a" %}foo{% endcache %}') == 'foo'
+        assert list(cache.data.values()) == ['foo']
+
+
+class TestFragmentCache:
+    """All tests for the cache tag."""
+
+    def test_cached(self):
+        """Test function."""
+        app = _app()
+        counter = Counter()
+        source = '{% cache "a" %}{{ counter() }}{% endcache %}'
+        assert _render(app, source, counter=counter) == '1'
+        assert _render(app, source, counter=counter) == '1'
+        assert counter.count == 1
+        assert config.fragment_cache_info(app) == memoize.CacheInfo(
+            1, 1, 1000, 1)
+
+    def test_keys(self):
+        """Test function."""
+        app = _app()
+        counter = Counter()
+        source = ('{% cache "user-%s"|format(id) %}{{ counter() }}'
+                  '{% endcache %}')
+        assert _render(app, source, counter=counter, id=1) == '1'
+        assert _render(app, source, counter=counter, id=2) == '2'
+        assert _render(app, source, counter=counter, id=1) == '1'
+
+    def test_namespaced(self):
+        """Test different fragments with the same key are not shared."""
+        app = _app()
+        source = ('{% cache "a" %}foo{% endcache %}'
+                  '{% cache "a" %}bar{% endcache %}')
+        assert _render(app, source) == 'foobar'
+
+    def test_ttl(self, monkeypatch):
+        """Test function."""
+        now = [1000.0]
+        monkeypatch.setattr(memoize, 'time', lambda: now[0])
+        app = _app()
+        counter = Counter()
+        source = '{% cache "a", 10 %}{{ counter() }}{% endcache %}'
+        assert _render(app, source, counter=counter) == '1'
+        now[0] += 5
+        assert _render(app, source, counter=counter) == '1'
+        now[0] += 10
+        assert _render(app, source, counter=counter) == '2'
+
+    def test_autoescape(self):
+        """Test cached fragments are not escaped again."""
+        app = _app()
+        source = ('{% autoescape true %}{% cache "a" %}<b>{{ val }}</b>'
+                  '{% endcache %}{% endautoescape %}')
+        for _ in range(2):
+            assert _render(app, source, val='<i>') == '<b>&lt;i&gt;</b>'
+
+    def test_macros(self):
+        """Test function."""
+        app = _app()
+        source = ("{% from 'macros.html' import dict2list %}"
+                  "{% cache 'list' %}{{ dict2list(data) }}{% endcache %}")
+        first = _render(app, source, data={'foo': 'bar'})
+        assert 'foo' in first
+        assert _render(app, source, data={'foo': 'baz'}) == first
@@ -0,0 +1,235 @@
+"""Test the shared memory fragment cache backend."""
+
+import os
+
+from multiprocessing import Process
+
+from flask import Flask
+from flask import render_template_string
+from markupsafe import Markup
+
+from flask_extras import FlaskExtras
+from flask_extras.cache import shared
+from flask_extras.filters import config as filter_conf
+from flask_extras.filters import memoize
+
+
+def _cache(tmpdir, **kwargs):
+    """Make a cache in a temp folder."""
+    kwargs.setdefault('maxsize', 64)
+    kwargs.setdefault('slot_size', 1024)
+    kwargs.setdefault('stripes', 4)
+    return shared.SharedMemoryCache(
+        path=os.path.join(str(tmpdir), 'test.cache'), **kwargs)
+
+
+def _set_in_child(path, keys):
+    """Set keys from another process."""
+    cache = shared.SharedMemoryCache(
+        path=path, maxsize=64, slot_size=1024, stripes=4)
+    for key in keys:
+        cache.set(key, u'value-{0}'.format(key))
+        cache.get(key)
+
+
+def _run(target, *args):
+    """Run a function in another process."""
+    proc = Process(target=target, args=args)
+    proc.start()
+    proc.join()
+    assert proc.exitcode == 0
+
+
+class TestSharedMemoryCache:
+    """All tests for SharedMemoryCache class."""
+
+    def test_get_set(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        assert cache.get('foo') is None
+        cache.set('foo', u'b\xe4r')
+        assert cache.get('foo') == u'b\xe4r'
+        assert cache.info() == memoize.CacheInfo(1, 1, 64, 1)
+
+    def test_overwrite_and_delete(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', u'bar')
+        cache.set('foo', u'baz')
+        assert cache.get('foo') == u'baz'
+        assert len(cache) == 1
+        cache.delete('foo')
+        assert cache.get('foo') is None
+
+    def test_only_text(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', 1)
+        assert cache.get('foo') is None
+
+    def test_markup(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', Markup(u'<b>b\xe4r</b>'))
+        cache.set('bar', u'<b>b\xe4r</b>')
+        assert isinstance(cache.get('foo'), Markup)
+        assert cache.get('foo') == u'<b>b\xe4r</b>'
+        assert not isinstance(cache.get('bar'), Markup)
+        assert cache.get('bar') == u'<b>b\xe4r</b>'
+
+    def test_too_large(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', u'bar')
+        cache.set('foo', u'x' * 2000)
+        assert cache.get('foo') is None
+
+    def test_evicts_least_recently_used(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir, maxsize=2, stripes=1)
+        cache.set('a', u'1')
+        cache.set('b', u'2')
+        cache.get('a')
+        cache.set('c', u'3')
+        assert cache.get('b') is None
+        assert cache.get('a') == u'1'
+        assert cache.get('c') == u'3'
+        assert len(cache) == 2
+
+    def test_ttl(self, tmpdir, monkeypatch):
+        """Test function."""
+        now = [1000.0]
+        monkeypatch.setattr(shared, 'time', lambda: now[0])
+        cache = _cache(tmpdir, ttl=10)
+        cache.set('a', u'1')
+        cache.set('b', u'2', ttl=60)
+        now[0] += 30
+        assert cache.get('a') is None
+        assert cache.get('b') == u'2'
+        assert len(cache) == 1
+
+    def test_clear(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('a', u'1')
+        cache.get('a')
+        cache.clear()
+        assert cache.info() == memoize.CacheInfo(0, 0, 64, 0)
+
+    def test_maxsize_rounded(self, tmpdir):
+        """Test function."""
+        assert _cache(tmpdir, maxsize=10, stripes=4).maxsize == 12
+
+    def test_shared_between_processes(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        keys = ['key{0}'.format(i) for i in range(20)]
+        _run(_set_in_child, cache.path, keys[:10])
+        _run(_set_in_child, cache.path, keys[10:])
+        for key in keys:
+            assert cache.get(key) == u'value-{0}'.format(key)
+        # Hits are counted in all processes.
+        assert cache.info().hits == 40
+
+    def test_concurrent_processes(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        keys = ['key{0}'.format(i) for i in range(50)]
+        procs = [Process(target=_set_in_child, args=(cache.path, keys))
+                 for _ in range(4)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+            assert proc.exitcode == 0
+        info = cache.info()
+        assert info.hits == 200
+        assert info.currsize <= 64
+        for key in keys:
+            assert cache.get(key) in [None, u'value-{0}'.format(key)]
+
+    def test_layout_changed(self, tmpdir):
+        """Test function."""
+        old = _cache(tmpdir)
+        old.set('a', u'1')
+        new = _cache(tmpdir, maxsize=128)
+        assert new.get('a') is None
+        new.set('a', u'2')
+        # Processes with the old file mapped are unaffected.
+        assert old.get('a') == u'1'
+        assert os.path.getsize(new.path) == new._size
+
+
+class TestFragmentCache:
+    """All tests for using the shared cache with the cache tag."""
+
+    def test_fragments(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        app = Flask('test_cache_shared')
+        app.config['FLASK_EXTRAS_FRAGMENT_CACHE'] = cache
+        FlaskExtras(app)
+        source = ("{% from 'macros.html' import dict2list %}"
+                  "{% cache 'list' %}{{ dict2list(data) }}{% endcache %}")
+        with app.app_context():
+            first = app.jinja_env.from_string(source).render(
+                data={'foo': '<b>'})
+            second = app.jinja_env.from_string(source).render(
+                data={'foo': 'baz'})
+        assert '&lt;b&gt;' in first
+        assert first == second
+        assert cache.info().hits == 1
+
+
+class TestMemoizedFilters:
+    """All tests for using the shared cache for memoized filters."""
+
+    def test_filters(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        app = Flask('test_cache_shared')
+        app.config['FLASK_EXTRAS_MEMOIZE_FILTERS'] = True
+        app.config['FLASK_EXTRAS_MEMOIZE_BACKEND'] = cache
+        FlaskExtras(app)
+        slugify = app.jinja_env.filters['slugify']
+        assert slugify('Foo Bar') == slugify('Foo Bar') == 'foo-bar'
+        assert filter_conf.filter_cache_info(app)['slugify'].hits == 1
+        assert cache.get(
+            "flask_extras.filters.filters.slugify:('Foo Bar',):[]") == \
+            'foo-bar'
+
+    def test_markup_filters(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        app = Flask('test_cache_shared')
+        app.config['FLASK_EXTRAS_MEMOIZE_FILTERS'] = True
+        app.config['FLASK_EXTRAS_MEMOIZE_BACKEND'] = cache
+        FlaskExtras(app)
+        source = ('{% autoescape true %}{{ a|questionize_label }}|'
+                  '{{ b|questionize_label }}{% endautoescape %}')
+        with app.app_context():
+            for _ in range(2):
+                res = render_template_string(
+                    source, a=Markup('<b>hi</b>'), b='<b>hi</b>')
+                assert res == '<b>hi</b>|&lt;b&gt;hi&lt;/b&gt;'
+        # Markup is only cached in process, as its repr is not a key.
+        assert cache.info().hits == 1
+        questionize_label = app.jinja_env.filters['questionize_label']
+        assert len(questionize_label.cache) == 1
+
+    def test_only_builtin_args_shared(self, tmpdir):
+        """Test function."""
+        class Obj(object):
+            pass
+
+        cache = _cache(tmpdir)
+        memoized = memoize.memoize(
+            lambda *args: u'%d' % len(args), cache=cache)
+        obj = Obj()
+        assert memoized(obj) == memoized(obj) == u'1'
+        assert memoized(1, u'a', 1.5, None, b'b') == u'5'
+        assert memoized(1, u'a', 1.5, None, b'b') == u'5'
+        assert len(cache) == 1
+        assert cache.info().hits == 1
+        memoized.cache_clear()
+        assert len(cache) == 0
@@ -0,0 +1,271 @@
+"""Test the persistent SQLite fragment cache backend."""
+
+import os
+import sqlite3
+
+from multiprocessing import Process
+
+from flask import Flask
+from markupsafe import Markup
+
+from flask_extras import FlaskExtras
+from flask_extras.cache import sqlite
+from flask_extras.filters import config as filter_conf
+from flask_extras.filters import memoize
+
+
+def _path(tmpdir):
+    """Get a database path in a temp folder."""
+    return os.path.join(str(tmpdir), 'test.db')
+
+
+def _cache(tmpdir, **kwargs):
+    """Make a cache in a temp folder."""
+    kwargs.setdefault('maxsize', 64)
+    return sqlite.SQLiteCache(path=_path(tmpdir), **kwargs)
+
+
+def _set_in_child(path, keys):
+    """Set keys from another process."""
+    cache = sqlite.SQLiteCache(path=path, maxsize=64)
+    for key in keys:
+        cache.set(key, u'value-{0}'.format(key))
+        assert cache.get(key) == u'value-{0}'.format(key)
+
+
+def _run(target, *args):
+    """Run a function in another process."""
+    proc = Process(target=target, args=args)
+    proc.start()
+    proc.join()
+    assert proc.exitcode == 0
+
+
+class TestSQLiteCache:
+    """All tests for SQLiteCache class."""
+
+    def test_get_set(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        assert cache.get('foo') is None
+        cache.set('foo', u'b\xe4r')
+        assert cache.get('foo') == u'b\xe4r'
+        assert cache.info() == memoize.CacheInfo(1, 1, 64, 1)
+
+    def test_overwrite_and_delete(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', u'bar')
+        cache.set('foo', u'baz')
+        assert cache.get('foo') == u'baz'
+        assert len(cache) == 1
+        cache.delete('foo')
+        assert cache.get('foo') is None
+
+    def test_only_text(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', 1)
+        assert cache.get('foo') is None
+
+    def test_persists(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', u'bar')
+        cache.close()
+        # e.g. a restarted worker.
+        cache = _cache(tmpdir)
+        assert cache.get('foo') == u'bar'
+
+    def test_versioned(self, tmpdir):
+        """Test function."""
+        old = _cache(tmpdir, version='1')
+        old.set('foo', u'bar')
+        new = _cache(tmpdir, version='2')
+        assert new.get('foo') is None
+        new.set('foo', u'baz')
+        assert new.get('foo') == u'baz'
+        assert len(new) == 1
+        # e.g. both versions serving during a rolling deploy.
+        assert old.get('foo') == u'bar'
+        new.delete('foo')
+        assert old.get('foo') == u'bar'
+
+    def test_markup(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', Markup(u'<b>b\xe4r</b>'))
+        cache.set('bar', u'<b>b\xe4r</b>')
+        assert isinstance(cache.get('foo'), Markup)
+        assert cache.get('foo') == u'<b>b\xe4r</b>'
+        assert not isinstance(cache.get('bar'), Markup)
+        assert cache.get('bar') == u'<b>b\xe4r</b>'
+
+    def test_evicts_other_versions_first(self, tmpdir):
+        """Test function."""
+        old = _cache(tmpdir, version='1')
+        old.set('old', u'1')
+        new = _cache(tmpdir, version='2', maxsize=2)
+        new.set('a', u'1')
+        new.set('b', u'2')
+        assert new.get('a') == u'1'
+        assert new.get('b') == u'2'
+        assert old.get('old') is None
+
+    def test_evicts_least_recently_used(self, tmpdir, monkeypatch):
+        """Test function."""
+        now = [1000.0]
+        monkeypatch.setattr(sqlite, 'time', lambda: now[0])
+        cache = _cache(tmpdir, maxsize=2)
+        cache.set('a', u'1')
+        now[0] += 100
+        cache.set('b', u'2')
+        now[0] += 100
+        cache.get('a')
+        now[0] += 100
+        cache.set('c', u'3')
+        assert cache.get('b') is None
+        assert cache.get('a') == u'1'
+        assert cache.get('c') == u'3'
+        assert len(cache) == 2
+
+    def test_max_bytes(self, tmpdir, monkeypatch):
+        """Test function."""
+        now = [1000.0]
+        monkeypatch.setattr(sqlite, 'time', lambda: now[0])
+        # Sizes are in bytes: each value is 2 characters, 4 bytes and a tag.
+        cache = _cache(tmpdir, max_bytes=12)
+        for key in 'abc':
+            cache.set(key, u'\xe4' * 2)
+            now[0] += 1
+        assert cache.get('a') is None
+        assert cache.get('b') == cache.get('c') == u'\xe4\xe4'
+
+    def test_evicts_under_bounds(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir, maxsize=20)
+        for i in range(21):
+            cache.set(str(i), u'x')
+        # Evicted to 10% under the bounds, so not on every write.
+        assert len(cache) == 18
+        assert cache.get('0') is None
+        assert cache.get('20') == u'x'
+
+    def test_other_layouts_kept(self, tmpdir):
+        """Test function."""
+        conn = sqlite3.connect(_path(tmpdir))
+        conn.execute('CREATE TABLE fragments (key TEXT PRIMARY KEY)')
+        conn.execute("INSERT INTO fragments VALUES ('old')")
+        conn.commit()
+        cache = _cache(tmpdir)
+        cache.set('foo', u'bar')
+        assert cache.get('foo') == u'bar'
+        assert _cache(tmpdir).get('foo') == u'bar'
+        assert conn.execute('SELECT key FROM fragments').fetchall() == [
+            ('old',)]
+        conn.close()
+
+    def test_threaded_stats(self, tmpdir):
+        """Test function."""
+        from threading import Thread
+        cache = _cache(tmpdir)
+        cache.set('a', u'1')
+
+        def run():
+            for i in range(200):
+                cache.get('a' if i % 2 else 'b')
+
+        threads = [Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = cache.info()
+        assert (info.hits, info.misses) == (800, 800)
+
+    def test_ttl(self, tmpdir, monkeypatch):
+        """Test function."""
+        now = [1000.0]
+        monkeypatch.setattr(sqlite, 'time', lambda: now[0])
+        cache = _cache(tmpdir, ttl=10)
+        cache.set('a', u'1')
+        cache.set('b', u'2', ttl=60)
+        now[0] += 30
+        assert cache.get('a') is None
+        assert cache.get('b') == u'2'
+        assert len(cache) == 1
+
+    def test_clear(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('a', u'1')
+        cache.get('a')
+        cache.clear()
+        assert cache.info() == memoize.CacheInfo(0, 0, 64, 0)
+
+    def test_shared_between_processes(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        keys = ['key{0}'.format(i) for i in range(20)]
+        _run(_set_in_child, cache.path, keys[:10])
+        _run(_set_in_child, cache.path, keys[10:])
+        for key in keys:
+            assert cache.get(key) == u'value-{0}'.format(key)
+
+    def test_concurrent_processes(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        keys = ['key{0}'.format(i) for i in range(50)]
+        procs = [Process(target=_set_in_child, args=(cache.path, keys))
+                 for _ in range(4)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+            assert proc.exitcode == 0
+        assert len(cache) == 50
+
+    def test_after_fork(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        cache.set('foo', u'bar')
+        _run(_set_in_child, cache.path, ['baz'])
+        # The parent connection is never used in the child.
+        _run(cache.set, 'qux', u'1')
+        assert cache.get('qux') == u'1'
+        assert cache.get('baz') == u'value-baz'
+
+
+class TestFragmentCache:
+    """All tests for using the persistent cache with the cache tag."""
+
+    def test_fragments_survive_restart(self, tmpdir):
+        """Test function."""
+        source = ("{% from 'macros.html' import dict2list %}"
+                  "{% cache 'list' %}{{ dict2list(data) }}{% endcache %}")
+        rendered = []
+        for data in ({'foo': '<b>'}, {'foo': 'baz'}):
+            app = Flask('test_cache_sqlite')
+            app.config['FLASK_EXTRAS_FRAGMENT_CACHE'] = _cache(tmpdir)
+            FlaskExtras(app)
+            with app.app_context():
+                rendered.append(
+                    app.jinja_env.from_string(source).render(data=data))
+        assert '&lt;b&gt;' in rendered[0]
+        assert rendered[0] == rendered[1]
+        assert app.jinja_env.fragment_cache.info().hits == 1
+
+
+class TestMemoizedFilters:
+    """All tests for using the persistent cache for memoized filters."""
+
+    def test_filters(self, tmpdir):
+        """Test function."""
+        cache = _cache(tmpdir)
+        app = Flask('test_cache_sqlite')
+        app.config['FLASK_EXTRAS_MEMOIZE_FILTERS'] = True
+        app.config['FLASK_EXTRAS_MEMOIZE_BACKEND'] = cache
+        FlaskExtras(app)
+        slugify = app.jinja_env.filters['slugify']
+        assert slugify('Foo Bar') == slugify('Foo Bar') == 'foo-bar'
+        assert filter_conf.filter_cache_info(app)['slugify'].hits == 1
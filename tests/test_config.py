@@ -1,9 +1,32 @@
 """Test configuration utilities."""
 
-from flask import Flask
+import os
+import re
+import subprocess
+import sys
+
+from importlib import import_module
+
+from flask import Flask, render_template_string
+import pytest
 
+from flask_extras import FlaskExtras
 from flask_extras.filters import config
 
+# Budget (in seconds) for `import flask_extras` plus `FlaskExtras(app)`,
+# excluding importing flask itself.
+IMPORT_BUDGET = 0.25
+
+IMPORT_SCRIPT = """
+import sys, time
+from flask import Flask
+start = time.time()
+from flask_extras import FlaskExtras
+FlaskExtras(Flask('__import_test'))
+print(time.time() - start)
+print(','.join(sorted(sys.modules)))
+"""
+
 
 class TestGetFuncs:
     """All tests for get funcs function."""
@@ -52,3 +75,171 @@ class TestConfigFlaskFilters:
         config.config_flask_filters(app)
         new = len(app.jinja_env.filters)
         assert new > old
+
+
+class TestMemoizeFilters:
+    """All tests for memoized filter registration."""
+
+    def test_disabled_by_default(self):
+        """Test filters are not memoized unless enabled."""
+        app = Flask('__memoize_test')
+        config.config_flask_filters(app)
+        assert config.filter_cache_info(app) == {}
+
+    def test_enabled(self):
+        """Test filters are memoized when enabled."""
+        app = Flask('__memoize_test')
+        app.config['FLASK_EXTRAS_MEMOIZE_FILTERS'] = True
+        app.config['FLASK_EXTRAS_MEMOIZE_SIZES'] = {'slugify': 10}
+        config.config_flask_filters(app)
+        stats = config.filter_cache_info(app)
+        assert sorted(stats.keys()) == sorted(config.MEMOIZED_FILTERS.keys())
+        assert stats['slugify'].maxsize == 10
+        assert stats['camel2hyphen'].maxsize == 1024
+
+    def test_enabled_hits(self):
+        """Test filter calls in templates hit the cache."""
+        app = Flask('__memoize_test')
+        app.config['FLASK_EXTRAS_MEMOIZE_FILTERS'] = True
+        config.config_flask_filters(app)
+        tmpl = app.jinja_env.from_string(
+            '{% for _ in range(10) %}{{ val|camel2hyphen }}{% endfor %}')
+        assert tmpl.render(val='fooBar') == 'foo-bar' * 10
+        stats = config.filter_cache_info(app)['camel2hyphen']
+        assert stats.hits == 9
+        assert stats.misses == 1
+
+
+class TestLazyFilters:
+    """All tests for lazy filter registration."""
+
+    def test_manifest_matches_modules(self):
+        """Test the static manifest lists every public function."""
+        for module, names in config.FILTERS_MANIFEST.items():
+            mod = import_module('flask_extras.filters.{}'.format(module))
+            assert sorted(names) == sorted(config._get_funcs(mod).keys())
+
+    def test_registered_as_proxies(self):
+        """Test function."""
+        app = Flask('__lazy_test')
+        config.config_flask_filters(app)
+        func = app.jinja_env.filters['str2dt']
+        assert isinstance(func, config.LazyFilter)
+        assert func.__name__ == 'str2dt'
+
+    def test_proxy_resolves(self):
+        """Test function."""
+        proxy = config.LazyFilter('filters', 'camel2hyphen')
+        assert proxy('fooBar') == 'foo-bar'
+        assert proxy.resolve() is import_module(
+            'flask_extras.filters.filters').camel2hyphen
+
+    def test_proxy_in_template(self):
+        """Test function."""
+        app = Flask('__lazy_test')
+        config.config_flask_filters(app)
+        tmpl = app.jinja_env.from_string('{{ val|slugify }}')
+        assert tmpl.render(val='Foo Bar') == 'foo-bar'
+
+
+class TestImportTime:
+    """Import time benchmark for the package and app setup."""
+
+    def _run(self):
+        """Import and setup in a fresh interpreter."""
+        out = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT])
+        elapsed, modules = out.decode('utf-8').strip().split('\n')
+        return float(elapsed), modules.split(',')
+
+    def test_heavy_dependencies_not_imported(self):
+        """Test function."""
+        elapsed, modules = self._run()
+        for name in ['dateutil', 'netaddr', 'numpy',
+                     'flask_extras.filters.datetimes']:
+            assert name not in modules
+
+    def test_within_budget(self):
+        """Test function."""
+        elapsed, modules = self._run()
+        assert elapsed < IMPORT_BUDGET
+
+
+class TestSelectiveRegistration:
+    """All tests for selective filter and global registration."""
+
+    def test_shared_registry(self):
+        """Test the same proxies are shared across apps."""
+        app1, app2 = Flask('__select_test1'), Flask('__select_test2')
+        config.config_flask_filters(app1)
+        config.config_flask_filters(app2)
+        assert app1.jinja_env.filters['slugify'] is \
+            app2.jinja_env.filters['slugify']
+
+    def test_filters(self):
+        """Test function."""
+        app = Flask('__select_test')
+        config.config_flask_filters(app, filters=['slugify', 'str2dt'])
+        assert 'slugify' in app.jinja_env.filters
+        assert 'str2dt' in app.jinja_env.filters
+        assert 'greet' not in app.jinja_env.filters
+
+    def test_macro_filters_always_registered(self):
+        """Test function."""
+        app = FlaskExtras(Flask('__select_test'), filters=['slugify'])
+        for name in config.MACRO_FILTERS:
+            assert name in app.jinja_env.filters
+        with app.app_context():
+            res = render_template_string(
+                "{% from 'macros.html' import objects2table, dict2list %}"
+                "{{ objects2table([{'id': 1, 'name': 'foo', 'pw': 'x'}], "
+                "filterkeys=['pw'], order=['name', 'id']) }}"
+                "{{ dict2list({'a': 'b'}, filterkeys=['c']) }}")
+        assert 'foo' in res
+        assert 'pw' not in res
+
+    def test_macro_filters_complete(self):
+        """Test all package filters used by the macros are listed."""
+        import flask_extras.macros
+        folder = os.path.dirname(flask_extras.macros.__file__)
+        ours = set(name for names in config.FILTERS_MANIFEST.values()
+                   for name in names)
+        used = set()
+        for filename in os.listdir(folder):
+            if filename.endswith('.html'):
+                with open(os.path.join(folder, filename)) as source:
+                    used.update(re.findall(r'\|\s*(\w+)', source.read()))
+        assert used & ours == set(config.MACRO_FILTERS)
+
+    def test_modules(self):
+        """Test function."""
+        app = Flask('__select_test')
+        config.config_flask_filters(app, modules=['munging'])
+        assert 'group_by' in app.jinja_env.filters
+        assert 'slugify' not in app.jinja_env.filters
+
+    def test_filters_and_modules(self):
+        """Test function."""
+        app = Flask('__select_test')
+        config.config_flask_filters(
+            app, filters=['slugify'], modules=['munging'])
+        assert 'group_by' in app.jinja_env.filters
+        assert 'slugify' in app.jinja_env.filters
+
+    def test_unknown(self):
+        """Test function."""
+        app = Flask('__select_test')
+        with pytest.raises(ValueError):
+            config.config_flask_filters(app, filters=['not-a-filter'])
+        with pytest.raises(ValueError):
+            config.config_flask_filters(app, modules=['not-a-module'])
+
+    def test_flask_extras(self):
+        """Test function."""
+        app = FlaskExtras(
+            Flask('__select_test'), filters=['slugify'],
+            globals=['render_objects2table', 'greet'])
+        assert 'slugify' in app.jinja_env.filters
+        assert 'greet' not in app.jinja_env.filters
+        assert 'render_objects2table' in app.jinja_env.globals
+        assert 'stream_objects2table' not in app.jinja_env.globals
+        assert 'greet' in app.jinja_env.globals
@@ -1,5 +1,7 @@
 """Test munging filters."""
 
+from datetime import datetime
+
 from dateutil.parser import parse as dtparse
 
 from flask_extras.filters import datetimes
@@ -25,3 +27,153 @@ class TestStr2Dt:
     def test_title_returns_invalid_nonetype_str2(self):
         """Test function."""
         assert datetimes.str2dt('null') is None
+
+    def test_unparseable_returns_input(self):
+        """Test function."""
+        assert datetimes.str2dt('not a date') == 'not a date'
+
+    def test_non_string_returns_input(self):
+        """Test function."""
+        assert datetimes.str2dt(123.4) == 123.4
+
+
+class TestStr2DtIso:
+    """All tests for the str2dt ISO-8601 fast path."""
+
+    timestrs = [
+        '2016-01-05',
+        '2016-01-05 10:20',
+        '2016-01-05T10:20:30',
+        '2016-01-05 10:20:30.5',
+        '2016-01-05 10:20:30.123456',
+        '2016-01-05T10:20:30Z',
+        '2016-01-05T10:20:30+05:30',
+        '2016-01-05T10:20:30-0130',
+        '2016-01-05T10:20:30+00:00',
+    ]
+
+    def test_matches_dateutil(self):
+        """Test function."""
+        for timestr in self.timestrs:
+            res = datetimes._parse_iso(timestr)
+            assert res is not None
+            assert res == dtparse(timestr)
+            assert res.utcoffset() == dtparse(timestr).utcoffset()
+            assert datetimes.str2dt(timestr, cache=False) == res
+
+    def test_rejects_non_iso(self):
+        """Test function."""
+        for timestr in ['01-05-1900', '2016-13-01', '2016/01/05', 'null',
+                        '2016-01-05T10', None, 1]:
+            assert datetimes._parse_iso(timestr) is None
+
+    def test_invalid_iso_falls_back(self):
+        """Test function."""
+        assert datetimes.str2dt('2016-13-45', cache=False) == '2016-13-45'
+
+    def test_format_hints(self):
+        """Test function."""
+        res = datetimes.str2dt('05/01/2016', formats=['%d/%m/%Y'])
+        assert res == datetime(2016, 1, 5)
+        # Without hints dateutil assumes month first.
+        assert datetimes.str2dt('05/01/2016') == datetime(2016, 5, 1)
+
+    def test_format_hints_no_match(self):
+        """Test function."""
+        res = datetimes.str2dt('Jan 5 2016', formats=['%d/%m/%Y'])
+        assert res == datetime(2016, 1, 5)
+
+    def test_cached(self):
+        """Test function."""
+        datetimes._PARSE_CACHE.clear()
+        first = datetimes.str2dt('2016-01-05 10:20:30')
+        assert datetimes.str2dt('2016-01-05 10:20:30') is first
+        assert datetimes._PARSE_CACHE.info().hits == 1
+
+    def test_cached_none(self):
+        """Test function."""
+        assert datetimes.str2dt('None') is None
+        assert datetimes.str2dt('None') is None
+
+    def test_partial_dates_not_cached(self):
+        """Test function."""
+        datetimes._PARSE_CACHE.clear()
+        assert datetimes.str2dt('10:30').hour == 10
+        assert datetimes.str2dt('March 5').month == 3
+        assert datetimes.str2dt('05/01/2016') == datetime(2016, 5, 1)
+        assert len(datetimes._PARSE_CACHE) == 0
+        datetimes.str2dt('10:30', formats=['%H:%M'])
+        assert len(datetimes._PARSE_CACHE) == 1
+
+    def test_trailing_newline(self):
+        """Test function."""
+        assert datetimes._parse_iso('2016-01-05\n') is None
+        assert datetimes.str2dt('2016-01-05\n') == datetime(2016, 1, 5)
+
+    def test_unparseable_not_cached(self):
+        """Test function."""
+        from markupsafe import Markup
+        datetimes._PARSE_CACHE.clear()
+        markup = Markup('<b>not a date</b>')
+        assert datetimes.str2dt(markup) is markup
+        res = datetimes.str2dt('<b>not a date</b>')
+        assert not isinstance(res, Markup)
+        assert len(datetimes._PARSE_CACHE) == 0
+
+
+class TestColumns:
+    """All tests for the batch column functions."""
+
+    timestrs = ['2016-01-05 10:20:30', '2016-02-05T11:20:30.5', '2016-03-05']
+
+    def test_str2dt_column(self):
+        """Test function."""
+        res = datetimes.str2dt_column(self.timestrs)
+        assert res == [dtparse(t) for t in self.timestrs]
+
+    def test_str2dt_column_no_numpy(self, monkeypatch):
+        """Test function."""
+        monkeypatch.setattr(datetimes, 'numpy', None)
+        res = datetimes.str2dt_column(self.timestrs)
+        assert res == [dtparse(t) for t in self.timestrs]
+
+    def test_str2dt_column_mixed(self):
+        """Test function."""
+        res = datetimes.str2dt_column(
+            ['2016-01-05', 'None', None, 'foo', '2016-01-05T10:20:30Z'])
+        assert res == [dtparse('2016-01-05'), None, None, 'foo',
+                       dtparse('2016-01-05T10:20:30Z')]
+        assert res[-1].utcoffset() is not None
+
+    def test_strftime_column(self):
+        """Test function."""
+        for fmt in ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H']:
+            res = datetimes.strftime_column(self.timestrs, fmt=fmt)
+            assert res == [dtparse(t).strftime(fmt) for t in self.timestrs]
+
+    def test_strftime_column_no_numpy(self, monkeypatch):
+        """Test function."""
+        monkeypatch.setattr(datetimes, 'numpy', None)
+        res = datetimes.strftime_column(self.timestrs, fmt='%Y-%m-%d')
+        assert res == ['2016-01-05', '2016-02-05', '2016-03-05']
+
+    def test_strftime_column_passthrough(self):
+        """Test function."""
+        res = datetimes.strftime_column(
+            ['2016-01-05', 'null', 'foo', datetime(2016, 1, 1)],
+            fmt='%Y-%m-%d')
+        assert res == ['2016-01-05', None, 'foo', '2016-01-01']
+
+    def test_strftime_column_partial_dates(self):
+        """Test partial dates are parsed by dateutil, not numpy."""
+        res = datetimes.strftime_column(['2016-01', '2016'], fmt='%Y-%m')
+        assert res == [dtparse('2016-01').strftime('%Y-%m'),
+                       dtparse('2016').strftime('%Y-%m')]
+
+    def test_simple_columns(self):
+        """Test function."""
+        assert datetimes.simpledate_column(self.timestrs) == [
+            '2016-01-05', '2016-02-05', '2016-03-05']
+        assert datetimes.simpledatetime_column(self.timestrs) == [
+            '2016-01-05 10:20:30', '2016-02-05 11:20:30',
+            '2016-03-05 00:00:00']
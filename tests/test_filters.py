@@ -383,3 +383,11 @@ class TestSql2dict:
         mm = MockClass()
         mm.__dict__ = {'foo': 'bar'}
         assert filters.sql2dict([mm]) == [{'foo': 'bar'}]
+
+    def test_lazy(self):
+        """Test return value."""
+        mm = MockClass()
+        mm.__dict__ = {'foo': 'bar'}
+        res = filters.sql2dict(iter([mm]), lazy=True)
+        assert not isinstance(res, list)
+        assert list(res) == [{'foo': 'bar'}]
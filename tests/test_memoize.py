@@ -0,0 +1,136 @@
+"""Test filter memoization."""
+
+from threading import Thread
+
+from flask_extras.filters import memoize
+
+
+class TestLRUCache:
+    """All tests for LRUCache class."""
+
+    def test_get_set(self):
+        """Test function."""
+        cache = memoize.LRUCache(maxsize=2)
+        assert cache.get('foo') is None
+        cache.set('foo', 'bar')
+        assert cache.get('foo') == 'bar'
+        assert cache.info() == memoize.CacheInfo(1, 1, 2, 1)
+
+    def test_evicts_least_recently_used(self):
+        """Test function."""
+        cache = memoize.LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+    def test_clear(self):
+        """Test function."""
+        cache = memoize.LRUCache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.clear()
+        assert cache.info() == memoize.CacheInfo(0, 0, 1024, 0)
+
+    def test_delete(self):
+        """Test function."""
+        cache = memoize.LRUCache()
+        cache.set('a', 1, ttl=10)
+        cache.delete('a')
+        cache.delete('b')
+        assert cache.get('a') is None
+
+    def test_ttl(self, monkeypatch):
+        """Test function."""
+        now = [1000.0]
+        monkeypatch.setattr(memoize, 'time', lambda: now[0])
+        cache = memoize.LRUCache(ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=60)
+        cache.set('c', 3, ttl=0)
+        now[0] += 30
+        assert cache.get('a') is None
+        assert cache.get('b') == 2
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+
+class TestMemoize:
+    """All tests for memoize function."""
+
+    def test_caches_calls(self):
+        """Test function."""
+        calls = []
+
+        def func(val, upper=False):
+            calls.append(val)
+            return val.upper() if upper else val
+
+        memoized = memoize.memoize(func, maxsize=10)
+        assert memoized('foo') == 'foo'
+        assert memoized('foo') == 'foo'
+        assert memoized('foo', upper=True) == 'FOO'
+        assert calls == ['foo', 'foo']
+        info = memoized.cache_info()
+        assert info.hits == 1
+        assert info.misses == 2
+        assert info.currsize == 2
+
+    def test_unhashable_passthrough(self):
+        """Test function."""
+        memoized = memoize.memoize(lambda val: len(val))
+        assert memoized(['a', 'b']) == 2
+        assert memoized.cache_info().currsize == 0
+
+    def test_bounded(self):
+        """Test function."""
+        memoized = memoize.memoize(lambda val: val, maxsize=5)
+        for i in range(20):
+            memoized(i)
+        assert memoized.cache_info().currsize == 5
+
+    def test_threaded(self):
+        """Test function."""
+        memoized = memoize.memoize(lambda val: val * 2, maxsize=50)
+
+        def run():
+            for i in range(1000):
+                assert memoized(i % 100) == (i % 100) * 2
+
+        threads = [Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = memoized.cache_info()
+        assert info.hits + info.misses == 8000
+        assert info.currsize == 50
+
+    def test_typed_keys(self):
+        """Test function."""
+        from markupsafe import Markup
+        memoized = memoize.memoize(lambda val: val, maxsize=10)
+        assert isinstance(memoized(Markup('<b>hi</b>')), Markup)
+        assert not isinstance(memoized('<b>hi</b>'), Markup)
+        assert memoized(1) is 1
+        assert memoized(True) is True
+        assert memoized.cache_info().currsize == 4
+
+    def test_typed_keys_in_templates(self):
+        """Test function."""
+        from flask import Flask, render_template_string
+        from markupsafe import Markup
+        from flask_extras import FlaskExtras
+        app = Flask('test_memoize')
+        app.config['FLASK_EXTRAS_MEMOIZE_FILTERS'] = True
+        FlaskExtras(app)
+        with app.app_context():
+            res = render_template_string(
+                '{% autoescape true %}{{ a|questionize_label }}|'
+                '{{ b|questionize_label }}{% endautoescape %}',
+                a=Markup('<b>hi</b>'), b='<b>hi</b>')
+        assert res == '<b>hi</b>|&lt;b&gt;hi&lt;/b&gt;'
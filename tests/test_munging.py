@@ -1,9 +1,20 @@
 """Test munging filters."""
 
+from array import array
+from collections import OrderedDict
+from operator import attrgetter, itemgetter
+from random import Random
+
+from flask import Flask, render_template_string
+
+from flask_extras import FlaskExtras
 from flask_extras.filters import munging
 
 import pytest
 
+app = Flask('test_munging')
+FlaskExtras(app)
+
 
 class TestFilterVals:
     """All tests for filter_vals function."""
@@ -105,6 +116,110 @@ class TestFilterList:
         assert munging.filter_list(['foo', 'bar'], ['baz']) == ['foo', 'bar']
 
 
+class TestFilterSpec:
+    """All tests for compile_filter function and FilterSpec class."""
+
+    def test_values(self):
+        """Test function."""
+        spec = munging.compile_filter(['foo', 1, None])
+        assert munging.compile_filter(spec) is spec
+        assert 'foo' in spec
+        assert 1 in spec
+        assert None in spec
+        assert 'bar' not in spec
+        assert list(spec) == ['foo', 1, None]
+
+    def test_sets(self):
+        """Test function."""
+        spec = munging.compile_filter(frozenset(['foo', 'bar']))
+        assert 'bar' in spec
+        assert 'baz' not in spec
+
+    def test_unhashable(self):
+        """Test function."""
+        spec = munging.compile_filter([{'a': 1}, 'foo', [1]])
+        assert {'a': 1} in spec
+        assert [1] in spec
+        assert 'foo' in spec
+        assert [2] not in spec
+        assert {'a': 2} not in spec
+
+    def test_predicates(self):
+        """Test function."""
+        spec = munging.compile_filter(lambda key: key.startswith('_'))
+        assert '_id' in spec
+        assert 'id' not in spec
+        assert list(spec) == []
+        assert spec
+        spec = munging.FilterSpec(['id'], predicates=[callable])
+        assert 'id' in spec
+        assert len in spec
+        assert 'name' not in spec
+
+    def test_empty(self):
+        """Test function."""
+        assert not munging.compile_filter([])
+        assert not munging.compile_filter(None)
+        assert 'foo' not in munging.compile_filter(None)
+
+    def test_text(self):
+        """Test function."""
+        assert munging.compile_filter('name') == 'name'
+
+    def test_filter_functions(self):
+        """Test function."""
+        data = dict(foo=1, bar=2, _baz=3)
+        spec = munging.FilterSpec(['foo'], predicates=[
+            lambda key: key.startswith('_')])
+        assert munging.filter_keys(data, spec) == dict(bar=2)
+        assert munging.filter_vals(data, munging.compile_filter([1, 3])) == \
+            dict(bar=2)
+        assert sorted(munging.filter_list(
+            ['foo', 'bar', '_baz'], spec)) == ['bar']
+
+    @pytest.mark.parametrize('source', [
+        "{% from 'macros.html' import dictlist_dl %}"
+        "{{ dictlist_dl(obj, filterkeys=keys, filtervals=vals) }}",
+        "{% from 'macros.html' import dict2list %}"
+        "{{ dict2list(obj, filterkeys=keys, filtervals=vals) }}",
+        "{% from 'macros.html' import dict2linklist %}"
+        "{{ dict2linklist(obj, filterkeys=keys, filtervals=vals) }}",
+        "{% from 'macros.html' import list2list %}"
+        "{{ list2list(obj.keys()|list, filtervals=keys) }}",
+        "{% from 'macros.html' import dictlist2nav %}"
+        "{{ dictlist2nav([obj], filterkeys=keys, filtervals=vals) }}",
+        "{% from 'macros.html' import dictlist2dropdown %}"
+        "{{ dictlist2dropdown([obj], filterkeys=keys, filtervals=vals) }}",
+        "{% from 'macros.html' import list2dropdown %}"
+        "{{ list2dropdown(obj.keys()|list, filtervals=keys) }}",
+        "{% from 'macros.html' import dictlist2checkboxes %}"
+        "{{ dictlist2checkboxes([obj], filterkeys=keys, filtervals=vals) }}",
+        "{% from 'macros.html' import objects2table %}"
+        "{{ objects2table([obj], filterkeys=keys, filtervals=vals) }}",
+        "{% from 'bootstrap.html' import bs3_dictlist_group %}"
+        "{{ bs3_dictlist_group(obj, filterkeys=keys, filtervals=vals) }}",
+        "{% from 'bootstrap.html' import dict2labels %}"
+        "{{ dict2labels(obj, filterkeys=keys, filtervals=vals) }}",
+    ])
+    def test_macros(self, source):
+        """Test function."""
+        obj = OrderedDict([('id', 1), ('name', 'foo'), ('secret', 'shh'),
+                           ('_rev', 2), ('email', 'foo@bar.com')])
+        keys = ['secret', '_rev']
+        vals = ['foo@bar.com']
+        spec = munging.FilterSpec(['secret'], predicates=[
+            lambda key: key.startswith('_')])
+        with app.app_context():
+            res = render_template_string(
+                source, obj=obj, keys=keys, vals=vals)
+            compiled = render_template_string(
+                source, obj=obj, keys=spec, vals=munging.compile_filter(vals))
+        assert res == compiled
+        assert 'secret' not in res
+        assert '_rev' not in res
+        assert 'foo@bar.com' not in res
+
+
 class TestGroupBy:
     """All tests for group_by function."""
 
@@ -205,6 +320,100 @@ class TestGroupBy:
                 assert item == obj_label
 
 
+def _group_by_linear(objs, groups, attr='name', fallback='__unlabeled'):
+    """The previous group_by, for comparison."""
+    grouped = OrderedDict()
+    for label, _ in groups:
+        grouped[label] = []
+    seen = []
+    for label, matches in groups:
+        for curr in objs:
+            attr_label = getattr(curr, attr) if hasattr(curr, attr) else ''
+            if attr_label in seen:
+                continue
+            if attr_label in matches:
+                grouped[label].insert(matches.index(attr_label), curr)
+                seen.append(attr_label)
+    grouped[fallback] = [
+        curr for curr in objs if getattr(curr, attr) not in seen]
+    return grouped
+
+
+class TestGroupByIndexed:
+    """All tests for the single pass group_by."""
+
+    def _random(self, seed):
+        """Random objects and groups, with duplicates and missing names."""
+        rand = Random(seed)
+        names = ['name{0}'.format(i) for i in range(30)]
+        objs = [Row(name=rand.choice(names)) for _ in range(40)]
+        groups = [
+            ('group{0}'.format(i), tuple(rand.sample(names, 6)))
+            for i in range(rand.randint(1, 6))]
+        return objs, groups
+
+    @pytest.mark.parametrize('seed', range(50))
+    def test_matches_linear(self, seed):
+        """Test function."""
+        objs, groups = self._random(seed)
+        expected = _group_by_linear(objs, groups)
+        res = munging.group_by(objs, groups=groups)
+        assert list(res.items()) == list(expected.items())
+
+    def test_compiled(self):
+        """Test function."""
+        objs, groups = self._random(1)
+        spec = munging.compile_groups(groups)
+        assert munging.compile_groups(spec) is spec
+        assert len(spec) == len(groups)
+        assert list(spec) == groups
+        for seed in range(5):
+            objs = self._random(seed)[0]
+            assert munging.group_by(objs, groups=spec) == \
+                munging.group_by(objs, groups=groups)
+
+    def test_duplicate_labels(self):
+        """Test function."""
+        objs = [Row(name=name) for name in ['b', 'a', 'c', 'd']]
+        groups = [('g', ('a', 'b')), ('g', ('d', 'c')), ('h', ('a',))]
+        expected = _group_by_linear(objs, groups)
+        res = munging.group_by(objs, groups=groups)
+        assert list(res.items()) == list(expected.items())
+
+    def test_linear_matches(self):
+        """Test function."""
+        objs = [Row(name=name) for name in ['b', 'a', 'x', 'ab', 'y']]
+        groups = [('g1', 'ab'), ('g2', (['y'], 'x', 'y'))]
+        expected = _group_by_linear(objs, groups)
+        res = munging.group_by(objs, groups=groups)
+        assert list(res.items()) == list(expected.items())
+
+    def test_dicts(self):
+        """Test function."""
+        objs = [dict(name=name) for name in ['c', 'a', 'b', 'z']] + [{}]
+        res = munging.group_by(objs, groups=[('g', ('a', 'b', 'c'))])
+        assert res['g'] == [dict(name='a'), dict(name='b'), dict(name='c')]
+        assert res['__unlabeled'] == [dict(name='z'), {}]
+
+    def test_getters(self):
+        """Test function."""
+        groups = [('g', ('a', 'b'))]
+        objs = [dict(name=name) for name in ['b', 'x', 'a']] + [{}]
+        res = munging.group_by(objs, groups=groups, attr=itemgetter('name'))
+        assert res['g'] == [dict(name='a'), dict(name='b')]
+        assert res['__unlabeled'] == [dict(name='x'), {}]
+        objs = [Row(name=name) for name in ['b', 'x', 'a']] + [Row()]
+        res = munging.group_by(objs, groups=groups, attr=attrgetter('name'))
+        assert [obj.name for obj in res['g']] == ['a', 'b']
+        assert len(res['__unlabeled']) == 2
+
+    def test_generator(self):
+        """Test function."""
+        objs, groups = self._random(3)
+        res = munging.group_by(iter(objs), groups=groups)
+        assert res == munging.group_by(objs, groups=groups)
+
+
 class TestSortDictKeysFromReflist:
     """All tests for sort_dict_keys_from_reflist function."""
 
@@ -271,3 +480,484 @@ class TestSortDictValsFromReflist:
         ref = [4, 3, 1]
         expected = [('quux', 4), ('baz', 3), ('foo', 1)]
         assert munging.sort_dict_vals_from_reflist(data, ref) == expected
+
+
+class TestCompileReflist:
+    """All tests for compile_reflist function."""
+
+    def test_keys(self):
+        """Test function."""
+        data = dict(foo=1, bar=2, baz=3, quux=4)
+        ref = munging.compile_reflist(['quux', 'baz', 'foo'])
+        expected = [('quux', 4), ('baz', 3), ('foo', 1)]
+        assert munging.sort_dict_keys_from_reflist(data, ref) == expected
+        assert munging.sort_dict_keys_from_reflist(
+            dict(baz=1, nope=2), ref) == [('baz', 1)]
+
+    def test_vals(self):
+        """Test function."""
+        data = dict(foo=1, bar=2, baz=3, quux=4)
+        ref = munging.compile_reflist([4, 3, 1, 2])
+        expected = [('quux', 4), ('baz', 3), ('foo', 1), ('bar', 2)]
+        assert munging.sort_dict_vals_from_reflist(data, ref) == expected
+
+    def test_vals_unhashable(self):
+        """Test function."""
+        data = dict(foo=[1], bar=2, baz={'a': 1}, quux=4)
+        ref = munging.compile_reflist([{'a': 1}, 4, [1]])
+        assert ref.ranks is None
+        expected = [('baz', {'a': 1}), ('quux', 4), ('foo', [1])]
+        assert munging.sort_dict_vals_from_reflist(data, ref) == expected
+
+    def test_unhashable_vals_hashable_ref(self):
+        """Test function."""
+        data = dict(foo=[1], bar=2, baz=3)
+        ref = munging.compile_reflist([3, 2])
+        expected = [('baz', 3), ('bar', 2)]
+        assert munging.sort_dict_vals_from_reflist(data, ref) == expected
+
+    def test_duplicates(self):
+        """Test function."""
+        data = dict(foo=1, bar=2, baz=1)
+        ref = [2, 1, 2]
+        assert munging.sort_dict_vals_from_reflist(
+            data, munging.compile_reflist(ref)) == \
+            munging.sort_dict_vals_from_reflist(data, ref)
+
+    def test_repeated_keys(self):
+        """Test function."""
+        items = [('b', 1), ('a', 2), ('b', 3), ('c', 4)]
+        ref = munging.compile_reflist(['a', 'b'])
+        expected = [('a', 2), ('b', 1), ('b', 3)]
+        assert munging.sort_dict_keys_from_reflist(items, ref) == expected
+        assert munging.sort_dict_keys_from_reflist(
+            iter(items), ref) == expected
+
+    def test_unhashable_keys(self):
+        """Test function."""
+        items = [(['x'], 0), ('b', 1), ('a', 2)]
+        ref = munging.compile_reflist(['a', 'b'])
+        expected = [('a', 2), ('b', 1)]
+        assert munging.sort_dict_keys_from_reflist(items, ref) == expected
+        ref = munging.compile_reflist([['x'], 'a'])
+        assert munging.sort_dict_keys_from_reflist(
+            items, ref) == [(['x'], 0), ('a', 2)]
+
+    def test_sequence(self):
+        """Test function."""
+        ref = munging.compile_reflist(['a', 'b'])
+        assert munging.compile_reflist(ref) is ref
+        assert list(ref) == ['a', 'b']
+        assert len(ref) == 2
+        assert 'b' in ref
+        assert 'c' not in ref
+        assert not munging.compile_reflist([])
+
+    def test_matches_linear(self):
+        """Test function."""
+        keys = ['col{0}'.format(i) for i in range(30)]
+        ref = list(reversed(keys[::2]))
+        compiled = munging.compile_reflist(ref)
+        for row in range(10):
+            data = dict((key, row) for key in keys)
+            items = [item for item in data.items() if item[0] in ref]
+            expected = sorted(items, key=lambda x: ref.index(x[0]))
+            assert munging.sort_dict_keys_from_reflist(
+                data, compiled) == expected
+
+
+class TestPipeline:
+    """All tests for munge function and Pipeline class."""
+
+    def _rows(self, consumed=None):
+        """Data for tests, as a generator counting consumed rows."""
+        for i in range(5):
+            if consumed is not None:
+                consumed.append(i)
+            yield OrderedDict([('id', i), ('name', 'name{0}'.format(i)),
+                               ('password', 'shh'),
+                               ('email', None if i % 2 else 'a@b.c')])
+
+    def test_lazy(self):
+        """Test function."""
+        consumed = []
+        rows = munging.munge(self._rows(consumed)).filter_keys(['password'])
+        assert consumed == []
+        rows = iter(rows)
+        assert next(rows) == OrderedDict(
+            [('id', 0), ('name', 'name0'), ('email', 'a@b.c')])
+        assert consumed == [0]
+
+    def test_chain(self):
+        """Test function."""
+        rows = list(munging.munge(self._rows())
+                    .filter_keys(['password'])
+                    .filter_vals([None])
+                    .sort_dict_keys_from_reflist(['email', 'id']))
+        assert rows == [
+            OrderedDict([('email', 'a@b.c'), ('id', 0)]),
+            OrderedDict([('id', 1)]),
+            OrderedDict([('email', 'a@b.c'), ('id', 2)]),
+            OrderedDict([('id', 3)]),
+            OrderedDict([('email', 'a@b.c'), ('id', 4)]),
+        ]
+
+    def test_matches_filters(self):
+        """Test function."""
+        rows = list(self._rows())
+        expected = [
+            munging.sort_dict_vals_from_reflist(
+                munging.filter_keys(row, ['id']), ['shh', 'name2'])
+            for row in rows]
+        res = munging.munge(rows).filter_keys(['id']) \
+            .sort_dict_vals_from_reflist(['shh', 'name2'])
+        assert [list(row.items()) for row in res] == expected
+        # Pipelines over lists can be iterated again.
+        assert [list(row.items()) for row in res] == expected
+
+    def test_filter_list(self):
+        """Test function."""
+        res = munging.munge(iter(['c', 'a', 'b', 'a', 'd']))
+        assert list(res.filter_list(['b', 'd'])) == ['c', 'a', 'a']
+
+    def test_filter_list_objects(self):
+        """Test function."""
+        rows = [Row(id=1), Row(id=2)]
+        res = munging.munge(rows).filter_list([rows[1]])
+        assert list(res) == [rows[0]]
+
+    def test_not_a_list(self):
+        """Test function."""
+        rows = list(self._rows())
+        pipeline = munging.munge(rows)
+        # As the filter functions, which ignore text specs.
+        assert pipeline.filter_keys('name') is pipeline
+        assert pipeline.filter_vals('shh') is pipeline
+        assert pipeline.filter_list('shh') is pipeline
+        assert munging.filter_keys(pipeline, 'name') is pipeline
+        assert munging.filter_vals(pipeline, 'shh') is pipeline
+        assert munging.filter_keys(rows[0], 'name') is rows[0]
+
+    def test_objects(self):
+        """Test function."""
+        rows = [Row(id=1, name='foo', _sa_instance_state=None)]
+        res = munging.munge(iter(rows)).filter_keys(['_sa_instance_state'])
+        assert list(res) == [dict(id=1, name='foo')]
+        # Generators can only be iterated once.
+        assert list(res) == []
+
+    def test_group_by(self):
+        """Test function."""
+        rows = (Row(name=name) for name in ['b', 'x', 'a'])
+        res = munging.munge(rows).group_by(groups=[('g', ('a', 'b'))])
+        assert [row.name for row in res['g']] == ['a', 'b']
+        assert [row.name for row in res['__unlabeled']] == ['x']
+
+    def test_munge(self):
+        """Test function."""
+        pipeline = munging.munge([])
+        assert munging.munge(pipeline) is pipeline
+        assert list(munging.munge(None)) == []
+
+    def test_template(self):
+        """Test function."""
+        source = (
+            "{% for row in rows|munge|filter_keys(['password'])"
+            "|filter_vals([None])|sort_dict_keys_from_reflist(order) %}"
+            "{% for k, v in row.items() %}{{ k }}={{ v }};{% endfor %}|"
+            "{% endfor %}")
+        with app.app_context():
+            res = render_template_string(
+                source, rows=self._rows(), order=['email', 'name'])
+        assert res == ('email=a@b.c;name=name0;|name=name1;|'
+                       'email=a@b.c;name=name2;|name=name3;|'
+                       'email=a@b.c;name=name4;|')
+
+    def test_render_objects2table(self):
+        """Test function."""
+        with app.app_context():
+            res = render_template_string(
+                "{{ render_objects2table(rows|munge"
+                "|filter_keys(['password'])) }}", rows=self._rows())
+        assert res.count('<tr>') == 5
+        assert 'shh' not in res
+
+
+class Row(object):
+    """Object rows for sort index tests."""
+
+    def __init__(self, **kwargs):
+        """Set attributes."""
+        self.__dict__.update(kwargs)
+
+
+def _sort_rows():
+    """Data for sort index tests."""
+    return [dict(id=i, name='name{0}'.format(i % 4),
+                 score=None if i % 5 == 0 else i % 3)
+            for i in range(40)]
+
+
+def _sorted(rows, order):
+    """Sort rows with stable sorts, None last in either direction."""
+    rows = list(rows)
+    for key, desc in reversed(order):
+        rows.sort(key=lambda row: (row.get(key) is None, row.get(key)))
+        nones = [row for row in rows if row.get(key) is None]
+        rows = rows[:len(rows) - len(nones)]
+        if desc:
+            # A stable descending sort of the other values.
+            rows.sort(key=lambda row: row.get(key), reverse=True)
+        rows += nones
+    return rows
+
+
+class TestSortIndex:
+    """All tests for SortIndex class."""
+
+    def test_not_a_filter(self):
+        """Test function."""
+        from flask_extras.filters import config
+        assert 'SortIndex' not in config._get_funcs(munging)
+
+    def test_page_original_order(self):
+        """Test function."""
+        rows = _sort_rows()
+        index = munging.SortIndex(rows)
+        assert index.page(None, 5, 8) == rows[5:8]
+        assert len(index) == 40
+
+    @pytest.mark.parametrize('order', [
+        [('name', False)],
+        [('name', True)],
+        [('score', False)],
+        [('score', True)],
+        [('name', False), ('id', True)],
+        [('score', True), ('name', False)],
+    ])
+    def test_same_as_sorted(self, order):
+        """Test function."""
+        rows = _sort_rows()
+        index = munging.SortIndex(rows)
+        assert index.page(order, 0, 40) == _sorted(rows, order)
+        assert index.page(order, 10, 15) == _sorted(rows, order)[10:15]
+
+    @pytest.mark.parametrize('order', [
+        [('name', False)],
+        [('score', True)],
+        [('score', True), ('name', False)],
+    ])
+    def test_opposite_order_reversed(self, order):
+        """Test function."""
+        rows = _sort_rows()
+        index = munging.SortIndex(rows)
+        index.order(order)
+        opposite = [(key, not desc) for key, desc in order]
+        assert index.page(opposite, 0, 40) == _sorted(rows, opposite)
+
+    def test_orders_kept(self, monkeypatch):
+        """Test function."""
+        index = munging.SortIndex(_sort_rows(), maxorders=2)
+        first = index.order([('name', False)])
+        assert index.order([('name', False)]) is first
+        index.order([('id', False)])
+        index.order([('score', False)])
+        assert index.order([('name', False)]) is not first
+
+    def test_update(self):
+        """Test function."""
+        index = munging.SortIndex(_sort_rows(), version=1)
+        first = index.order([('name', False)])
+        assert not index.update(lambda: 1 / 0, version=1)
+        assert index.order([('name', False)]) is first
+        assert index.update(lambda: [dict(name='b'), dict(name='a')], 2)
+        assert index.page([('name', False)], 0, 2) == [
+            dict(name='a'), dict(name='b')]
+
+    def test_snapshot(self):
+        """Test function."""
+        rows = _sort_rows()
+        index = munging.SortIndex(rows)
+        res, indexes = index.snapshot([('name', False)])
+        assert res is rows
+        assert [rows[i] for i in indexes] == _sorted(rows, [('name', False)])
+        assert list(index.snapshot(None)[1]) == list(range(40))
+
+    def test_threaded(self):
+        """Test function."""
+        from threading import Thread
+        index = munging.SortIndex(_sort_rows(), version=0)
+        errors = []
+
+        def run(thread):
+            try:
+                for i in range(200):
+                    if thread % 2:
+                        index.update(
+                            lambda: _sort_rows()[:20 + i % 20], i % 3)
+                    for order in ([('name', False)], [('name', True)],
+                                  [('score', True), ('name', False)]):
+                        page = index.page(order, 0, 10)
+                        assert page == _sorted(page, order)
+                        rows, indexes = index.snapshot(order)
+                        assert len(indexes) == len(rows)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [Thread(target=run, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+    def test_objects(self):
+        """Test function."""
+        rows = [Row(id=1, name='b'), Row(id=2, name='a'), Row(id=3)]
+        index = munging.SortIndex(rows)
+        assert [row.id for row in index.page([('name', False)], 0, 3)] == \
+            [2, 1, 3]
+
+    def test_mixed_types(self):
+        """Test function."""
+        rows = [dict(val=3), dict(val='a'), dict(val=1)]
+        index = munging.SortIndex(rows)
+        assert index.page([('val', False)], 0, 3) == [
+            dict(val=1), dict(val=3), dict(val='a')]
+
+    def test_mixed_types_numbers(self):
+        """Test function."""
+        rows = [dict(val=10), dict(val='a'), dict(val=9), dict(val=None)]
+        index = munging.SortIndex(rows)
+        assert [row['val'] for row in index.page([('val', False)], 0, 4)] == \
+            [9, 10, 'a', None]
+        assert [row['val'] for row in index.page([('val', True)], 0, 4)] == \
+            ['a', 10, 9, None]
+
+    def test_none_last_descending(self):
+        """Test function."""
+        rows = [dict(val=1), dict(val=None), dict(val=3), dict(val=2)]
+        index = munging.SortIndex(rows)
+        assert [row['val'] for row in index.page([('val', True)], 0, 4)] == \
+            [3, 2, 1, None]
+        # Also when reversing the opposite order.
+        index = munging.SortIndex(rows)
+        index.order([('val', False)])
+        assert [row['val'] for row in index.page([('val', True)], 0, 4)] == \
+            [3, 2, 1, None]
+
+
+def _batch():
+    """Data for record batch tests."""
+    return munging.RecordBatch(
+        ('id', 'name', 'score'),
+        [array('l', [1, 2, 3]), ['foo', 'bar', 'baz'],
+         array('d', [0.5, 1.5, 2.5])])
+
+
+class TestRecordBatch:
+    """All tests for RecordBatch class."""
+
+    def test_rows(self):
+        """Test function."""
+        batch = _batch()
+        assert len(batch) == 3
+        rows = list(batch)
+        assert rows[1] == dict(id=2, name='bar', score=1.5)
+        assert list(rows[1]) == ['id', 'name', 'score']
+        assert rows[1].items() == [('id', 2), ('name', 'bar'), ('score', 1.5)]
+        assert rows[1].get('nope') is None
+        assert batch[-1]['name'] == 'baz'
+        with pytest.raises(IndexError):
+            batch[3]
+
+    def test_invalid(self):
+        """Test function."""
+        with pytest.raises(ValueError):
+            munging.RecordBatch(('a', 'b'), [[1]])
+        with pytest.raises(ValueError):
+            munging.RecordBatch(('a', 'b'), [[1], [1, 2]])
+
+    def test_from_rows(self):
+        """Test function."""
+        rows = [OrderedDict([('id', i), ('name', 'n{0}'.format(i))])
+                for i in range(3)]
+        batch = munging.RecordBatch.from_rows(
+            iter(rows), typecodes={'id': 'l'})
+        assert batch.header == ('id', 'name')
+        assert isinstance(batch.column('id'), array)
+        assert list(batch) == rows
+        batch = munging.RecordBatch.from_rows(
+            [Row(id=1, name='foo')], header=('name', 'missing'))
+        assert list(batch) == [dict(name='foo', missing=None)]
+        assert len(munging.RecordBatch.from_rows([])) == 0
+
+    def test_file(self, tmpdir):
+        """Test function."""
+        path = str(tmpdir.join('batch.bin'))
+        batch = munging.RecordBatch(
+            ('id', 'score'), [array('l', range(100)),
+                              array('d', [i / 2.0 for i in range(100)])])
+        batch.to_file(path)
+        mapped = munging.RecordBatch.from_file(
+            path, ('id', 'score'), ('l', 'd'))
+        assert len(mapped) == 100
+        assert list(mapped) == list(batch)
+        mapped.close()
+        with pytest.raises(TypeError):
+            _batch().to_file(path)
+
+    def test_file_close(self, tmpdir):
+        """Test function."""
+        path = str(tmpdir.join('batch.bin'))
+        munging.RecordBatch(('id',), [array('l', range(10))]).to_file(path)
+        with munging.RecordBatch.from_file(path, ('id',), ('l',)) as batch:
+            assert batch[9] == dict(id=9)
+        assert batch._mapped is None
+        batch.close()
+        open(path, 'ab').write(b'x')
+        with pytest.raises(ValueError):
+            munging.RecordBatch.from_file(path, ('id',), ('l',))
+
+    def test_file_empty(self, tmpdir):
+        """Test function."""
+        path = str(tmpdir.join('batch.bin'))
+        open(path, 'wb').close()
+        assert len(munging.RecordBatch.from_file(path, ('id',), ('l',))) == 0
+
+    def test_select(self):
+        """Test function."""
+        batch = _batch().select(['score', 'nope', 'id'])
+        assert batch.header == ('score', 'id')
+        assert batch[0] == dict(score=0.5, id=1)
+        batch = _batch().with_column('name', ['a', 'b', 'c'])
+        assert batch.column('name') == ['a', 'b', 'c']
+        batch = batch.with_column('new', [1, 2, 3])
+        assert batch.header == ('id', 'name', 'score', 'new')
+
+    def test_filters(self):
+        """Test function."""
+        batch = _batch()
+        res = munging.filter_keys(batch, ['score'])
+        assert isinstance(res, munging.RecordBatch)
+        assert res.header == ('id', 'name')
+        res = munging.sort_dict_keys_from_reflist(batch, ['name', 'id'])
+        assert res.header == ('name', 'id')
+        res = munging.filter_vals(batch, ['bar'])
+        assert list(res)[1] == dict(id=2, score=1.5)
+        res = munging.group_by(batch, groups=[('g', ('baz', 'foo'))])
+        assert [row['id'] for row in res['g']] == [3, 1]
+        assert [row['id'] for row in res['__unlabeled']] == [2]
+
+    def test_macros(self):
+        """Test function."""
+        source = ("{% from 'macros.html' import objects2table %}"
+                  "{% from 'bootstrap.html' import table_panels %}"
+                  "{{ objects2table(rows, order=['name', 'id']) }}"
+                  "{{ table_panels([{'title': rows}]) }}")
+        with app.app_context():
+            res = render_template_string(source, rows=_batch())
+            expected = render_template_string(
+                source, rows=[OrderedDict(row.items()) for row in _batch()])
+        assert res == expected
+        assert res.count('baz') == 2
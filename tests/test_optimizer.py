@@ -0,0 +1,172 @@
+"""Test the template optimizer."""
+
+from flask import Flask
+
+from flask_extras import FlaskExtras
+from flask_extras import optimizer
+
+app = Flask('test_optimizer')
+app.config['FLASK_EXTRAS_OPTIMIZE_TEMPLATES'] = True
+FlaskExtras(app)
+
+plain_app = FlaskExtras(Flask('test_optimizer_plain'))
+
+
+def _render(source, **kwargs):
+    """Render with and without the optimizer."""
+    res = []
+    for _app in [app, plain_app]:
+        with _app.app_context():
+            res.append(_app.jinja_env.from_string(source).render(**kwargs))
+    return res
+
+
+def _code(source):
+    """Get the optimized python source of a template."""
+    return app.jinja_env.compile(source, raw=True)
+
+
+class TestConfig:
+    """All tests for enabling the optimizer."""
+
+    def test_disabled_by_default(self):
+        """Test function."""
+        assert plain_app.jinja_env.code_generator_class is not \
+            optimizer.OptimizingCodeGenerator
+
+    def test_enabled(self):
+        """Test function."""
+        assert app.jinja_env.code_generator_class is \
+            optimizer.OptimizingCodeGenerator
+
+    def test_unsupported(self, monkeypatch, recwarn):
+        """Test function."""
+        monkeypatch.setattr(optimizer, 'SUPPORTED', False)
+        _app = Flask('test_optimizer_unsupported')
+        _app.config['FLASK_EXTRAS_OPTIMIZE_TEMPLATES'] = True
+        FlaskExtras(_app)
+        assert _app.jinja_env.code_generator_class is not \
+            optimizer.OptimizingCodeGenerator
+        assert 'jinja 2.11' in str(recwarn.pop(UserWarning).message)
+
+
+class TestFoldHelpers:
+    """All tests for folding the native helpers."""
+
+    def test_apply_classes(self):
+        """Test function."""
+        source = "{{ apply_classes(['table', '<b>']) }}"
+        optimized, plain = _render(source)
+        assert optimized == plain
+        assert 'context.call' not in _code(source)
+
+    def test_apply_dattrs(self):
+        """Test function."""
+        source = "{{ apply_dattrs({'fooBar': 1}) }}"
+        optimized, plain = _render(source)
+        assert optimized == plain
+        assert 'context.call' not in _code(source)
+
+    def test_apply_prop(self):
+        """Test function."""
+        source = "{{ apply_prop('id', 'foo') }}"
+        optimized, plain = _render(source)
+        assert optimized == plain
+        assert 'context.call' not in _code(source)
+
+    def test_not_constant(self):
+        """Test function."""
+        source = "{{ apply_prop('id', id) }}"
+        optimized, plain = _render(source, id='foo')
+        assert optimized == plain
+        assert 'context.call' in _code(source)
+
+    def test_concatenation(self):
+        """Test function."""
+        source = "{{ apply_classes(classes + ['carousel', 'slide']) }}"
+        optimized, plain = _render(source, classes=['a', '<b>'])
+        assert optimized == plain
+        # The constant classes are folded into one string (whose repr has
+        # a u prefix in python 2).
+        code = _code(source)
+        assert "'carousel slide ')" in code
+        assert "'slide'" not in code
+
+    def test_shadowed(self):
+        """Test function."""
+        for source in [
+            "{% set apply_prop = foo %}{{ apply_prop('id', 'foo') }}",
+            "{% macro apply_prop(a, b) %}{% endmacro %}"
+            "{{ apply_prop('id', 'foo') }}",
+            "{% for apply_prop in [foo] %}{{ apply_prop('id', 'foo') }}"
+            "{% endfor %}",
+        ]:
+            assert 'context.call' in _code(source)
+
+    def test_overridden_global(self):
+        """Test function."""
+        _app = Flask('test_optimizer_override')
+        _app.config['FLASK_EXTRAS_OPTIMIZE_TEMPLATES'] = True
+        FlaskExtras(_app)
+        _app.jinja_env.globals['apply_prop'] = lambda name, val: 'custom'
+        with _app.app_context():
+            res = _app.jinja_env.from_string(
+                "{{ apply_prop('id', 'foo') }}").render()
+        assert res == 'custom'
+
+
+class TestFoldMacros:
+    """All tests for folding the `utils.html` macros."""
+
+    def test_constant(self):
+        """Test function."""
+        source = ("{% from 'utils.html' import titleize, ip_link %}"
+                  "{{ titleize('foo_bar-baz') }}{{ ip_link('127.0.0.1') }}")
+        optimized, plain = _render(source)
+        assert optimized == plain
+        assert 'context.call' not in _code(source)
+
+    def test_not_constant(self):
+        """Test function."""
+        source = ("{% from 'utils.html' import titleize %}"
+                  "{{ titleize(val) }}")
+        optimized, plain = _render(source, val='foo_bar')
+        assert optimized == plain
+        assert 'context.call' in _code(source)
+
+    def test_native_helpers(self):
+        """Test function."""
+        source = ("{% from 'utils.html' import apply_classes as ac %}"
+                  "{{ ac(classes) }}")
+        optimized, plain = _render(source, classes=['a', 'b'])
+        assert optimized == plain
+        assert "environment.globals['apply_classes']" in _code(source)
+
+    def test_app_template_not_folded(self, tmpdir):
+        """Test function."""
+        tmpdir.join('utils.html').write(
+            '{% macro titleize(val) %}custom{% endmacro %}')
+        _app = Flask('test_optimizer_app', template_folder=str(tmpdir))
+        _app.config['FLASK_EXTRAS_OPTIMIZE_TEMPLATES'] = True
+        FlaskExtras(_app)
+        with _app.app_context():
+            res = _app.jinja_env.from_string(
+                "{% from 'utils.html' import titleize %}"
+                "{{ titleize('foo') }}").render()
+        assert res == 'custom'
+
+
+class TestBundledMacros:
+    """All tests for rendering the bundled macros with the optimizer."""
+
+    def test_same_output(self):
+        """Test function."""
+        source = (
+            "{% from 'macros.html' import dict2list, list2list %}"
+            "{% from 'bootstrap.html' import bs3_label, bs3_list_group %}"
+            "{{ dict2list(data, classes=['a']) }}"
+            "{{ list2list(['a', 'b'], classes=['b']) }}"
+            "{{ bs3_label('prod', {'prod': 'danger'}) }}"
+            "{{ bs3_list_group(['a', 'b'], classes=['c']) }}")
+        optimized, plain = _render(source, data={'foo': 'bar'})
+        assert optimized == plain
@@ -0,0 +1,281 @@
+"""Test the wtform_form render plans and native renderer."""
+
+import re
+
+from flask import Flask, render_template_string
+from werkzeug.datastructures import MultiDict
+from wtforms import BooleanField
+from wtforms import Form
+from wtforms import FormField
+from wtforms import HiddenField
+from wtforms import IntegerField
+from wtforms import StringField
+from wtforms import SubmitField
+from wtforms import validators
+
+from flask_extras import FlaskExtras
+from flask_extras.renderers import forms
+
+app = Flask('test_renderers_forms')
+FlaskExtras(app)
+
+
+class AddressForm(Form):
+    """Form."""
+
+    street = StringField(validators=[validators.DataRequired()])
+    city = StringField(description='<i>The city</i>')
+
+
+class SomeForm(Form):
+    """Form."""
+
+    hideme = HiddenField()
+    name = StringField()
+    is_admin = BooleanField()
+    nickname = StringField()
+    address = FormField(AddressForm)
+
+
+class ValidatedForm(SomeForm):
+    """Form."""
+
+    age = IntegerField(validators=[validators.NumberRange(min=18)])
+    go = SubmitField()
+
+
+class AccentedForm(Form):
+    """Form."""
+
+    nom = StringField(
+        u'Pr\xe9nom', description=u'Votre pr\xe9nom',
+        validators=[validators.Length(min=5, message=u'Tr\xe8s court')])
+    est_actif = BooleanField(u'\xc9tat')
+
+
+def _normalize(html):
+    """Collapse whitespace as browsers do, so markup can be compared.
+
+    Whitespace between tags is kept (as a single space), as it can render
+    as a space; only that around attribute values and before the end of a
+    tag is removed.
+    """
+    html = re.sub(r'\s+', ' ', html)
+    html = re.sub(r'="\s+', '="', html)
+    html = re.sub(r'\s+"', '"', html)
+    return re.sub(r'\s+>', '>', html).strip()
+
+
+def _render_both(form, args=''):
+    """Render a form with the macro and the native renderer."""
+    custom = ("{% macro custom(field) %}CUSTOM-{{ field.name }}"
+              "{% endmacro %}")
+    with app.test_request_context():
+        macro = render_template_string(
+            custom + "{% from 'macros.html' import wtform_form %}"
+            "{{ wtform_form(form" + args + ") }}", form=form)
+        native = render_template_string(
+            custom + "{{ render_wtform_form(form" + args + ") }}", form=form)
+    return _normalize(macro), _normalize(native)
+
+
+def _names(groups):
+    """Get the field names of bound plan groups."""
+    return [[field.name for field, _ in fields] for _, fields in groups]
+
+
+class TestWtformPlan:
+    """All tests for wtform_plan function."""
+
+    def test_registered_global(self):
+        """Test function."""
+        assert app.jinja_env.globals['wtform_plan'] is forms.wtform_plan
+
+    def test_no_groups(self):
+        """Test function."""
+        groups = forms.wtform_plan(SomeForm())
+        assert _names(groups) == [
+            ['hideme', 'name', 'is_admin', 'nickname', 'address']]
+        group, fields = groups[0]
+        assert not group.opens and not group.closes
+        assert [item.hidden for _, item in fields] == [
+            True, False, False, False, False]
+        assert [item.last for _, item in fields] == [
+            False, False, False, False, True]
+
+    def test_groups(self):
+        """Test function."""
+        groups = forms.wtform_plan(SomeForm(), fieldset_groups=[
+            (('Who', 'About you'), ('nickname', 'name')),
+            ('Empty group', ('foo',)),
+        ])
+        assert _names(groups) == [
+            ['nickname', 'name'], [], ['hideme', 'is_admin', 'address']]
+        who, empty, rest = [group for group, _ in groups]
+        assert (who.legend, who.legend_desc, who.selector) == \
+            ('Who', 'About you', 'who')
+        assert who.opens and who.closes
+        assert not empty.opens and not empty.closes
+        assert not rest.opens and not rest.closes
+
+    def test_flattened_formfield(self):
+        """Test function."""
+        groups = forms.wtform_plan(SomeForm(), preserve_formfield=False)
+        assert _names(groups)[0][-2:] == ['address-street', 'address-city']
+        assert [item.last for _, item in groups[0][1]][-3:] == [
+            False, False, True]
+
+    def test_field_options(self):
+        """Test function."""
+        groups = forms.wtform_plan(
+            SomeForm(), input_classes=['form-control'],
+            field_classes={'name': ['input-lg']},
+            field_macros={'nickname': None})
+        items = dict((field.name, item) for field, item in groups[0][1])
+        assert items['name'].classes == 'form-control input-lg'
+        assert items['is_admin'].classes == 'form-control'
+        assert items['is_admin'].qmark == '?'
+        assert items['name'].qmark == ''
+        assert items['nickname'].macro and not items['nickname'].label
+
+    def test_cached(self):
+        """Test function."""
+        forms.PLANS.clear()
+        first = forms.wtform_plan(SomeForm(), input_classes=['a'])
+        second = forms.wtform_plan(SomeForm(), input_classes=['a'])
+        assert forms.PLANS.info().hits == 1
+        assert first[0][0] is second[0][0]
+        # Fields are bound per render.
+        assert first[0][1][0][0] is not second[0][1][0][0]
+        forms.wtform_plan(SomeForm(), input_classes=['b'])
+        assert len(forms.PLANS) == 2
+
+    def test_cached_by_fields(self):
+        """Test function."""
+        forms.PLANS.clear()
+        form = SomeForm()
+        del form.nickname
+        assert 'nickname' not in _names(forms.wtform_plan(form))[0]
+        assert 'nickname' in _names(forms.wtform_plan(SomeForm()))[0]
+        assert len(forms.PLANS) == 2
+
+    def test_unhashable_options(self):
+        """Test function."""
+        groups = forms.wtform_plan(
+            SomeForm(), field_classes={'name': [{'not': 'hashable'}]})
+        assert _names(groups) == [
+            ['hideme', 'name', 'is_admin', 'nickname', 'address']]
+
+
+class TestWtformForm:
+    """All tests for rendering the wtform_form macro with plans."""
+
+    def _render(self, args=''):
+        """Render a form with the macro."""
+        with app.test_request_context():
+            return render_template_string(
+                "{% from 'macros.html' import wtform_form %}"
+                "{{ wtform_form(form" + args + ") }}", form=SomeForm())
+
+    def test_render(self):
+        """Test function."""
+        res = self._render(", input_classes=['form-control']")
+        assert 'Is Admin?</label>' in res
+        assert 'class="form-control" id="name"' in res
+        assert '<input id="hideme" name="hideme" type="hidden"' in res
+
+    def test_render_groups(self):
+        """Test function."""
+        res = self._render(
+            ", fieldset_groups=[(('Who', 'About you'), ('name',))]")
+        assert '<fieldset class="fieldset-group-who">' in res
+        assert 'fieldset-legend-description">About you</span>' in res
+        assert res.count('</fieldset>') == 1
+
+    def test_render_field_macros(self):
+        """Test function."""
+        with app.test_request_context():
+            res = render_template_string(
+                "{% from 'macros.html' import wtform_form %}"
+                "{% macro custom(field) %}CUSTOM-{{ field.name }}"
+                "{% endmacro %}"
+                "{{ wtform_form(form, field_macros={'name': custom}) }}",
+                form=SomeForm())
+        assert 'CUSTOM-name' in res
+        assert 'for="name"' not in res
+
+
+class TestRenderWtformForm:
+    """All tests for render_wtform_form function."""
+
+    def test_registered_global(self):
+        """Test function."""
+        assert 'render_wtform_form' in app.jinja_env.globals
+
+    def test_same_as_macro(self):
+        """Test function."""
+        macro, native = _render_both(ValidatedForm())
+        assert 'Is Admin?</label>' in native
+        # Whitespace that renders as a space is kept.
+        assert '</label> <input' in native
+        assert macro == native
+
+    def test_same_as_macro_with_errors(self):
+        """Test function."""
+        form = ValidatedForm(MultiDict({'age': '3'}))
+        form.validate()
+        macro, native = _render_both(form, ", preserve_formfield=False")
+        assert '<div class="has-error">' in native
+        assert "<li>Number must be at least 18.</li>" in native
+        assert macro == native
+
+    def test_same_as_macro_horizontal(self):
+        """Test function."""
+        macro, native = _render_both(
+            ValidatedForm(), ", horizontal=True, wrap_inputs=True, "
+            "linebreaks=True, align='right', colsizes=[3, 9]")
+        assert '<hr>' in native
+        assert macro == native
+
+    def test_same_as_macro_groups(self):
+        """Test function."""
+        macro, native = _render_both(
+            ValidatedForm(), ", fieldset_groups=[(('Who <b>', 'About you'), "
+            "('name', 'age')), ('Other', ('go',))], legend='Ignored'")
+        assert 'fieldset-group-who-b-' in native
+        assert macro == native
+
+    def test_same_as_macro_options(self):
+        """Test function."""
+        macro, native = _render_both(
+            ValidatedForm(), ", action='/save?a=1&b=2', method='POST', "
+            "formid='myform', enctype='multipart/form-data', "
+            "classes=['form'], data_attrs={'fooBar': 'baz'}, "
+            "input_classes=['form-control'], field_classes={'name': ['lg']}, "
+            "field_macros={'nickname': custom}, legend='<Legend>', "
+            "btn_classes=['btn'], btn_text='Go', reset_btn_classes=['r']")
+        assert 'CUSTOM-nickname' in native
+        assert 'action="/save?a=1&amp;b=2"' in native
+        assert macro == native
+
+    def test_same_as_macro_non_ascii(self):
+        """Test function."""
+        form = AccentedForm(MultiDict({'nom': u'\xe9'}))
+        form.validate()
+        macro, native = _render_both(form, u", legend='Donn\xe9es'")
+        assert u'<legend>Donn\xe9es</legend>' in native
+        assert u'<li>Tr\xe8s court</li>' in native
+        assert macro == native
+        macro, native = _render_both(
+            form, u", fieldset_groups=[(('Donn\xe9es', '\xc0 propos'), "
+            u"('nom',))], horizontal=True")
+        assert u'\xc0 propos</span>' in native
+        assert macro == native
+
+    def test_same_as_macro_no_buttons(self):
+        """Test function."""
+        macro, native = _render_both(
+            ValidatedForm(), ", submit=False, use_fieldset=False, "
+            "questionize=False")
+        assert '<button' not in native
+        assert macro == native
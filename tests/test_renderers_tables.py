@@ -0,0 +1,324 @@
+"""Test native table renderers."""
+
+import re
+
+from array import array
+from collections import OrderedDict
+
+from flask import Flask, render_template_string
+
+from flask_extras import FlaskExtras
+from flask_extras.filters import munging
+from flask_extras.renderers import tables
+
+app = Flask('test_renderers_tables')
+FlaskExtras(app)
+
+
+def _normalize(html):
+    """Collapse insignificant whitespace so markup can be compared."""
+    # Substitutions on `Markup` escape the replacements (in python 2).
+    html = type(u'')(html)
+    html = re.sub(r'\s+', ' ', html)
+    html = re.sub(r'>\s+', '>', html)
+    html = re.sub(r'\s+<', '<', html)
+    html = re.sub(r'="\s+', '="', html)
+    return re.sub(r'\s+>', '>', html).strip()
+
+
+def _objs():
+    """Data for tests."""
+    return [
+        OrderedDict([('id', i), ('name', 'name{}'.format(i)),
+                     ('url', 'http://foo.com/{}'.format(i)),
+                     ('secret', 'shh')])
+        for i in range(5)
+    ]
+
+
+def _render_both(objs, args=''):
+    """Render with the macro and the native renderer."""
+    with app.app_context():
+        macro = render_template_string(
+            "{% from 'macros.html' import objects2table %}"
+            "{{ objects2table(objs" + args + ") }}", objs=objs)
+        native = render_template_string(
+            "{{ render_objects2table(objs" + args + ") }}", objs=objs)
+    return _normalize(macro), _normalize(native)
+
+
+class TestRenderObjects2Table:
+    """All tests for render_objects2table function."""
+
+    def test_registered_global(self):
+        """Test the renderer is available in templates."""
+        assert 'render_objects2table' in app.jinja_env.globals
+
+    def test_empty(self):
+        """Test function."""
+        res = tables.render_objects2table([])
+        assert res == ('<table class="" ><thead></thead>'
+                       '<tbody></tbody></table>')
+
+    def test_none(self):
+        """Test function."""
+        assert '<tbody></tbody>' in tables.render_objects2table(None)
+
+    def test_escapes_values(self):
+        """Test function."""
+        res = tables.render_objects2table([{'foo': '<b>'}])
+        assert '<td>&lt;b&gt;</td>' in res
+        assert '<th>foo</th>' in res
+
+    def test_non_ascii(self):
+        """Test function."""
+        objs = [OrderedDict([('id', 1), (u'n\xe4me', u'\xe9<'),
+                             ('url', u'http://foo.com/\xe9')])]
+        res = tables.render_objects2table(
+            objs, id=u'\xfcsers', classes=[u'caf\xe9'], pk_link='/users')
+        assert u'<table id="\xfcsers" class="caf\xe9 " >' in res
+        assert u'<th>n\xe4me</th>' in res
+        assert u'<td>\xe9&lt;</td>' in res
+        assert u'href="http://foo.com/\xe9"' in res
+        assert u''.join(tables.stream_objects2table(objs)) == \
+            tables.render_objects2table(objs)
+        macro, native = _render_both(objs, ", pk_link='/users'")
+        assert macro == native
+
+    def test_order(self):
+        """Test function."""
+        res = tables.render_objects2table(
+            _objs(), order=['name', 'id'], handle_links=False)
+        assert '<th>name</th><th>id</th></thead>' in res
+        assert '<tr><td>name0</td><td>0</td></tr>' in res
+
+    def test_filtervals_empty_cell(self):
+        """Test function."""
+        res = tables.render_objects2table(
+            _objs(), filtervals=['shh'], filterkeys=['url'])
+        assert '<td></td></tr>' in res
+        assert 'http://' not in res
+
+    def test_unhashable_filtervals(self):
+        """Test function."""
+        res = tables.render_objects2table(
+            [{'foo': [1]}, {'foo': [2]}], filtervals=[[1]])
+        assert '<tr><td></td></tr><tr><td>[2]</td></tr>' in res
+
+    def test_generator_input(self):
+        """Test function."""
+        res = tables.render_objects2table(obj for obj in _objs())
+        assert res.count('<tr>') == 5
+        assert res.count('<th>') == 4
+
+    def test_mixed_row_shapes(self):
+        """Test function."""
+        res = tables.render_objects2table([{'a': 1}, {'a': 2, 'b': 3}])
+        assert '<tr><td>2</td><td>3</td></tr>' in res
+
+    def test_matches_macro(self):
+        """Test the output matches the objects2table macro."""
+        macro, native = _render_both(_objs())
+        assert macro == native
+
+    def test_matches_macro_options(self):
+        """Test the output matches the objects2table macro."""
+        macro, native = _render_both(
+            _objs(),
+            ", order=['secret', 'id', 'url'], filterkeys=['name'], "
+            "filtervals=['shh'], pk_link='/items', id='tbl', "
+            "classes=['table', 'table-striped'], "
+            "data_attrs={'dataTable': 'true'}")
+        assert macro == native
+
+    def test_matches_macro_compiled_order(self):
+        """Test the output matches the objects2table macro."""
+        macro, native = _render_both(
+            _objs(), ", order=['secret', 'id', 'url']|compile_reflist")
+        assert macro == native
+        assert macro == _render_both(
+            _objs(), ", order=['secret', 'id', 'url']")[0]
+
+    def test_matches_macro_filter_spec(self):
+        """Test the output matches the objects2table macro."""
+        with app.app_context():
+            app.jinja_env.globals['hidden'] = munging.FilterSpec(
+                ['secret'], predicates=[lambda key: key.startswith('u')])
+            try:
+                macro, native = _render_both(
+                    _objs(), ", filterkeys=hidden, filter_headings=hidden")
+            finally:
+                del app.jinja_env.globals['hidden']
+        assert macro == native
+        assert 'secret' not in macro
+        assert 'url' not in macro
+
+    def test_matches_macro_no_links(self):
+        """Test the output matches the objects2table macro."""
+        macro, native = _render_both(
+            _objs(), ", handle_links=False, filter_headings=['url']")
+        assert macro == native
+
+
+class TestStreamObjects2Table:
+    """All tests for stream_objects2table function."""
+
+    def _counting(self, objs, consumed):
+        """Yield objects, recording how many have been consumed."""
+        for obj in objs:
+            consumed.append(obj)
+            yield obj
+
+    def test_registered_global(self):
+        """Test the renderer is available in templates."""
+        assert 'stream_objects2table' in app.jinja_env.globals
+
+    def test_matches_render(self):
+        """Test the joined chunks match the full render."""
+        objs = _objs()
+        chunks = list(tables.stream_objects2table(
+            objs, chunksize=2, order=['name', 'id']))
+        assert ''.join(chunks) == tables.render_objects2table(
+            objs, order=['name', 'id'])
+
+    def test_chunk_count(self):
+        """Test rows are yielded in chunks."""
+        chunks = list(tables.stream_objects2table(_objs(), chunksize=2))
+        # Opening tag, 3 chunks of rows (2, 2, 1 + closing tag).
+        assert len(chunks) == 4
+        assert chunks[0].startswith('<table')
+        assert chunks[1].count('<tr>') == 2
+        assert chunks[-1].endswith('</table>')
+
+    def test_empty(self):
+        """Test function."""
+        chunks = list(tables.stream_objects2table([]))
+        assert ''.join(chunks) == tables.render_objects2table([])
+
+    def test_lazy(self):
+        """Test objects are only consumed as chunks are requested."""
+        consumed = []
+        objs = self._counting(_objs() * 100, consumed)
+        stream = tables.stream_objects2table(objs, chunksize=10)
+        next(stream)
+        assert len(consumed) == 1
+        next(stream)
+        assert len(consumed) <= 11
+
+    def test_stream_template(self):
+        """Test function."""
+        tmpl = app.jinja_env.from_string(
+            '{% for chunk in stream_objects2table(objs, chunksize=1) %}'
+            '{{ chunk }}{% endfor %}')
+        with app.app_context():
+            parts = list(tmpl.generate(objs=_objs()))
+        assert len(parts) > 5
+        assert ''.join(parts) == tables.render_objects2table(_objs())
+
+
+class TestDateFields:
+    """All tests for formatting date columns in the table renderers."""
+
+    def test_date_fields(self):
+        """Test function."""
+        objs = [OrderedDict([('id', i), ('created', '2016-01-0{} 10:00'.format(
+            i + 1))]) for i in range(3)]
+        res = tables.render_objects2table(
+            objs, date_fields={'created': '%d/%m/%Y'}, date_chunksize=2)
+        assert '<td>01/01/2016</td>' in res
+        assert '<td>03/01/2016</td>' in res
+        # The original objects are not modified.
+        assert objs[0]['created'] == '2016-01-01 10:00'
+
+    def test_date_fields_missing_key(self):
+        """Test function."""
+        res = tables.render_objects2table(
+            [{'a': 1}, {'a': 2, 'created': '2016-01-01'}],
+            date_fields={'created': '%Y'})
+        assert '<tr><td>1</td></tr><tr><td>2</td><td>2016</td></tr>' in res
+
+
+class TestRecordBatch:
+    """All tests for rendering record batches."""
+
+    def _batch(self):
+        """Data for tests."""
+        return munging.RecordBatch.from_rows(_objs())
+
+    def test_matches_rows(self):
+        """Test function."""
+        for kwargs in [{}, dict(order=['url', 'id']),
+                       dict(filterkeys=['secret'], filtervals=['name2'],
+                            pk_link='/items', handle_links=False)]:
+            assert tables.render_objects2table(self._batch(), **kwargs) == \
+                tables.render_objects2table(_objs(), **kwargs)
+
+    def test_numeric_columns(self):
+        """Test function."""
+        batch = munging.RecordBatch.from_rows(
+            _objs(), typecodes={'id': 'l'}).with_column(
+                'score', array('d', [0.5, 1, 2.25, 1e20, -3]))
+        objs = [dict(row.items()) for row in batch]
+        for kwargs in [{}, dict(pk_link='/items'),
+                       dict(filtervals=[1.0]),
+                       dict(field_macros={'score': lambda val: val * 2})]:
+            kwargs.update(order=batch.header)
+            assert tables.render_objects2table(batch, **kwargs) == \
+                tables.render_objects2table(objs, **kwargs)
+
+    def test_matches_macro(self):
+        """Test the output matches the objects2table macro."""
+        with app.app_context():
+            macro = render_template_string(
+                "{% from 'macros.html' import objects2table %}"
+                "{{ objects2table(objs, order=['name', 'id']) }}",
+                objs=self._batch())
+        native = tables.render_objects2table(
+            self._batch(), order=['name', 'id'])
+        assert _normalize(macro) == _normalize(native)
+
+    def test_character_columns(self):
+        """Test function."""
+        columns = [array('u', u'<&')]
+        if hasattr(memoryview, 'cast'):
+            columns.append(memoryview(b'<&').cast('c'))
+            assert tables._is_numeric(memoryview(array('l', [1])))
+        for column in columns:
+            res = tables.render_objects2table(
+                munging.RecordBatch(('a',), [column]))
+            assert '&lt;' in res and '&amp;' in res
+            assert '<td><' not in res
+        assert tables._is_numeric(array('d', [1.5]))
+        assert not tables._is_numeric(columns[0])
+
+    def test_non_ascii(self):
+        """Test function."""
+        batch = munging.RecordBatch(
+            ('id', u'n\xe4me'), [array('l', [1, 2]), [u'\xe9<', u'\xfc']])
+        res = tables.render_objects2table(batch, order=['id', u'n\xe4me'])
+        assert u'<th>n\xe4me</th>' in res
+        assert u'<tr><td>1</td><td>\xe9&lt;</td></tr>' in res
+
+    def test_empty(self):
+        """Test function."""
+        batch = munging.RecordBatch(('a',), [[]])
+        assert tables.render_objects2table(batch) == \
+            tables.render_objects2table([])
+        batch = munging.RecordBatch(('a',), [[1]])
+        assert '<tr></tr>' in tables.render_objects2table(
+            batch, filterkeys=['a'])
+
+    def test_stream(self):
+        """Test function."""
+        assert ''.join(tables.stream_objects2table(
+            self._batch(), chunksize=2)) == \
+            tables.render_objects2table(_objs())
+
+    def test_date_fields(self):
+        """Test function."""
+        batch = munging.RecordBatch(
+            ('id', 'created'), [[1, 2], ['2016-01-01', '2016-01-02']])
+        res = tables.render_objects2table(
+            batch, date_fields={'created': '%d/%m/%Y', 'missing': '%Y'})
+        assert '<td>02/01/2016</td>' in res
+        assert batch.column('created')[0] == '2016-01-01'
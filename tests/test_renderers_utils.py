@@ -0,0 +1,101 @@
+"""Test native attribute helpers."""
+
+from collections import OrderedDict
+
+import pytest
+
+from flask import Flask, render_template_string
+from markupsafe import Markup
+
+from flask_extras import FlaskExtras
+from flask_extras.renderers import utils
+
+app = Flask('test_renderers_utils')
+FlaskExtras(app)
+
+
+def _macro(name, *args):
+    """Call the `utils.html` macro version of a helper."""
+    with app.app_context():
+        module = app.jinja_env.get_template('utils.html').module
+        return getattr(module, name)(*args)
+
+
+class TestApplyClasses:
+    """All tests for apply_classes function."""
+
+    @pytest.mark.parametrize('classes', [
+        [], ['a'], ['a', 'b'], ['<b>', '"q"'], ('a', 'b'), [None, 1],
+        [Markup('<i>')],
+    ])
+    def test_same_as_macro(self, classes):
+        """Test function."""
+        res = utils.apply_classes(classes)
+        assert isinstance(res, Markup)
+        assert res == _macro('apply_classes', classes)
+
+    def test_classes_str(self):
+        """Test function."""
+        assert utils.classes_str(['a', '<b>']) == 'a &lt;b&gt; '
+
+
+class TestApplyProp:
+    """All tests for apply_prop function."""
+
+    @pytest.mark.parametrize('name,val', [
+        ('id', 'foo'), ('id', '<foo>'), ('id', ''), ('id', None), ('', 'x'),
+        (None, 'x'), ('id', 0), ('id', 1),
+    ])
+    def test_same_as_macro(self, name, val):
+        """Test function."""
+        res = utils.apply_prop(name, val)
+        assert isinstance(res, Markup)
+        assert res == _macro('apply_prop', name, val)
+
+
+class TestApplyDattrs:
+    """All tests for apply_dattrs function."""
+
+    @pytest.mark.parametrize('data_attrs', [
+        [], {}, ['foo', 'bar'], ['<x>'],
+        OrderedDict([('fooBar', 'x'), ('baz', 1), ('q', "'<>")]),
+    ])
+    def test_same_as_macro(self, data_attrs):
+        """Test function."""
+        res = utils.apply_dattrs(data_attrs)
+        assert isinstance(res, Markup)
+        assert res == _macro('apply_dattrs', data_attrs)
+
+    def test_dattrs_str(self):
+        """Test function."""
+        assert utils.dattrs_str({'fooBar': 1}) == "data-foo-bar='1' "
+        assert utils.dattrs_str(['foo']) == 'data-foo '
+
+
+class TestRegistered:
+    """All tests for helper registration."""
+
+    def test_globals(self):
+        """Test function."""
+        for name in ['apply_classes', 'apply_dattrs', 'apply_prop']:
+            assert app.jinja_env.globals[name] is getattr(utils, name)
+
+    def test_selective_registration(self):
+        """Test the helpers are registered whichever filters are used."""
+        app = FlaskExtras(Flask('test_renderers_utils2'), filters=['slugify'])
+        assert 'apply_classes' in app.jinja_env.globals
+
+    def test_used_by_macros(self):
+        """Test function."""
+        calls = []
+
+        def apply_classes(classes):
+            calls.append(classes)
+            return utils.apply_classes(classes)
+        app = FlaskExtras(Flask('test_renderers_utils3'))
+        app.jinja_env.globals['apply_classes'] = apply_classes
+        with app.app_context():
+            render_template_string(
+                "{% from 'macros.html' import dict2list %}"
+                "{{ dict2list({'a': 1}, classes=['foo']) }}")
+        assert calls == [['foo']]
@@ -0,0 +1,344 @@
+"""Test template loading and compilation utilities."""
+
+import os
+import re
+import time
+
+import pytest
+
+from flask import Flask
+from jinja2 import TemplateNotFound
+
+from flask_extras import FlaskExtras
+from flask_extras import templating
+
+
+def _app(cache_dir, enabled=True):
+    """Make a new app (and so a new jinja environment) for tests."""
+    app = Flask('test_templating')
+    app.config['FLASK_EXTRAS_BYTECODE_CACHE'] = enabled
+    app.config['FLASK_EXTRAS_BYTECODE_CACHE_DIR'] = cache_dir
+    return FlaskExtras(app)
+
+
+def _load_time(app, name='macros.html'):
+    """Time loading (and compiling, if not cached) a template."""
+    start = time.time()
+    app.jinja_env.get_template(name)
+    return time.time() - start
+
+
+class TestBytecodeCache:
+    """All tests for the macros bytecode cache."""
+
+    def test_disabled_by_default(self):
+        """Test function."""
+        app = FlaskExtras(Flask('test_templating'))
+        assert app.jinja_env.bytecode_cache is None
+
+    def test_enabled(self, tmpdir):
+        """Test function."""
+        app = _app(str(tmpdir))
+        cache = app.jinja_env.bytecode_cache
+        assert isinstance(cache, templating.MacrosBytecodeCache)
+        assert cache.directory == str(tmpdir)
+
+    def test_creates_directory(self, tmpdir):
+        """Test function."""
+        cache_dir = os.path.join(str(tmpdir), 'foo', 'bar')
+        _app(cache_dir)
+        assert os.path.isdir(cache_dir)
+
+    def test_versioned_files(self, tmpdir):
+        """Test function."""
+        app = _app(str(tmpdir))
+        app.jinja_env.get_template('utils.html')
+        files = os.listdir(str(tmpdir))
+        assert len(files) == 1
+        assert files[0].startswith('__flask_extras_4.')
+
+    def test_only_macros(self, tmpdir):
+        """Test templates outside of the macros folder are not cached."""
+        app = _app(str(tmpdir))
+        app.jinja_env.from_string('{{ foo }}')
+        cache = app.jinja_env.bytecode_cache
+        bucket = cache.get_bucket(
+            app.jinja_env, 'foo.html', '/tmp/foo.html', '{{ foo }}')
+        cache.set_bucket(bucket)
+        assert os.listdir(str(tmpdir)) == []
+
+    def test_cold_vs_warm(self, tmpdir):
+        """Test loading compiled macros from a warm cache is faster."""
+        names = ['macros.html', 'bootstrap.html']
+        cold = sum(_load_time(_app(str(tmpdir)), name) for name in names)
+        assert len(os.listdir(str(tmpdir))) == len(names)
+        warm = min(
+            sum(_load_time(_app(str(tmpdir)), name) for name in names)
+            for _ in range(3))
+        print('cold compile: {0:.4f}s, warm cache: {1:.4f}s'.format(
+            cold, warm))
+        assert warm < cold
+
+
+class TestCompiledMacros:
+    """All tests for precompiled macro modules."""
+
+    source = ("{% from 'macros.html' import dict2list %}"
+              "{% from 'bootstrap.html' import bs3_label %}"
+              "{{ dict2list({'foo': 'bar'}, classes=['a']) }}"
+              "{{ bs3_label('prod', {'prod': 'danger'}) }}")
+
+    def test_default_loader(self):
+        """Test function."""
+        app = FlaskExtras(Flask('test_templating'))
+        assert isinstance(app.jinja_loader, templating.MacrosLoader)
+
+    def test_compile_macros(self, tmpdir):
+        """Test function."""
+        templating.compile_macros(str(tmpdir))
+        files = [f for f in os.listdir(str(tmpdir)) if f.endswith('.py')]
+        assert len(files) == 14
+
+    def test_compile_macros_zip(self, tmpdir):
+        """Test function."""
+        target = os.path.join(str(tmpdir), 'macros.zip')
+        templating.main([target, '--zip', 'deflated'])
+        assert os.path.isfile(target)
+
+    def test_module_loader_renders_same(self, tmpdir):
+        """Test function."""
+        templating.compile_macros(str(tmpdir))
+        app = Flask('test_templating')
+        app.config['FLASK_EXTRAS_COMPILED_MACROS'] = str(tmpdir)
+        FlaskExtras(app)
+        loaders = app.jinja_env.loader.loaders
+        assert isinstance(loaders[-1], templating.ModuleLoader)
+        with app.app_context():
+            compiled = app.jinja_env.from_string(self.source).render()
+        app = FlaskExtras(Flask('test_templating'))
+        with app.app_context():
+            source = app.jinja_env.from_string(self.source).render()
+        assert compiled == source
+        assert 'label-danger' in compiled
+
+
+def _count_stats(monkeypatch):
+    """Count calls to `os.stat`, which jinja uses to check for changes."""
+    calls = []
+    stat = os.stat
+
+    def counting_stat(*args, **kwargs):
+        calls.append(args)
+        return stat(*args, **kwargs)
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    return calls
+
+
+class TestMacrosLoader:
+    """All tests for the in-memory macros loader."""
+
+    prefixed = ("{% from 'extras/macros.html' import dict2list %}"
+                "{{ dict2list({'foo': 'bar'}, classes=['a']) }}")
+    unprefixed = prefixed.replace('extras/', '')
+
+    def _render(self, app, source):
+        with app.app_context():
+            return app.jinja_env.from_string(source).render()
+
+    def test_prefixed_same_as_unprefixed(self):
+        """Test function."""
+        app = FlaskExtras(Flask('test_templating'))
+        assert (self._render(app, self.prefixed) ==
+                self._render(app, self.unprefixed))
+
+    def test_prefixed_imports(self):
+        """Test function."""
+        app = FlaskExtras(Flask('test_templating'))
+        source, filename, uptodate = app.jinja_loader.get_source(
+            app.jinja_env, 'extras/bootstrap.html')
+        assert "'extras/macros.html'" in source
+        assert "'macros.html'" not in source
+        assert filename == os.path.join(
+            templating.MACROS_DIR, 'bootstrap.html')
+        assert uptodate()
+
+    def test_custom_prefix(self):
+        """Test function."""
+        app = Flask('test_templating')
+        app.config['FLASK_EXTRAS_MACROS_PREFIX'] = 'fe'
+        FlaskExtras(app)
+        res = self._render(app, self.prefixed.replace('extras/', 'fe/'))
+        assert 'foo' in res
+
+    def test_not_found(self):
+        """Test function."""
+        app = FlaskExtras(Flask('test_templating'))
+        with pytest.raises(TemplateNotFound):
+            app.jinja_env.get_template('extras/nope.html')
+
+    def test_app_templates_first(self, tmpdir):
+        """Test function."""
+        tmpdir.join('utils.html').write('overridden')
+        app = FlaskExtras(Flask('test_templating',
+                                template_folder=str(tmpdir)))
+        with app.app_context():
+            assert app.jinja_env.get_template(
+                'utils.html').render() == 'overridden'
+            assert app.jinja_env.get_template(
+                'extras/utils.html').render() != 'overridden'
+
+    def test_list_templates(self):
+        """Test function."""
+        loader = templating.MacrosLoader()
+        templates = loader.list_templates()
+        assert 'macros.html' in templates
+        assert 'extras/macros.html' in templates
+
+    def test_no_stats(self, monkeypatch):
+        """Test function."""
+        app = FlaskExtras(Flask('test_templating'))
+        app.jinja_env.auto_reload = True
+        self._render(app, self.prefixed)
+        calls = _count_stats(monkeypatch)
+        for _ in range(10):
+            self._render(app, self.prefixed)
+        assert len(calls) == 0
+
+    def test_reload_macros(self, monkeypatch):
+        """Test function."""
+        app = Flask('test_templating')
+        app.config['FLASK_EXTRAS_RELOAD_MACROS'] = True
+        FlaskExtras(app)
+        app.jinja_env.auto_reload = True
+        self._render(app, self.unprefixed)
+        calls = _count_stats(monkeypatch)
+        for _ in range(10):
+            self._render(app, self.unprefixed)
+        assert len(calls) >= 10
+
+
+# A representative call of the larger macros, by template.
+TRIM_MACROS = [
+    ('macros.html', 'objects2table', "objects2table(objs)"),
+    ('macros.html', 'dict2list', "dict2list(dct)"),
+    ('macros.html', 'recurse_dictlist', "recurse_dictlist({'a': dct})"),
+    ('bootstrap.html', 'dict2_pagination', "dict2_pagination(dct)"),
+    ('bootstrap.html', 'dict2labels', "dict2labels(dct)"),
+    ('bootstrap.html', 'bs3_list_group', "bs3_list_group(dct.keys())"),
+    ('extras_code.html', 'tokenize_code', "tokenize_code('foo  bar\n baz')"),
+    ('extras_code.html', 'code', "code('{\n  \"a\": 1\n}')"),
+]
+
+
+def _render_macros(trim):
+    """Render the `TRIM_MACROS`, with or without trimming."""
+    app = Flask('test_templating')
+    app.config['FLASK_EXTRAS_TRIM_MACROS'] = trim
+    FlaskExtras(app)
+    objs = [dict(id=i, name='name{0}'.format(i), email='foo@bar.com')
+            for i in range(50)]
+    dct = dict(('page{0}'.format(i), '/{0}'.format(i)) for i in range(10))
+    rendered = {}
+    with app.test_request_context():
+        for template, name, call in TRIM_MACROS:
+            source = "{% from '" + template + "' import " + name + \
+                " %}{{ " + call + " }}"
+            rendered[name] = app.jinja_env.from_string(source).render(
+                objs=objs, dct=dct)
+    return rendered
+
+
+def _collapse(html):
+    """Collapse whitespace spanning lines, as browsers would."""
+    return re.sub(r'\s*\n\s*', '\n', html)
+
+
+class TestTrimMacros:
+    """All tests for trimming the macros whitespace."""
+
+    def test_disabled_by_default(self):
+        """Test function."""
+        app = FlaskExtras(Flask('test_templating'))
+        assert templating.TrimMacrosExtension not in [
+            type(ext) for ext in app.jinja_env.extensions.values()]
+
+    def test_trim_whitespace(self):
+        """Test function."""
+        assert templating._trim_whitespace('<a>\n   \n  <b> <c>') == \
+            ('<a>\n<b> <c>', False)
+        assert templating._trim_whitespace('<pre>\n  x\n') == \
+            ('<pre>\n  x\n', True)
+        assert templating._trim_whitespace('\n  x</PRE>\n  <p>', True) == \
+            ('\n  x</PRE>\n<p>', False)
+
+    def test_bytes_saved(self, capsys):
+        """Test function."""
+        untrimmed = _render_macros(False)
+        trimmed = _render_macros(True)
+        report = []
+        for template, name, _ in TRIM_MACROS:
+            # Only whitespace spanning lines is removed.
+            assert _collapse(untrimmed[name]) == _collapse(trimmed[name])
+            saved = len(untrimmed[name]) - len(trimmed[name])
+            report.append('{0}: {1} -> {2} bytes ({3} saved)'.format(
+                name, len(untrimmed[name]), len(trimmed[name]), saved))
+            # Code macros are mostly inside `<pre>`, which is preserved.
+            assert saved > 0 or template == 'extras_code.html'
+        with capsys.disabled():
+            print('\nTrimmed macros:\n  ' + '\n  '.join(report))
+        assert len(trimmed['objects2table']) < \
+            len(untrimmed['objects2table']) / 2
+
+    def test_pre_preserved(self):
+        """Test function."""
+        untrimmed = _render_macros(False)
+        trimmed = _render_macros(True)
+        pre = re.compile(r'<pre.*</pre>', re.DOTALL)
+        for name in ('code', 'tokenize_code'):
+            assert pre.search(trimmed[name]).group() == \
+                pre.search(untrimmed[name]).group()
+
+    def test_app_templates_untouched(self):
+        """Test function."""
+        app = Flask('test_templating')
+        app.config['FLASK_EXTRAS_TRIM_MACROS'] = True
+        FlaskExtras(app)
+        source = '<p>\n    \n    foo\n</p>'
+        assert app.jinja_env.from_string(source).render() == source
+
+    def test_bytecode_cache_versioned(self, tmpdir):
+        """Test function."""
+        app = Flask('test_templating')
+        app.config['FLASK_EXTRAS_TRIM_MACROS'] = True
+        app.config['FLASK_EXTRAS_BYTECODE_CACHE'] = True
+        app.config['FLASK_EXTRAS_BYTECODE_CACHE_DIR'] = str(tmpdir)
+        FlaskExtras(app)
+        app.jinja_env.get_template('macros.html')
+        files = os.listdir(str(tmpdir))
+        assert files
+        assert all('-trimmed_' in name for name in files)
+
+    def test_bytecode_cache_versioned_optimized(self, tmpdir):
+        """Test function."""
+        app = Flask('test_templating')
+        app.config['FLASK_EXTRAS_OPTIMIZE_TEMPLATES'] = True
+        app.config['FLASK_EXTRAS_BYTECODE_CACHE'] = True
+        app.config['FLASK_EXTRAS_BYTECODE_CACHE_DIR'] = str(tmpdir)
+        FlaskExtras(app)
+        app.jinja_env.get_template('macros.html')
+        files = os.listdir(str(tmpdir))
+        assert files
+        assert all('-optimized_' in name for name in files)
+
+    def test_compile_macros_trimmed(self, tmpdir):
+        """Test function."""
+        templating.main([str(tmpdir), '--trim'])
+        app = Flask('test_templating')
+        app.config['FLASK_EXTRAS_COMPILED_MACROS'] = str(tmpdir)
+        FlaskExtras(app)
+        source = ("{% from 'macros.html' import dict2list %}"
+                  "{{ dict2list({'foo': 'bar'}) }}")
+        with app.app_context():
+            res = app.jinja_env.from_string(source).render()
+        assert 'bar' in res
+        assert '  ' not in res
@@ -0,0 +1,248 @@
+"""Test the DataTables server-side processing views."""
+
+import json
+
+from flask import Flask
+
+from flask_extras import FlaskExtras
+from flask_extras.filters.munging import SortIndex
+from flask_extras.views import datatables
+
+app = Flask('test_views_datatables')
+FlaskExtras(app)
+
+COLUMNS = ['id', 'name', 'email', 'password']
+
+ROWS = [
+    dict(id=i, name='name{0}'.format(i % 7), email='user{0}@foo.com'.format(i),
+         password='shh', score=None if i % 5 == 0 else i % 3)
+    for i in range(100)
+]
+
+
+@app.route('/data')
+def data():
+    return datatables.datatable_response(
+        ROWS, COLUMNS, filterkeys=['password'], filtervals=['name3'])
+
+
+client = app.test_client()
+
+
+def _args(start=0, length=10, search='', order=None, **kwargs):
+    """Build DataTables request arguments."""
+    args = {'draw': '3', 'start': str(start), 'length': str(length),
+            'search[value]': search}
+    for i, (column, direction) in enumerate(order or []):
+        args['order[{0}][column]'.format(i)] = str(column)
+        args['order[{0}][dir]'.format(i)] = direction
+    args.update(kwargs)
+    return args
+
+
+def _json(args, rows=ROWS, columns=['id', 'name', 'score'], **kwargs):
+    """Process a request outside of a view."""
+    return datatables.datatable_json(rows, columns, args=args, **kwargs)
+
+
+class TestParseArgs:
+    """All tests for parse_args function."""
+
+    def test_defaults(self):
+        """Test function."""
+        params = datatables.parse_args({}, ['a', 'b'])
+        assert params == dict(draw=0, start=0, length=10, search='',
+                              searches=[], searchable=['a', 'b'], order=[])
+
+    def test_order_and_columns(self):
+        """Test function."""
+        args = _args(order=[(1, 'desc'), (0, 'asc'), (9, 'asc')], **{
+            'columns[0][orderable]': 'false',
+            'columns[1][searchable]': 'false',
+            'columns[0][search][value]': 'FOO',
+        })
+        params = datatables.parse_args(args, ['a', 'b'])
+        assert params['order'] == [('b', True)]
+        assert params['searchable'] == ['a']
+        assert params['searches'] == [('a', 'foo')]
+
+    def test_invalid_ints(self):
+        """Test function."""
+        params = datatables.parse_args(
+            {'draw': '<script>', 'start': '-5', 'length': 'x'}, ['a'])
+        assert (params['draw'], params['start'], params['length']) == \
+            (0, 0, 10)
+
+
+class TestDatatableJson:
+    """All tests for datatable_json function."""
+
+    def test_page(self):
+        """Test function."""
+        res = _json(_args(start=20, length=5))
+        assert res['draw'] == 3
+        assert res['recordsTotal'] == res['recordsFiltered'] == 100
+        assert [row[0] for row in res['data']] == [20, 21, 22, 23, 24]
+
+    def test_all_rows_capped(self):
+        """Test function."""
+        res = _json(_args(length=-1), max_length=30)
+        assert len(res['data']) == 30
+
+    def test_search(self):
+        """Test function."""
+        res = _json(_args(search='NAME2'))
+        assert res['recordsTotal'] == 100
+        assert res['recordsFiltered'] == 14
+        assert all(row[1] == 'name2' for row in res['data'])
+
+    def test_column_search(self):
+        """Test function."""
+        res = _json(_args(**{'columns[1][search][value]': 'name1',
+                             'columns[2][search][value]': '2'}))
+        expected = [row for row in ROWS
+                    if row['name'] == 'name1' and row['score'] == 2]
+        assert res['recordsFiltered'] == len(expected)
+        assert all(row[1] == 'name1' and row[2] == 2
+                   for row in res['data'])
+
+    def test_order(self):
+        """Test function."""
+        res = _json(_args(length=3, order=[(0, 'desc')]))
+        assert [row[0] for row in res['data']] == [99, 98, 97]
+
+    def test_order_window(self):
+        """Test function."""
+        expected = sorted(ROWS, key=lambda row: row['name'])[40:50]
+        res = _json(_args(start=40, order=[(1, 'asc')]))
+        assert [row[0] for row in res['data']] == \
+            [row['id'] for row in expected]
+
+    def test_order_multiple(self):
+        """Test function."""
+        expected = sorted(ROWS, key=lambda row: row['id'], reverse=True)
+        expected = sorted(expected, key=lambda row: row['name'])[:10]
+        res = _json(_args(order=[(1, 'asc'), (0, 'desc')]))
+        assert [row[0] for row in res['data']] == \
+            [row['id'] for row in expected]
+
+    def test_order_none_last(self):
+        """Test function."""
+        res = _json(_args(length=100, order=[(2, 'asc')]))
+        scores = [row[2] for row in res['data']]
+        assert scores[:80] == sorted(scores[:80])
+        assert scores[80:] == [None] * 20
+        res = _json(_args(length=100, order=[(2, 'desc')]))
+        scores = [row[2] for row in res['data']]
+        assert scores[:80] == sorted(scores[:80], reverse=True)
+        assert scores[80:] == [None] * 20
+        # Also when only the rows up to the window are selected.
+        res = _json(_args(length=10, order=[(2, 'desc')]))
+        assert [row[2] for row in res['data']] == scores[:10]
+
+    def test_order_mixed_types(self):
+        """Test function."""
+        rows = [dict(id=1, name=3), dict(id=2, name='a'), dict(id=3, name=1)]
+        res = _json(_args(order=[(1, 'asc')], length=2), rows=rows)
+        assert [row[0] for row in res['data']] == [3, 1]
+        rows = [dict(id=1, name=10), dict(id=2, name='a'), dict(id=3, name=9)]
+        res = _json(_args(order=[(1, 'asc')]), rows=rows)
+        assert [row[0] for row in res['data']] == [3, 1, 2]
+
+    def test_not_orderable(self):
+        """Test function."""
+        res = _json(_args(order=[(0, 'desc')],
+                          **{'columns[0][orderable]': 'false'}))
+        assert res['data'][0][0] == 0
+
+    def test_generator(self):
+        """Test function."""
+        res = _json(_args(start=95), rows=(row for row in ROWS))
+        assert res['recordsTotal'] == 100
+        assert [row[0] for row in res['data']] == [95, 96, 97, 98, 99]
+
+    def test_as_objects(self):
+        """Test function."""
+        res = _json(_args(length=1), columns=['name', 'id'], as_objects=True)
+        assert list(res['data'][0].items()) == [('name', 'name0'), ('id', 0)]
+
+    def test_as_objects_filtervals(self):
+        """Test function."""
+        res = _json(_args(start=3, length=1), columns=['id', 'name', 'nope'],
+                    filtervals=['name3'], as_objects=True)
+        assert res['data'] == [{'id': 3, 'name': '', 'nope': ''}]
+        res = _json(_args(start=3, length=1), columns=['id', 'name', 'nope'],
+                    filtervals=['name3'])
+        assert res['data'] == [[3, '', '']]
+
+    def test_escapes_strings(self):
+        """Test function."""
+        from markupsafe import Markup
+        rows = [dict(id=1, name='<b>x</b>', link=Markup('<a>y</a>'))]
+        columns = ['id', 'name', 'link']
+        res = _json(_args(), rows=rows, columns=columns)
+        assert res['data'] == [[1, '&lt;b&gt;x&lt;/b&gt;', '<a>y</a>']]
+        res = _json(_args(), rows=rows, columns=columns, as_objects=True)
+        assert res['data'][0]['name'] == '&lt;b&gt;x&lt;/b&gt;'
+        res = _json(_args(), rows=rows, columns=columns, autoescape=False)
+        assert res['data'] == [[1, '<b>x</b>', '<a>y</a>']]
+        res = _json(_args(search='<b>'), rows=rows, columns=columns)
+        assert res['recordsFiltered'] == 1
+
+    def test_objects(self):
+        """Test function."""
+        class Row(object):
+            def __init__(self, row):
+                self.__dict__.update(row)
+
+        objs = [Row(row) for row in ROWS]
+        for args in [
+            _args(start=20, length=5),
+            _args(start=40, order=[(1, 'asc'), (2, 'desc')]),
+            _args(search='name2', order=[(0, 'desc')]),
+            _args(**{'columns[1][search][value]': 'name1'}),
+        ]:
+            assert _json(args, rows=objs) == _json(args)
+            assert _json(args, rows=SortIndex(objs)) == _json(args)
+
+
+class TestSortIndex:
+    """All tests for using a SortIndex with datatable_json."""
+
+    def test_same_as_list(self):
+        """Test function."""
+        index = SortIndex(ROWS)
+        for args in [
+            _args(start=20, length=5),
+            _args(start=40, order=[(1, 'asc')]),
+            _args(start=5, order=[(1, 'desc'), (2, 'asc')]),
+            _args(search='name2', order=[(0, 'desc')]),
+            _args(search='name2', start=3, length=4),
+            _args(**{'columns[1][search][value]': 'name1'}),
+        ]:
+            assert _json(args, rows=index) == _json(args)
+
+    def test_orders_kept(self):
+        """Test function."""
+        index = SortIndex(ROWS)
+        _json(_args(order=[(1, 'asc')]), rows=index)
+        first = index.order([('name', False)])
+        _json(_args(start=10, order=[(1, 'asc')]), rows=index)
+        assert index.order([('name', False)]) is first
+
+
+class TestDatatableResponse:
+    """All tests for datatable_response function."""
+
+    def test_response(self):
+        """Test function."""
+        res = client.get('/data', query_string=_args(start=3, length=1))
+        assert res.status_code == 200
+        data = json.loads(res.data.decode('utf-8'))
+        assert data['data'] == [[3, '', 'user3@foo.com']]
+
+    def test_filterkeys_not_searched(self):
+        """Test function."""
+        res = client.get('/data', query_string=_args(search='shh'))
+        data = json.loads(res.data.decode('utf-8'))
+        assert data['recordsFiltered'] == 0